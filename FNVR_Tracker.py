@@ -1,14 +1,25 @@
 import math
-import keyboard
-import openvr
 import time
 import numpy as np
 import os
-import tkinter as tk
-from tkinter import ttk, filedialog
 import threading
-import pyautogui
+import heapq
 import json
+import ctypes
+import mmap
+import struct
+import csv
+import socket
+import multiprocessing
+from multiprocessing import shared_memory
+from collections import namedtuple, deque
+import argparse
+
+try:
+    import openvr
+except ImportError:
+    # Replay and synthetic pose sources don't need SteamVR, so let the tracker load without it.
+    openvr = None
 
 # --- DEFAULTS ---
 DEFAULT_GAME_PATH = 'E:/SteamLibrary/steamapps/common/Fallout New Vegas'
@@ -23,8 +34,135 @@ DEFAULT_HK_ROT = [0.0, 0.0, 0.0]
 
 DEFAULT_HOLSTER_CUTOFF = -0.55
 
+# Gesture edges (see GestureEngine): a target is entered within the position / rotation sensitivity and
+# only left again beyond exit_scale times that. Entering and leaving both have to hold for their dwell
+# time, and a target that was left can't be entered again for refractory_ms.
+DEFAULT_GESTURE_TIMING = {
+    "exit_scale": 1.25,
+    "enter_dwell_ms": 30,
+    "exit_dwell_ms": 60,
+    "refractory_ms": 150,
+}
+# Targets that start a timed sequence instead of holding a key. They never overlap.
+SEQUENCE_GESTURES = ("pipboy", "menu")
+
+# --- CALIBRATION PROFILES ---
+# How controller values (meters / degrees relative to the HMD) become the game's numbers, per axis of
+# x, y, z, yaw, pitch, roll. See CalibrationProfile. Profiles live in fnvr_config.txt under
+# "calibration_profiles" and "calibration_profile" picks the active one.
+CALIBRATION_AXES = ("x", "y", "z", "yaw", "pitch", "roll")
+DEFAULT_CALIBRATION = "default"
+DEFAULT_CALIBRATION_PROFILE = {
+    "scale": [85.0, 45.0, 70.0, 1.0, 1.0, 1.0],
+    "bias": [-2.0, 0.0, -5.42, 4.0, -4.0, 0.0],
+    # Output slot k is sign[k] * (adjusted axis order[k]) + output_bias[k]: iX, iY, iZ, iXr, iYr, iZr
+    "order": ["y", "x", "z", "pitch", "roll", "yaw"],
+    "sign": [1.0, -1.0, 1.0, 1.0, 1.0, 1.0],
+    "output_bias": [0.0, -10.0, 0.0, -60.0, 0.0, -10.0],
+    # Primary controller pose sent while it is below the holster cutoff
+    "holster_pose": [-0.4, 0.1, -0.17, 5.0, 40.0, 0.0],
+}
+
+# Tracking loop rate (Hz) and busy-wait tail before each deadline (ms)
+DEFAULT_TICK_RATE = 100
+TICK_RATE_CHOICES = (60, 90, 100, 120, 144)
+DEFAULT_BUSY_WAIT_MS = 0.0
+# Idle throttling (see AdaptiveRate): the loop drops to idle_rate once every device has stayed within
+# distance (meters) and angle (degrees) of where it was for idle_after_ms, and is back at full rate on the
+# first tick that sees motion.
+DEFAULT_ADAPTIVE_RATE = {
+    "enabled": True,
+    "idle_rate": 20,
+    "idle_after_ms": 2000,
+    "distance": 0.005,
+    "angle": 0.5,
+}
+
+# Pose prediction (ms): horizon handed to OpenVR, plus client-side extrapolation from device velocities
+DEFAULT_PREDICTION_MS = 0.0
+DEFAULT_EXTRAPOLATION_MS = 0.0
+# Jitter filter on the controller poses, after the HMD relative transform.
+# Per-axis parameters are lists in the order x, y, z (meters), yaw, pitch, roll (degrees); a single number
+# applies to every axis.
+POSE_FILTERS = ("none", "one_euro", "kalman")
+# Rotations are filtered as rotation vectors in the controller's own axes: x is pitch, y yaw and z roll,
+# the same axes as the Euler angles. These are the (yaw, pitch, roll) parameter columns for x, y, z.
+ROTATION_VECTOR_AXES = [4, 3, 5]
+DEFAULT_POSE_FILTER = "none"
+DEFAULT_ONE_EURO = {
+    "min_cutoff": [1.5, 1.5, 1.5, 1.5, 1.5, 1.5],  # Hz, smoothing when the hand is still
+    "beta": [150.0, 150.0, 150.0, 0.5, 0.5, 0.5],  # how fast the cutoff opens up with speed
+    "d_cutoff": 1.0,  # Hz, smoothing of the speed estimate
+}
+DEFAULT_KALMAN = {
+    "process_noise": [0.1, 0.1, 0.1, 1000.0, 1000.0, 1000.0],  # how hard the hand can accelerate
+    "measurement_noise": [2.5e-7, 2.5e-7, 2.5e-7, 0.04, 0.04, 0.04],  # tracking noise variance (m^2, deg^2)
+}
+# How often the GUI refreshes its labels from the latest tracking snapshot
+DEFAULT_DISPLAY_RATE = 20
+# Stages timed on every tick, in pipeline order (see SimpleTrackingApp.get_stats)
+TICK_STAGES = ("input", "poll", "transform", "filter", "encode", "gestures", "output", "snapshot", "record",
+               "total")
+PROFILE_DISPLAY_INTERVAL = 0.5
+
 CONFIG_FILE = 'fnvr_config.txt'
 
+# --- OUTPUT CHANNELS ---
+# "filename": encoded values live in the name of the single file in Data/NVSE/Test (what FNVR.esp reads).
+# "mmap": fixed layout memory-mapped file at Data/NVSE/fnvr_pose.bin, see MmapOutputChannel.
+DEFAULT_OUTPUT_CHANNEL = "filename"
+OUTPUT_CHANNELS = ("filename", "mmap")
+MMAP_FILE_NAME = "fnvr_pose.bin"
+# iX_iY_iZ_iXr_iYr_iZr_pXr_iX2_iY2_iZ2_iXr2_iYr2_iZr2
+OUTPUT_VALUE_COUNT = 13
+# Frames whose values match the last published frame at this many decimals are skipped,
+# but one is still sent every keep-alive interval
+OUTPUT_DECIMALS = 2
+DEFAULT_OUTPUT_DEDUP = True
+DEFAULT_OUTPUT_KEEPALIVE_MS = 1000.0
+# Windows paths hold at most MAX_PATH characters counting the closing NUL, and one name at most 255.
+# A value takes up to FILENAME_VALUE_WIDTH characters of the name ("-180.00" and its "_").
+MAX_PATH = 260
+MAX_FILENAME_LENGTH = 255
+FILENAME_VALUE_WIDTH = 8
+MMAP_MAGIC = b'FNVR'
+MMAP_VERSION = 1
+MMAP_MAX_VALUES = 64
+# magic, version, header size, value count, reserved, sequence, timestamp
+MMAP_HEADER = struct.Struct('<4sHHIIQd')
+
+# --- UDP FRAME PUBLISHER ---
+# Optional extra copy of every output frame, one datagram per tick to each target (see UdpFramePublisher)
+DEFAULT_UDP_PUBLISH = False
+DEFAULT_UDP_TARGETS = ["127.0.0.1:7331"]
+UDP_MAGIC = b'FNVU'
+UDP_VERSION = 1
+# magic, schema version, value count, reserved, sequence, frame time, send time; float32 values follow
+UDP_HEADER = struct.Struct('<4sHHIQdd')
+
+# --- BODY TRACKERS ---
+# Generic trackers (waist, feet, ...) get an output block each when their role or serial is listed in
+# "tracker_slots" in fnvr_config.txt. Blocks follow the controller values in slot order:
+# valid, iX, iY, iZ, iXr, iYr, iZr (all zero while that tracker is missing or lost)
+TRACKER_BLOCK_SIZE = 7
+MAX_TRACKER_SLOTS = (MMAP_MAX_VALUES - OUTPUT_VALUE_COUNT) // TRACKER_BLOCK_SIZE
+# SteamVR reports tracker roles set in "Manage Trackers" as controller types like "vive_tracker_waist"
+TRACKER_TYPE_PREFIX = "vive_tracker_"
+# Tracker values are taken from PoseBatch.pose6 columns in this order (like the controllers' z, x, y)
+TRACKER_AXES = np.array([2, 0, 1, 3, 4, 5])
+
+# --- SESSION RECORDING ---
+# Binary per-tick session log, see SessionRecorder. Records start at SESSION_HEADER_SIZE, the space before
+# holds the magic and a JSON description of the session.
+SESSION_MAGIC = b'FNVRSESS'
+SESSION_VERSION = 1
+SESSION_HEADER_SIZE = 4096
+# Devices stored per record: the HMD plus the first controllers
+SESSION_DEVICE_SLOTS = 4
+# Ticks held in memory between writes to disk
+SESSION_RING_SIZE = 1024
+SESSION_FLUSH_INTERVAL = 0.25
+
 # Global Offsets
 PitchOffset = 0.0
 RollOffset = 0.0
@@ -34,9 +172,132 @@ YOffset = 0.0
 ZOffset = 0.0
 ADJUST_SPEED = 0.5
 
-# Disable PyAutoGUI fail-safe
-pyautogui.FAILSAFE = False
-
+# tkinter and keyboard are imported on first use, so headless runs start quickly and work without a
+# display or keyboard hooks. See load_gui_modules() / load_keyboard().
+tk = ttk = filedialog = None
+
+
+def load_gui_modules():
+    global tk, ttk, filedialog
+    import tkinter as tk
+    from tkinter import ttk, filedialog
+
+
+def load_keyboard():
+    import keyboard
+    return keyboard
+
+# --- OPENVR CONSTANTS ---
+# Mirrored here so the tracker can run headless (replay / synthetic) on a machine without OpenVR.
+if openvr is not None:
+    MAX_TRACKED_DEVICES = openvr.k_unMaxTrackedDeviceCount
+    HMD_INDEX = openvr.k_unTrackedDeviceIndex_Hmd
+    TrackedDevicePose = openvr.TrackedDevicePose_t
+else:
+    MAX_TRACKED_DEVICES = 64
+    HMD_INDEX = 0
+
+    class _HmdMatrix34(ctypes.Structure):
+        _fields_ = [("m", (ctypes.c_float * 4) * 3)]
+
+        def __getitem__(self, key):
+            return self.m[key]
+
+    class _HmdVector3(ctypes.Structure):
+        _fields_ = [("v", ctypes.c_float * 3)]
+
+        def __getitem__(self, key):
+            return self.v[key]
+
+    class TrackedDevicePose(ctypes.Structure):
+        """ Same memory layout as openvr.TrackedDevicePose_t. """
+        _fields_ = [
+            ("mDeviceToAbsoluteTracking", _HmdMatrix34),
+            ("vVelocity", _HmdVector3),
+            ("vAngularVelocity", _HmdVector3),
+            ("eTrackingResult", ctypes.c_int),
+            ("bPoseIsValid", ctypes.c_bool),
+            ("bDeviceIsConnected", ctypes.c_bool),
+        ]
+
+RECORDING_VERSION = 1
+
+# Read-only copy of what the tracker produced on a tick. The tracking thread writes each tick into a
+# SnapshotRing and the GUI builds one from the newest slot, so neither side has to lock or wait on the other.
+FrameSnapshot = namedtuple("FrameSnapshot", [
+    "tick", "time", "hmd_pos", "hmd_rot", "controller_pos", "controller_rot",
+    "secondary_pos", "secondary_rot", "offset_pos", "offset_rot",
+    "gesture_active_type", "gesture_sequence_active", "last_activation_time", "tracker_valid",
+])
+
+# --- TRACKER PROCESS ---
+# With --process the loop runs in its own process (see TrackerProcess) and hands snapshots to the GUI
+# through a SnapshotRing in shared memory.
+SNAPSHOT_MAGIC = b'FNVS'
+SNAPSHOT_VERSION = 1
+SNAPSHOT_RING_SIZE = 64
+SNAPSHOT_GESTURE_LENGTH = 32
+# magic, version, ring size, snapshots written
+SNAPSHOT_HEADER = struct.Struct('<4sHHQ')
+PROCESS_STATS_INTERVAL = 0.05
+
+# NumPy view of the TrackedDevicePose array. Offsets come from the ctypes struct so this follows the
+# layout of whichever binding is loaded.
+POSE_DTYPE = np.dtype({
+    'names': ['m', 'velocity', 'angular_velocity', 'valid'],
+    'formats': [(np.float32, (3, 4)), (np.float32, (3,)), (np.float32, (3,)), np.bool_],
+    'offsets': [TrackedDevicePose.mDeviceToAbsoluteTracking.offset, TrackedDevicePose.vVelocity.offset,
+                TrackedDevicePose.vAngularVelocity.offset, TrackedDevicePose.bPoseIsValid.offset],
+    'itemsize': ctypes.sizeof(TrackedDevicePose),
+})
+
+
+# --- ROTATIONS ---
+# Rotations are unit quaternions [w, x, y, z] from the OpenVR matrices on; Euler angles are only made for
+# the output (PoseBatch.encode_angles). K = 4 q q^T as coefficients of the 3x4 pose matrix entries, plus
+# 1 on the diagonal (see quaternions_from_matrices).
+QUAT_FROM_MATRIX = np.array([
+    # R00 R01 R02 R10 R11 R12 R20 R21 R22
+    [1, 0, 0, 0, 1, 0, 0, 0, 1], [0, 0, 0, 0, 0, -1, 0, 1, 0],
+    [0, 0, 1, 0, 0, 0, -1, 0, 0], [0, -1, 0, 1, 0, 0, 0, 0, 0],
+    [0, 0, 0, 0, 0, -1, 0, 1, 0], [1, 0, 0, 0, -1, 0, 0, 0, -1],
+    [0, 1, 0, 1, 0, 0, 0, 0, 0], [0, 0, 1, 0, 0, 0, 1, 0, 0],
+    [0, 0, 1, 0, 0, 0, -1, 0, 0], [0, 1, 0, 1, 0, 0, 0, 0, 0],
+    [-1, 0, 0, 0, 1, 0, 0, 0, -1], [0, 0, 0, 0, 0, 1, 0, 1, 0],
+    [0, -1, 0, 1, 0, 0, 0, 0, 0], [0, 0, 1, 0, 0, 0, 1, 0, 0],
+    [0, 0, 0, 0, 0, 1, 0, 1, 0], [-1, 0, 0, 0, -1, 0, 0, 0, 1],
+], dtype=float).T.reshape(3, 3, 16)
+# No coefficients for the translation column
+QUAT_FROM_MATRIX = np.concatenate([QUAT_FROM_MATRIX, np.zeros((3, 1, 16))], axis=1).reshape(12, 16)
+QUAT_FROM_MATRIX_BIAS = np.eye(4).ravel()
+# Half the pitch, yaw and roll atan2 / asin arguments as coefficients of q_i q_j, then the pitch arguments
+# used at the poles: [wx + yz, 1/2 - xx - yy, wy - xz, wz + xy, 1/2 - yy - zz, wx - yz, 1/2 - xx - zz]
+EULER_FROM_QUAT = np.zeros((4, 4, 7))
+EULER_FROM_QUAT[0, 1, 0] = EULER_FROM_QUAT[2, 3, 0] = 1.0
+EULER_FROM_QUAT[1, 1, 1] = EULER_FROM_QUAT[2, 2, 1] = -1.0
+EULER_FROM_QUAT[0, 2, 2], EULER_FROM_QUAT[1, 3, 2] = 1.0, -1.0
+EULER_FROM_QUAT[0, 3, 3] = EULER_FROM_QUAT[1, 2, 3] = 1.0
+EULER_FROM_QUAT[2, 2, 4] = EULER_FROM_QUAT[3, 3, 4] = -1.0
+EULER_FROM_QUAT[0, 1, 5], EULER_FROM_QUAT[2, 3, 5] = 1.0, -1.0
+EULER_FROM_QUAT[1, 1, 6] = EULER_FROM_QUAT[3, 3, 6] = -1.0
+EULER_FROM_QUAT = EULER_FROM_QUAT.reshape(16, 7)
+EULER_FROM_QUAT_BIAS = np.array([0.0, 0.5, 0.0, 0.0, 0.5, 0.0, 0.5])
+# Yaw counts as +-90 when the roll atan2 arguments are this close to zero. Half the sy < 1e-6 test of
+# rotation_matrix_to_euler_angles, since the arguments are halved too.
+EULER_POLE_EPSILON = 5e-7
+QUAT_COLUMNS = np.arange(4)
+QUAT_IDENTITY = np.array([1.0, 0.0, 0.0, 0.0])
+# Left multiplication matrix of a: a * b = (a[QUAT_PRODUCT_INDEX] * QUAT_PRODUCT_SIGN) @ b
+QUAT_PRODUCT_INDEX = np.array([[0, 1, 2, 3], [1, 0, 3, 2], [2, 3, 0, 1], [3, 2, 1, 0]])
+QUAT_PRODUCT_SIGN = np.array([[1, -1, -1, -1], [1, 1, -1, 1], [1, 1, 1, -1], [1, -1, 1, 1]], dtype=float)
+QUAT_CONJUGATE = np.array([1.0, -1.0, -1.0, -1.0])
+# Cross product matrix [a]x of a vector, flattened: entry k is SKEW_SIGN[k] * a[SKEW_INDEX[k]]
+SKEW_INDEX = np.array([0, 2, 1, 2, 0, 0, 1, 0, 0])
+SKEW_SIGN = np.array([0.0, -1.0, 1.0, 1.0, 0.0, -1.0, -1.0, 1.0, 0.0])
+EYE3 = np.eye(3)
+# Up to this many rows (HMD included) PoseBatch converts rotations row by row with math instead of NumPy:
+# every NumPy call costs a microsecond or two whatever its size, which dominates for the HMD + 2 controllers.
+SMALL_BATCH_ROWS = 10
 
 def get_pose_matrix(pose):
     """ Convert OpenVR Pose to a 4x4 Numpy Matrix. """
@@ -66,22 +327,2551 @@ def rotation_matrix_to_euler_angles(R):
     return np.array([math.degrees(x), math.degrees(y), math.degrees(z)])
 
 
+def pose_array_view(poses):
+    """ Zero-copy NumPy view (POSE_DTYPE) over a ctypes TrackedDevicePose array. """
+    return np.frombuffer(poses, dtype=POSE_DTYPE)
+
+
+def invert_rigid_transform(m, out=None):
+    """ Inverse of a 3x4 rotation + translation matrix: [R^T | -R^T t]. No general inverse needed. """
+    if out is None:
+        out = np.empty((3, 4))
+    r_t = m[:, :3].T
+    out[:, :3] = r_t
+    np.matmul(r_t, m[:, 3], out=out[:, 3])
+    np.negative(out[:, 3], out=out[:, 3])
+    return out
+
+
+def relative_transforms(inv_m, mats, out):
+    """ Applies one 3x4 transform to a stack of (N, 3, 4) matrices in a single call. """
+    np.matmul(inv_m[:, :3], mats, out=out)
+    out[:, :, 3] += inv_m[:, 3]
+    return out
+
+
+def quaternions_from_matrices(m, out, work=None):
+    """
+    Unit quaternions [w, x, y, z] (w >= 0) for the rotations of a stack of (N, 3, 4) pose matrices, all rows
+    at once and without a singular case. work is an optional (k, weights, best) tuple of (N, 16), (N, 4) and
+    (N,) intp scratch buffers so the hot loop doesn't allocate.
+    """
+    n = len(m)
+    if work is None:
+        work = (np.empty((n, 16)), np.empty((n, 4)), np.empty(n, dtype=np.intp))
+    k, weights, best = work
+    # K = 4 q q^T straight from the matrix. Row i of K is 4 q_i q, so the row with the largest diagonal is q
+    # scaled by its largest component and never divides by anything small.
+    np.matmul(m.reshape(n, 12), QUAT_FROM_MATRIX, out=k)
+    k += QUAT_FROM_MATRIX_BIAS
+    np.argmax(k[:, ::5], axis=1, out=best)
+    np.equal(QUAT_COLUMNS, best[:, None], out=weights)
+    np.matmul(weights[:, None, :], k.reshape(n, 4, 4), out=out[:, None, :])
+    return normalize_quaternions(out, weights[:, 0])
+
+
+def normalize_quaternions(q, work=None):
+    """ Scales (N, 4) quaternions to unit length in place and flips them to w >= 0. work is an (N,) buffer. """
+    if work is None:
+        work = np.empty(len(q))
+    np.einsum('ni,ni->n', q, q, out=work)
+    np.sqrt(work, out=work)
+    np.copysign(work, q[:, 0], out=work)
+    q /= work[:, None]
+    return q
+
+
+def euler_angles_from_quaternions(q, out, work=None):
+    """
+    [Pitch (X), Yaw (Y), Roll (Z)] in degrees for (N, 4) quaternions, the same angles as
+    rotation_matrix_to_euler_angles. work is an optional (products, terms) tuple of (N, 16) and (N, 8)
+    scratch buffers. At +-90 yaw pitch and roll aren't separable; like rotation_matrix_to_euler_angles
+    those rows get roll 0 and all of the rotation in pitch.
+    """
+    n = len(q)
+    if work is None:
+        work = (np.empty((n, 16)), np.empty((n, 8)))
+    products, terms = work
+    # Every q_i q_j, then the seven sums the angles are made of (see EULER_FROM_QUAT)
+    np.multiply(q[:, :, None], q[:, None, :], out=products.reshape(n, 4, 4))
+    np.matmul(products, EULER_FROM_QUAT, out=terms[:, :7])
+    terms[:, :7] += EULER_FROM_QUAT_BIAS
+    np.arctan2(terms[:, 0], terms[:, 1], out=out[:, 0])
+    sin_yaw = terms[:, 2]
+    np.clip(sin_yaw, -0.5, 0.5, out=sin_yaw)
+    sin_yaw *= 2.0
+    np.arcsin(sin_yaw, out=out[:, 1])
+    np.arctan2(terms[:, 3], terms[:, 4], out=out[:, 2])
+    pole_distance = np.hypot(terms[:, 3], terms[:, 4], out=terms[:, 7])
+    if n and pole_distance.min() < EULER_POLE_EPSILON:
+        pole = pole_distance < EULER_POLE_EPSILON
+        out[pole, 0] = np.arctan2(terms[pole, 5], terms[pole, 6])
+        out[pole, 2] = 0.0
+    np.degrees(out, out=out)
+    return out
+
+
+def quaternions_from_euler(pitch, yaw, roll):
+    """ Inverse of euler_angles_from_quaternions. Angles in degrees, scalars or arrays; returns (N, 4). """
+    half = np.radians(np.stack(np.broadcast_arrays(pitch, yaw, roll), axis=-1).reshape(-1, 3)) / 2.0
+    (cx, cy, cz), (sx, sy, sz) = np.cos(half).T, np.sin(half).T
+    q = np.stack([cz * cy * cx + sz * sy * sx,
+                  cz * cy * sx - sz * sy * cx,
+                  cz * sy * cx + sz * cy * sx,
+                  sz * cy * cx - cz * sy * sx], axis=-1)
+    return normalize_quaternions(q)
+
+
+def target_quaternions(rot):
+    """
+    Quaternions for gesture target angles, which are stored as roll corrected [yaw, pitch, roll]
+    (secondary_controller_rot). Undoes roll_correction_batch, then converts. rot is (N, 3) or (3,).
+    """
+    rot = np.asarray(rot, dtype=float).reshape(-1, 3)
+    yaw_c, pitch_c, roll = rot[:, 0], rot[:, 1], rot[:, 2]
+    cos_r, sin_r = np.cos(np.radians(roll)), np.sin(np.radians(roll))
+    yaw = yaw_c * cos_r - pitch_c * sin_r
+    pitch = pitch_c * cos_r + yaw_c * sin_r + 45.0
+    return quaternions_from_euler(pitch, yaw, roll)
+
+
+def multiply_quaternions(a, b, out, work=None):
+    """ Hamilton products a * b of (N, 4) quaternions. out must not be b. work is an optional (N, 4, 4) buffer. """
+    if work is None:
+        work = np.empty((len(a), 4, 4))
+    a.take(QUAT_PRODUCT_INDEX, axis=1, out=work)
+    work *= QUAT_PRODUCT_SIGN
+    np.matmul(work, b[:, :, None], out=out[:, :, None])
+    return out
+
+
+def quaternion_log(q, out, work=None):
+    """ Rotation vectors (N, 3) in degrees for (N, 4) unit quaternions: axis * angle, angle in [0, 180]. """
+    if work is None:
+        work = np.empty((2, len(q)))
+    norm, scale = work
+    np.einsum('ni,ni->n', q[:, 1:], q[:, 1:], out=norm)
+    np.sqrt(norm, out=norm)
+    np.maximum(norm, 1e-12, out=norm)
+    np.abs(q[:, 0], out=scale)
+    np.arctan2(norm, scale, out=scale)
+    scale /= norm
+    # q and -q are the same rotation, take the short way round
+    np.copysign(scale, q[:, 0], out=scale)
+    scale *= 360.0 / math.pi
+    np.multiply(q[:, 1:], scale[:, None], out=out)
+    return out
+
+
+def quaternion_exp(v, out, work=None):
+    """ Inverse of quaternion_log: (N, 4) unit quaternions from (N, 3) rotation vectors in degrees. """
+    if work is None:
+        work = np.empty((2, len(v)))
+    half, scale = work
+    np.einsum('ni,ni->n', v, v, out=half)
+    np.sqrt(half, out=half)
+    half *= math.pi / 360.0
+    np.maximum(half, 1e-12, out=half)
+    np.cos(half, out=out[:, 0])
+    np.sin(half, out=scale)
+    scale /= half
+    scale *= math.pi / 360.0
+    np.multiply(v, scale[:, None], out=out[:, 1:])
+    return out
+
+
+def roll_correction_batch(yaw, pitch, roll, out=None, work=None):
+    """
+    The original per-device roll correction, vectorized. Returns a (2, N) array of [yaw, pitch]; roll is unchanged.
+    work is an optional (4, N) scratch buffer.
+    """
+    n = len(yaw)
+    if out is None:
+        out = np.empty((2, n))
+    if work is None:
+        work = np.empty((4, n))
+    p_adj, cos_r, sin_r, tmp = work[0], work[1], work[2], work[3]
+
+    np.subtract(pitch, 45.0, out=p_adj)
+    np.radians(roll, out=cos_r)
+    np.sin(cos_r, out=sin_r)
+    np.cos(cos_r, out=cos_r)
+
+    # yaw' = p_adj * sin + yaw * cos
+    np.multiply(p_adj, sin_r, out=out[0])
+    np.multiply(yaw, cos_r, out=tmp)
+    np.add(out[0], tmp, out=out[0])
+    # pitch' = p_adj * cos - yaw * sin
+    np.multiply(p_adj, cos_r, out=out[1])
+    np.multiply(yaw, sin_r, out=tmp)
+    np.subtract(out[1], tmp, out=out[1])
+    return out
+
+
+def extrapolation_work(n):
+    """ Scratch buffers for extrapolate_poses: (N, 3) x2, (N,) x2 and (N, 3, 3) x4. """
+    return (np.zeros((n, 3)), np.zeros((n, 3)), np.zeros(n), np.zeros(n),
+            np.zeros((n, 3, 3)), np.zeros((n, 3, 3)), np.zeros((n, 3, 3)), np.zeros((n, 3, 3)))
+
+
+def extrapolate_poses(mats, velocity, angular_velocity, horizon, out=None, work=None):
+    """
+    Constant velocity extrapolation of (N, 3, 4) poses `horizon` seconds ahead.
+    Velocities are in tracking space (m/s, rad/s) as OpenVR reports them. Rotation uses Rodrigues' formula.
+    out may be mats itself. work is an optional extrapolation_work(N) tuple so the hot loop doesn't allocate.
+    """
+    n = len(mats)
+    if out is None:
+        out = np.empty_like(mats)
+    if work is None:
+        work = extrapolation_work(n)
+    axis, step, theta, scale, k, k2, d_rot, rotated = work
+
+    # Rotation angle and unit axis (a zero rotation keeps a zero axis)
+    np.multiply(angular_velocity, horizon, out=axis)
+    np.einsum('ni,ni->n', axis, axis, out=theta)
+    np.sqrt(theta, out=theta)
+    np.maximum(theta, 1e-9, out=scale)
+    axis /= scale[:, None]
+
+    # d_rot = I + sin(theta) K + (1 - cos(theta)) K^2, K the cross product matrix of the axis
+    axis.take(SKEW_INDEX, axis=1, out=k.reshape(n, 9))
+    k *= SKEW_SIGN.reshape(3, 3)
+    np.matmul(k, k, out=k2)
+    np.cos(theta, out=scale)
+    np.subtract(1.0, scale, out=scale)
+    k2 *= scale[:, None, None]
+    np.sin(theta, out=scale)
+    k *= scale[:, None, None]
+    np.add(k, k2, out=d_rot)
+    d_rot += EYE3
+
+    # Through a scratch buffer, out may be mats
+    np.matmul(d_rot, mats[:, :, :3], out=rotated)
+    out[:, :, :3] = rotated
+    np.multiply(velocity, horizon, out=step)
+    np.add(mats[:, :, 3], step, out=out[:, :, 3])
+    return out
+
+
+def quaternion_from_rotation(m, q, i=0):
+    """
+    quaternions_from_matrices for row i, on flat float buffers (memoryviews or lists): m holds 3x4 matrices
+    (12 values per row), q gets [w, x, y, z] (4 per row).
+    """
+    k = 12 * i
+    r00, r01, r02 = m[k], m[k + 1], m[k + 2]
+    r10, r11, r12 = m[k + 4], m[k + 5], m[k + 6]
+    r20, r21, r22 = m[k + 8], m[k + 9], m[k + 10]
+    trace = r00 + r11 + r22
+    if trace > 0.0:
+        s = 0.5 / math.sqrt(trace + 1.0)
+        w, x, y, z = 0.25 / s, (r21 - r12) * s, (r02 - r20) * s, (r10 - r01) * s
+    elif r00 > r11 and r00 > r22:
+        s = 0.5 / math.sqrt(1.0 + r00 - r11 - r22)
+        w, x, y, z = (r21 - r12) * s, 0.25 / s, (r01 + r10) * s, (r02 + r20) * s
+    elif r11 > r22:
+        s = 0.5 / math.sqrt(1.0 + r11 - r00 - r22)
+        w, x, y, z = (r02 - r20) * s, (r01 + r10) * s, 0.25 / s, (r12 + r21) * s
+    else:
+        s = 0.5 / math.sqrt(1.0 + r22 - r00 - r11)
+        w, x, y, z = (r10 - r01) * s, (r02 + r20) * s, (r12 + r21) * s, 0.25 / s
+    norm = math.copysign(math.sqrt(w * w + x * x + y * y + z * z), w)
+    k = 4 * i
+    q[k], q[k + 1], q[k + 2], q[k + 3] = w / norm, x / norm, y / norm, z / norm
+
+
+def encode_quaternion(q, out, i=0):
+    """
+    euler_angles_from_quaternions plus roll_correction_batch for row i, on flat float buffers: reads the
+    quaternion [w, x, y, z] from q (4 per row) and writes pitch, yaw, roll, corrected yaw, corrected pitch
+    in degrees to out (5 per row).
+    """
+    k = 4 * i
+    w, x, y, z = q[k], q[k + 1], q[k + 2], q[k + 3]
+    yaw = math.degrees(math.asin(2.0 * min(max(w * y - x * z, -0.5), 0.5)))
+    roll_sin, roll_cos = w * z + x * y, 0.5 - y * y - z * z
+    if math.hypot(roll_sin, roll_cos) < EULER_POLE_EPSILON:
+        pitch = math.degrees(math.atan2(w * x - y * z, 0.5 - x * x - z * z))
+        roll = 0.0
+    else:
+        pitch = math.degrees(math.atan2(w * x + y * z, 0.5 - x * x - y * y))
+        roll = math.degrees(math.atan2(roll_sin, roll_cos))
+    p_adj = pitch - 45.0
+    sin_r, cos_r = math.sin(math.radians(roll)), math.cos(math.radians(roll))
+    k = 5 * i
+    out[k], out[k + 1], out[k + 2] = pitch, yaw, roll
+    out[k + 3], out[k + 4] = p_adj * sin_r + yaw * cos_r, p_adj * cos_r - yaw * sin_r
+
+
+class PoseBatch:
+    """
+    HMD relative pose math for every tracked device in one pass.
+    Row 0 holds the HMD in world space, rows 1..n the devices relative to the HMD.
+    All buffers are allocated once; update() only writes into them. Up to SMALL_BATCH_ROWS rows the
+    rotations are converted one row at a time in plain Python, which is faster than NumPy at that size. That
+    path reads and writes the buffers through flat memoryviews, so it doesn't build lists either.
+    """
+
+    def __init__(self, max_devices=MAX_TRACKED_DEVICES):
+        size = max_devices + 1
+        self.rows = np.zeros(size, dtype=np.intp)
+        self.rows[0] = HMD_INDEX
+        self.count = 1
+
+        self.world = np.zeros((size, 3, 4))
+        self.rel = np.zeros((size, 3, 4))
+        # Rotation per row as a unit quaternion [w, x, y, z], what the pose filter and gestures work on
+        self.quat = np.zeros((size, 4))
+        self.quat[:, 0] = 1.0
+        self.euler = np.zeros((size, 3))
+        # Roll corrected [yaw, pitch] per row, roll is euler[:, 2]
+        self.yaw_pitch = np.zeros((2, size))
+        self.hmd_inv = np.zeros((3, 4))
+        # x, y, z, yaw, pitch, roll per row (roll corrected). The angles are only filled in by encode_angles().
+        self.pose6 = np.zeros((size, 6))
+        self.valid = np.zeros(size, dtype=bool)
+        self.velocity = np.zeros((size, 3), dtype=np.float32)
+        self.angular_velocity = np.zeros((size, 3), dtype=np.float32)
+
+        # Pose records of the HMD and the devices, gathered from the pose array with a single take per tick
+        self._staging = np.zeros(size, dtype=POSE_DTYPE)
+        self._staged_m = self._staging['m']
+        self._staged_valid = self._staging['valid']
+        self._staged_velocity = self._staging['velocity']
+        self._staged_angular_velocity = self._staging['angular_velocity']
+        self._work = np.zeros((4, size))
+        self._quat_work = (np.zeros((size, 16)), np.zeros((size, 4)), np.zeros(size, dtype=np.intp))
+        self._euler_work = (np.zeros((size, 16)), np.zeros((size, 8)))
+        self._encoded = np.zeros((size, 5))
+        # Flat float views for the small batch path
+        self._rel_flat = memoryview(self.rel).cast('B').cast('d')
+        self._quat_flat = memoryview(self.quat).cast('B').cast('d')
+        self._encoded_flat = memoryview(self._encoded).cast('B').cast('d')
+        self._extrapolate_work = extrapolation_work(size)
+        self._extrapolate_rows = tuple(w[:1] for w in self._extrapolate_work)
+        self._poses = None
+        self._view = None
+
+    def set_devices(self, device_indices):
+        """ Device indices for rows 1..n. Only called when the device list changes, never per tick. """
+        n = len(device_indices) + 1
+        self.rows[1:n] = device_indices
+        self.count = n
+        self._extrapolate_rows = tuple(w[:n] for w in self._extrapolate_work)
+
+    def bind(self, poses):
+        """ Caches the NumPy view of a pose array. Sources that reuse their array only pay for this once. """
+        if poses is not self._poses:
+            self._poses = poses
+            self._view = pose_array_view(poses)
+
+    def update(self, poses, extrapolate=0.0):
+        """
+        Gathers the HMD plus every device row from the pose array and computes every transform: positions
+        into pose6[:, :3], rotations into quat. extrapolate (seconds) pushes every pose ahead along its
+        reported velocities first. Call encode_angles() for the Euler angles once the rows are filtered.
+        """
+        self.bind(poses)
+        n = self.count
+        rows = self.rows[:n]
+        # Whole records from the contiguous array: a take from one field view would copy the entire pose array
+        # first. mode='clip' writes straight into out ('raise' buffers it), and the method skips np.take's
+        # Python wrapper, which packs its arguments into a new tuple and dict every call.
+        self._view.take(rows, out=self._staging[:n], mode='clip')
+        self.valid[:n] = self._staged_valid[:n]
+        if not self.valid[0]:
+            return False
+        self.world[:n] = self._staged_m[:n]
+
+        if extrapolate:
+            self.velocity[:n] = self._staged_velocity[:n]
+            self.angular_velocity[:n] = self._staged_angular_velocity[:n]
+            extrapolate_poses(self.world[:n], self.velocity[:n], self.angular_velocity[:n], extrapolate,
+                              out=self.world[:n], work=self._extrapolate_rows)
+
+        invert_rigid_transform(self.world[0], self.hmd_inv)
+        self.rel[0] = self.world[0]
+        relative_transforms(self.hmd_inv, self.world[1:n], self.rel[1:n])
+        if n <= SMALL_BATCH_ROWS:
+            rel, quat = self._rel_flat, self._quat_flat
+            for i in range(n):
+                quaternion_from_rotation(rel, quat, i)
+        else:
+            k, weights, best = self._quat_work
+            quaternions_from_matrices(self.rel[:n], self.quat[:n], (k[:n], weights[:n], best[:n]))
+        self.pose6[:n, :3] = self.rel[:n, :, 3]
+        return True
+
+    def encode_angles(self):
+        """ Euler angles (euler) and the roll corrected yaw, pitch, roll of pose6 from quat, for every row. """
+        n = self.count
+        if n <= SMALL_BATCH_ROWS:
+            quat, flat = self._quat_flat, self._encoded_flat
+            for i in range(n):
+                encode_quaternion(quat, flat, i)
+            encoded = self._encoded[:n]
+            self.euler[:n] = encoded[:, :3]
+            self.yaw_pitch[:, :n] = encoded[:, 3:].T
+        else:
+            products, terms = self._euler_work
+            euler_angles_from_quaternions(self.quat[:n], self.euler[:n], (products[:n], terms[:n]))
+            roll_correction_batch(self.euler[:n, 1], self.euler[:n, 0], self.euler[:n, 2],
+                                  self.yaw_pitch[:, :n], self._work[:, :n])
+        pose6 = self.pose6[:n]
+        pose6[:, 3:5] = self.yaw_pitch[:, :n].T
+        pose6[:, 5] = self.euler[:n, 2]
+
+
+def axis_params(value, axes=6):
+    """ Per-axis filter parameter from config: a number for every axis or a list with one per axis. """
+    out = np.empty(axes)
+    out[:] = value
+    return out
+
+
+def rotation_params(value):
+    """ The yaw, pitch and roll values of a filter parameter, in rotation vector order (ROTATION_VECTOR_AXES). """
+    return axis_params(value)[ROTATION_VECTOR_AXES]
+
+
+class OneEuroFilter:
+    """
+    One Euro filter (Casiez et al.) over the x, y, z positions (rows, 3) and rotations (rows, 4) of a block
+    of rows, all rows in one set of array operations. A low pass whose cutoff rises with speed: heavy
+    smoothing when the hand is still (no shimmer while aiming), almost none during fast moves (no lag on
+    flicks). Rotations are smoothed by slerp towards the measurement, one smoothing factor per axis of the
+    rotation vector, with the angular speed (deg/s, low passed like the position speed) opening the cutoffs.
+    """
+
+    def __init__(self, rows, min_cutoff=1.0, beta=0.0, d_cutoff=1.0):
+        self.min_cutoff = axis_params(min_cutoff)[:3]
+        self.beta = axis_params(beta)[:3]
+        self.d_cutoff = axis_params(d_cutoff)[:3]
+        self.rot_min_cutoff = rotation_params(min_cutoff)
+        self.rot_beta = rotation_params(beta)
+        self.rot_d_cutoff = rotation_params(d_cutoff)
+        self.value = np.zeros((rows, 3))
+        self.speed = np.zeros((rows, 3))
+        self.quat = np.zeros((rows, 4))
+        self.rot_speed = np.zeros((rows, 3))
+        self.ready = np.zeros(rows, dtype=bool)
+        self._fresh = np.zeros(rows, dtype=bool)
+        self._delta = np.zeros((rows, 3))
+        self._alpha = np.zeros((rows, 3))
+        self._d_alpha = np.zeros(3)
+        self._work = np.zeros((rows, 3))
+        self._rot_alpha = np.zeros((rows, 3))
+        self._rot_d_alpha = np.zeros(3)
+        self._rot_delta = np.zeros((rows, 3))
+        self._rot_work = np.zeros((rows, 3))
+        self._quat_a = np.zeros((rows, 4))
+        self._quat_b = np.zeros((rows, 4))
+        self._quat_work = np.zeros((rows, 4, 4))
+        self._scalar_work = np.zeros((2, rows))
+
+    def reset(self):
+        self.ready[:] = False
+
+    def apply(self, pos, quat, valid, dt):
+        """ Filters pos (n, 3) and quat (n, 4) in place. Rows that are not valid restart from their next sample. """
+        n = len(pos)
+        value, speed = self.value[:n], self.speed[:n]
+        delta, alpha, work = self._delta[:n], self._alpha[:n], self._work[:n]
+        rot_value, rot_speed = self.quat[:n], self.rot_speed[:n]
+        rot_delta, rot_alpha, rot_work = self._rot_delta[:n], self._rot_alpha[:n], self._rot_work[:n]
+        qa, qb, quat_work = self._quat_a[:n], self._quat_b[:n], self._quat_work[:n]
+        scalar_work = self._scalar_work[:, :n]
+
+        # Rows that just (re)appeared start from the measurement
+        fresh = restart_rows(self.ready[:n], valid, self._fresh[:n])
+        np.copyto(value, pos, where=fresh[:, None])
+        np.copyto(speed, 0.0, where=fresh[:, None])
+        np.copyto(rot_value, quat, where=fresh[:, None])
+        np.copyto(rot_speed, 0.0, where=fresh[:, None])
+        if dt <= 0.0:
+            return
+
+        np.subtract(pos, value, out=delta)
+        # Speed estimate, low passed at d_cutoff
+        np.divide(delta, dt, out=work)
+        work -= speed
+        work *= smoothing_factor(self.d_cutoff, dt, self._d_alpha)
+        speed += work
+        # Cutoff opens up with speed
+        np.abs(speed, out=alpha)
+        alpha *= self.beta
+        alpha += self.min_cutoff
+        smoothing_factor(alpha, dt, alpha)
+        delta *= alpha
+        value += delta
+        np.copyto(pos, value, where=valid[:, None])
+
+        # Same for the rotation, on the rotation vector (deg) from the smoothed to the measured rotation
+        np.multiply(rot_value, QUAT_CONJUGATE, out=qa)
+        multiply_quaternions(qa, quat, qb, quat_work)
+        quaternion_log(qb, rot_delta, scalar_work)
+        np.divide(rot_delta, dt, out=rot_work)
+        rot_work -= rot_speed
+        rot_work *= smoothing_factor(self.rot_d_cutoff, dt, self._rot_d_alpha)
+        rot_speed += rot_work
+        # Angular speed (all axes together) opens the cutoff of each axis by its own beta
+        angular_speed = scalar_work[0]
+        np.einsum('ni,ni->n', rot_speed, rot_speed, out=angular_speed)
+        np.sqrt(angular_speed, out=angular_speed)
+        np.multiply(angular_speed[:, None], self.rot_beta, out=rot_alpha)
+        rot_alpha += self.rot_min_cutoff
+        smoothing_factor(rot_alpha, dt, rot_alpha)
+        # Slerp by alpha: turn alpha of the way along each axis of that rotation vector
+        rot_delta *= rot_alpha
+        quaternion_exp(rot_delta, qa, scalar_work)
+        multiply_quaternions(rot_value, qa, qb, quat_work)
+        normalize_quaternions(qb, scalar_work[0])
+        rot_value[:] = qb
+        np.copyto(quat, rot_value, where=valid[:, None])
+
+
+class KalmanFilter:
+    """
+    Constant velocity Kalman filter run independently on x, y, z and on the three axes of the rotation,
+    vectorized like OneEuroFilter. The rotation is tracked as a quaternion plus a small error angle on its
+    own axes (deg), which is folded back into the quaternion after every update. process_noise is the
+    acceleration noise density, measurement_noise the variance of the tracking jitter. Higher
+    process_noise / measurement_noise follows faster and smooths less.
+    """
+
+    def __init__(self, rows, process_noise=1.0, measurement_noise=1e-4):
+        self.q = axis_params(process_noise)
+        self.r = axis_params(measurement_noise)
+        self.q[3:] = rotation_params(process_noise)
+        self.r[3:] = rotation_params(measurement_noise)
+        # Columns 0..2 the position, 3..5 the rotation error relative to quat (pitch, yaw, roll axes)
+        self.pos = np.zeros((rows, 6))
+        self.vel = np.zeros((rows, 6))
+        self.quat = np.zeros((rows, 4))
+        # Symmetric 2x2 covariance per element: [[p00, p01], [p01, p11]]
+        self.p00 = np.zeros((rows, 6))
+        self.p01 = np.zeros((rows, 6))
+        self.p11 = np.zeros((rows, 6))
+        self.ready = np.zeros(rows, dtype=bool)
+        self._fresh = np.zeros(rows, dtype=bool)
+        self._innovation = np.zeros((rows, 6))
+        self._k0 = np.zeros((rows, 6))
+        self._k1 = np.zeros((rows, 6))
+        self._work = np.zeros((rows, 6))
+        self._quat_a = np.zeros((rows, 4))
+        self._quat_b = np.zeros((rows, 4))
+        self._quat_work = np.zeros((rows, 4, 4))
+        self._rot_work = np.zeros((2, rows))
+
+    def reset(self):
+        self.ready[:] = False
+
+    def apply(self, pos, quat, valid, dt):
+        """ Filters pos (n, 3) and quat (n, 4) in place. Rows that are not valid restart from their next sample. """
+        n = len(pos)
+        state, vel, p00, p01, p11 = self.pos[:n], self.vel[:n], self.p00[:n], self.p01[:n], self.p11[:n]
+        y, k0, k1, work = self._innovation[:n], self._k0[:n], self._k1[:n], self._work[:n]
+        est, qa, qb, rot_work = self.quat[:n], self._quat_a[:n], self._quat_b[:n], self._rot_work[:, :n]
+
+        fresh = restart_rows(self.ready[:n], valid, self._fresh[:n])[:, None]
+        np.copyto(state[:, :3], pos, where=fresh)
+        np.copyto(state[:, 3:], 0.0, where=fresh)
+        np.copyto(est, quat, where=fresh)
+        np.copyto(vel, 0.0, where=fresh)
+        np.copyto(p00, self.r, where=fresh)
+        np.copyto(p01, 0.0, where=fresh)
+        np.copyto(p11, self.q, where=fresh)
+        if dt <= 0.0:
+            return
+
+        q, r = self.q, self.r
+        # Predict: x += v dt, P = F P F' + Q
+        np.multiply(vel, dt, out=work)
+        state += work
+        np.multiply(p11, dt, out=work)
+        work += p01
+        work += p01
+        work *= dt
+        p00 += work
+        p00 += q * (dt ** 3 / 3.0)
+        np.multiply(p11, dt, out=work)
+        p01 += work
+        p01 += q * (dt * dt / 2.0)
+        p11 += q * dt
+
+        # Update with the measurement. The rotation's measurement is the angle from est to quat.
+        np.subtract(pos, state[:, :3], out=y[:, :3])
+        np.multiply(est, QUAT_CONJUGATE, out=qa)
+        multiply_quaternions(qa, quat, qb, self._quat_work[:n])
+        quaternion_log(qb, y[:, 3:], rot_work)
+        y[:, 3:] -= state[:, 3:]
+        np.add(p00, r, out=work)
+        np.divide(p00, work, out=k0)
+        np.divide(p01, work, out=k1)
+        np.multiply(k1, p01, out=work)
+        p11 -= work
+        np.multiply(k0, p01, out=work)
+        p01 -= work
+        np.multiply(k0, p00, out=work)
+        p00 -= work
+        np.multiply(k1, y, out=work)
+        vel += work
+        y *= k0
+        state += y
+
+        # Fold the rotation error into est
+        quaternion_exp(state[:, 3:], qa, rot_work)
+        multiply_quaternions(est, qa, qb, self._quat_work[:n])
+        normalize_quaternions(qb, rot_work[0])
+        est[:] = qb
+        state[:, 3:] = 0.0
+        np.copyto(pos, state[:, :3], where=valid[:, None])
+        np.copyto(quat, est, where=valid[:, None])
+
+
+def restart_rows(ready, valid, out):
+    """ Marks rows that are valid now but weren't last tick (out), then remembers this tick's validity. """
+    np.logical_not(ready, out=out)
+    out &= valid
+    ready[:] = valid
+    return out
+
+
+def smoothing_factor(cutoff, dt, out):
+    """ Exponential smoothing factor for a low pass at `cutoff` Hz: 1 / (1 + tau / dt) = x / (x + 1). """
+    np.multiply(cutoff, 2.0 * math.pi * dt, out=out)
+    out += 1.0
+    np.reciprocal(out, out=out)
+    np.subtract(1.0, out, out=out)
+    return out
+
+
+def make_pose_filter(name, rows, config=None):
+    """ Builds the filter named in POSE_FILTERS from its config dict, None for "none". """
+    if name == "one_euro":
+        params = dict(DEFAULT_ONE_EURO, **(config or {}))
+        return OneEuroFilter(rows, params["min_cutoff"], params["beta"], params["d_cutoff"])
+    if name == "kalman":
+        params = dict(DEFAULT_KALMAN, **(config or {}))
+        return KalmanFilter(rows, params["process_noise"], params["measurement_noise"])
+    return None
+
+
+def make_pose_matrix(pos, yaw=0.0, pitch=0.0, roll=0.0):
+    """ Builds an OpenVR style 3x4 matrix (nested lists) from a position and Yaw/Pitch/Roll in degrees. """
+    cy, sy = math.cos(math.radians(yaw)), math.sin(math.radians(yaw))
+    cp, sp = math.cos(math.radians(pitch)), math.sin(math.radians(pitch))
+    cr, sr = math.cos(math.radians(roll)), math.sin(math.radians(roll))
+    # R = Ry(yaw) @ Rx(pitch) @ Rz(roll)
+    r = [
+        [cy * cr + sy * sp * sr, -cy * sr + sy * sp * cr, sy * cp],
+        [cp * sr, cp * cr, -sp],
+        [-sy * cr + cy * sp * sr, sy * sr + cy * sp * cr, cy * cp],
+    ]
+    return [[r[i][0], r[i][1], r[i][2], pos[i]] for i in range(3)]
+
+
+def set_pose(pose, m34, velocity=(0.0, 0.0, 0.0), angular_velocity=(0.0, 0.0, 0.0), valid=True):
+    """ Writes a 3x4 matrix and velocities into a TrackedDevicePose struct in place. """
+    mat = pose.mDeviceToAbsoluteTracking.m
+    for i in range(3):
+        for j in range(4):
+            mat[i][j] = m34[i][j]
+    for i in range(3):
+        pose.vVelocity.v[i] = velocity[i]
+        pose.vAngularVelocity.v[i] = angular_velocity[i]
+    pose.bPoseIsValid = valid
+    pose.bDeviceIsConnected = valid
+
+
+class SystemClock:
+    """ Real time on the monotonic perf counter (immune to wall clock adjustments). sleep() actually blocks. """
+
+    def now(self):
+        return time.perf_counter()
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+    def wait_until(self, deadline, spin=0.0):
+        """ Sleeps until `spin` seconds before the deadline, then busy-waits the rest for sub-ms accuracy. """
+        remaining = deadline - time.perf_counter()
+        if remaining > spin:
+            time.sleep(remaining - spin)
+        while time.perf_counter() < deadline:
+            pass
+
+
+class SimulatedClock:
+    """ Virtual time for headless runs. sleep() just advances the clock, so loops run as fast as the CPU allows. """
+
+    def __init__(self, start=0.0):
+        self.t = start
+
+    def now(self):
+        return self.t
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            self.t += seconds
+
+    def wait_until(self, deadline, spin=0.0):
+        if deadline > self.t:
+            self.t = deadline
+
+
+class FixedRateScheduler:
+    """
+    Paces the tracking loop at a fixed rate against absolute deadlines, so work time and sleep
+    granularity don't make the rate drift. If a tick overruns by more than a whole period the missed
+    slots are dropped instead of bursting to catch up.
+
+    busy_wait is the tail (seconds) spent spinning instead of sleeping before each deadline.
+    set_idle() swaps in a slower idle rate without touching the configured one.
+    Live timing stats come from stats(); rate and lateness are measured over ~1 second windows.
+    """
+
+    def __init__(self, clock, rate_hz=DEFAULT_TICK_RATE, busy_wait=0.0):
+        self.clock = clock
+        self.busy_wait = busy_wait
+        self.period = 1.0 / rate_hz
+        self.rate_hz = rate_hz
+        self.idle_period = None
+        self.next_deadline = None
+
+        self.ticks = 0
+        self.missed_deadlines = 0
+        self.last_lateness = 0.0
+        self.achieved_hz = 0.0
+        self.avg_lateness = 0.0
+        self.max_lateness = 0.0
+        self._window_start = 0.0
+        self._window_ticks = 0
+        self._window_lateness = 0.0
+        self._window_max = 0.0
+
+    def set_rate(self, rate_hz):
+        self.rate_hz = rate_hz
+        self.period = 1.0 / rate_hz
+        if self.next_deadline is not None:
+            self.next_deadline = self.clock.now() + (self.idle_period or self.period)
+
+    def set_idle(self, idle_rate_hz):
+        """ Ticks at idle_rate_hz until set_idle(None). The next deadline moves right away both ways. """
+        self.idle_period = 1.0 / idle_rate_hz if idle_rate_hz else None
+        if self.next_deadline is not None:
+            self.next_deadline = self.clock.now() + (self.idle_period or self.period)
+
+    def start(self):
+        now = self.clock.now()
+        self.next_deadline = now + self.period
+        self._window_start = now
+        self._window_ticks = 0
+        self._window_lateness = 0.0
+        self._window_max = 0.0
+
+    def wait(self):
+        """ Blocks until the next deadline and records how late we woke up. """
+        if self.next_deadline is None:
+            self.start()
+        deadline = self.next_deadline
+        idle_period = self.idle_period
+        # No point spinning for accuracy while idle
+        self.clock.wait_until(deadline, 0.0 if idle_period else self.busy_wait)
+        now = self.clock.now()
+
+        period = idle_period or self.period
+        lateness = now - deadline
+        if lateness >= period:
+            skipped = int(lateness / period)
+            self.missed_deadlines += skipped
+            deadline += skipped * period
+        self.next_deadline = deadline + period
+
+        self.ticks += 1
+        self.last_lateness = lateness
+        self._window_ticks += 1
+        self._window_lateness += lateness
+        if lateness > self._window_max:
+            self._window_max = lateness
+
+        elapsed = now - self._window_start
+        if elapsed >= 1.0:
+            self.achieved_hz = self._window_ticks / elapsed
+            self.avg_lateness = self._window_lateness / self._window_ticks
+            self.max_lateness = self._window_max
+            self._window_start = now
+            self._window_ticks = 0
+            self._window_lateness = 0.0
+            self._window_max = 0.0
+
+    def stats(self):
+        return {
+            "target_hz": self.rate_hz,
+            "achieved_hz": self.achieved_hz,
+            "last_lateness_ms": self.last_lateness * 1000.0,
+            "avg_lateness_ms": self.avg_lateness * 1000.0,
+            "max_lateness_ms": self.max_lateness * 1000.0,
+            "missed_deadlines": self.missed_deadlines,
+            "ticks": self.ticks,
+            "idle": self.idle_period is not None,
+        }
+
+
+class AdaptiveRate:
+    """
+    Decides when the loop can idle. Every tick, update() compares the world pose of each tracked device
+    (HMD, controllers, trackers) with where it was when it last moved. Once none has gone further than
+    `distance` (meters) or turned more than roughly `angle` (degrees) for `idle_after` seconds, or the HMD
+    has no pose at all, the loop is idle. The first tick that sees motion ends it.
+    A holstered primary controller is left out, it sends a fixed pose anyway. Callers pass busy=True while
+    something time based is running (gesture sequences, a held key) to keep the full rate.
+
+    CPU time of the calling thread is booked to the active or idle state, and stats() estimates the
+    CPU saved: idle time at the active CPU cost per second, minus what idling actually used.
+    """
+
+    def __init__(self, idle_rate=20, idle_after=2.0, distance=0.005, angle=0.5, max_devices=MAX_TRACKED_DEVICES):
+        self.idle_rate = idle_rate
+        self.idle_after = idle_after
+        self.distance = distance
+        self.angle = math.radians(angle)
+        size = max_devices + 1
+        self.anchor = np.zeros((size, 3, 4))
+        self._delta = np.zeros((size, 3, 4))
+        self.rows = 0
+        self.idle = False
+        self.still_since = None
+        self.wakeups = 0
+        self.last_time = None
+        self.last_cpu = 0.0
+        self.wall = [0.0, 0.0]  # active, idle
+        self.cpu = [0.0, 0.0]
+
+    def moved(self, batch, skip_row):
+        n = batch.count
+        world, anchor, delta = batch.world[:n], self.anchor[:n], self._delta[:n]
+        if n != self.rows:
+            # Devices came or went, start over from here
+            anchor[:] = world
+            self.rows = n
+            return True
+        np.subtract(world, anchor, out=delta)
+        np.abs(delta, out=delta)
+        # Lost devices hold stale poses, they neither move nor keep the loop awake
+        np.multiply(delta, batch.valid[:n, None, None], out=delta)
+        if skip_row is not None:
+            delta[skip_row] = 0.0
+        if delta[:, :, 3].max() > self.distance or delta[:, :, :3].max() > self.angle:
+            anchor[:] = world
+            return True
+        return False
+
+    def update(self, now, batch, hmd_valid, skip_row=None, busy=False):
+        """ Call once per tick. Returns the rate to idle at, or None for full rate. """
+        cpu = time.thread_time()
+        if self.last_time is not None:
+            state = 1 if self.idle else 0
+            self.wall[state] += now - self.last_time
+            self.cpu[state] += cpu - self.last_cpu
+        self.last_time = now
+        self.last_cpu = cpu
+
+        moved = hmd_valid and self.moved(batch, skip_row)
+        if busy or moved or self.still_since is None:
+            self.still_since = now
+        if self.idle and (busy or moved):
+            self.idle = False
+            self.wakeups += 1
+        elif not self.idle and now - self.still_since >= self.idle_after:
+            self.idle = True
+        return self.idle_rate if self.idle else None
+
+    def stats(self):
+        active_wall, idle_wall = self.wall
+        active_cpu, idle_cpu = self.cpu
+        total = active_wall + idle_wall
+        saved = idle_wall * active_cpu / active_wall - idle_cpu if active_wall > 0 else 0.0
+        return {
+            "idle": self.idle,
+            "idle_rate": self.idle_rate,
+            "idle_pct": 100.0 * idle_wall / total if total > 0 else 0.0,
+            "idle_s": idle_wall,
+            "wakeups": self.wakeups,
+            "cpu_active_pct": 100.0 * active_cpu / active_wall if active_wall > 0 else 0.0,
+            "cpu_idle_pct": 100.0 * idle_cpu / idle_wall if idle_wall > 0 else 0.0,
+            "cpu_saved_s": max(saved, 0.0),
+        }
+
+
+class LatencyHistogram:
+    """
+    Rolling window of the last `size` samples (seconds) in a preallocated ring, so recording never
+    allocates. Percentiles are only computed when someone asks for them.
+    """
+
+    def __init__(self, size=1024):
+        self.samples = np.zeros(size)
+        self.size = size
+        self.pos = 0
+        self.count = 0
+        self.max_ever = 0.0
+
+    def record(self, seconds):
+        self.samples[self.pos] = seconds
+        self.pos = (self.pos + 1) % self.size
+        self.count += 1
+        if seconds > self.max_ever:
+            self.max_ever = seconds
+
+    def window(self):
+        return self.samples[:min(self.count, self.size)]
+
+    def stats(self):
+        window = self.window()
+        if not len(window):
+            return {"count": 0, "p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0, "max_ever_ms": 0.0}
+        p50, p95, p99 = np.percentile(window, (50, 95, 99)) * 1000.0
+        return {
+            "count": self.count,
+            "p50_ms": float(p50),
+            "p95_ms": float(p95),
+            "p99_ms": float(p99),
+            "max_ms": float(window.max()) * 1000.0,
+            "max_ever_ms": self.max_ever * 1000.0,
+        }
+
+
+class StageProfiler:
+    """
+    Times the stages of a tick with perf_counter (real CPU time, even when the loop runs on a
+    SimulatedClock) and counts errors the loop swallows to stay alive.
+
+        profiler.begin()
+        ...poll...
+        profiler.lap("poll")       # time since begin() or the previous lap
+        ...
+        profiler.end()             # records the whole tick as "total"
+    """
+
+    def __init__(self, stages=(), window=1024):
+        self.window = window
+        self.stages = {name: LatencyHistogram(window) for name in stages}
+        self.errors = {}
+        self.last_errors = {}
+        self.enabled = True
+        self._tick_start = 0.0
+        self._lap_start = 0.0
+
+    def histogram(self, stage):
+        hist = self.stages.get(stage)
+        if hist is None:
+            hist = self.stages[stage] = LatencyHistogram(self.window)
+        return hist
+
+    def begin(self):
+        self._tick_start = self._lap_start = time.perf_counter()
+
+    def lap(self, stage):
+        if self.enabled:
+            now = time.perf_counter()
+            self.histogram(stage).record(now - self._lap_start)
+            self._lap_start = now
+
+    def end(self):
+        if self.enabled:
+            self.histogram("total").record(time.perf_counter() - self._tick_start)
+
+    def record(self, stage, seconds):
+        """ For stages timed elsewhere, e.g. the GUI redraw on the Tk thread. """
+        if self.enabled:
+            self.histogram(stage).record(seconds)
+
+    def error(self, stage, exc=None):
+        self.errors[stage] = self.errors.get(stage, 0) + 1
+        if exc is not None:
+            self.last_errors[stage] = f"{type(exc).__name__}: {exc}"
+
+    def stats(self):
+        return {
+            "stages": {name: hist.stats() for name, hist in self.stages.items()},
+            "errors": dict(self.errors),
+            "last_errors": dict(self.last_errors),
+        }
+
+    def export_csv(self, path, raw=False):
+        """
+        Writes one row per stage (count, p50/p95/p99/max in ms) followed by the error counters.
+        With raw=True every sample still in the window is written instead, one row per sample.
+        """
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            if raw:
+                writer.writerow(["stage", "sample", "ms"])
+                for name, hist in self.stages.items():
+                    for i, seconds in enumerate(hist.window()):
+                        writer.writerow([name, i, f"{seconds * 1000.0:.4f}"])
+                return
+            writer.writerow(["stage", "count", "p50_ms", "p95_ms", "p99_ms", "max_ms", "max_ever_ms"])
+            for name, hist in self.stages.items():
+                s = hist.stats()
+                writer.writerow([name, s["count"]] + [f"{s[k]:.4f}" for k in
+                                                      ("p50_ms", "p95_ms", "p99_ms", "max_ms", "max_ever_ms")])
+            writer.writerow([])
+            writer.writerow(["error", "count", "last"])
+            for name, count in self.errors.items():
+                writer.writerow([name, count, self.last_errors.get(name, "")])
+
+
+# What keyboard.hook() callbacks get, as far as KeyStateCache cares
+KeyEvent = namedtuple("KeyEvent", "event_type name")
+
+
+class VirtualKeyboard:
+    """ Stand-in for the keyboard module when running headless. Records every injected key event. """
+
+    def __init__(self, record=True):
+        self.held = set()
+        self.events = []
+        self.record = record
+        self.hooks = []
+
+    def press(self, key):
+        self.held.add(key)
+        if self.record:
+            self.events.append(("down", key))
+        for callback in self.hooks:
+            callback(KeyEvent("down", key))
+
+    def release(self, key):
+        self.held.discard(key)
+        if self.record:
+            self.events.append(("up", key))
+        for callback in self.hooks:
+            callback(KeyEvent("up", key))
+
+    def is_pressed(self, key):
+        return key in self.held
+
+    def hook(self, callback):
+        self.hooks.append(callback)
+        return callback
+
+    def unhook(self, callback):
+        self.hooks.remove(callback)
+
+
+class KeyStateCache:
+    """
+    State of a few watched keys, kept by a keyboard hook instead of asking the keyboard module every tick.
+
+    The hook runs on the keyboard module's listener thread: it updates `down` (key -> held) and appends
+    (time, key, pressed) to `edges` whenever a key changes, ignoring auto repeat. The tracking loop reads
+    `down` and drains `edges`, so a press and release that both happen between two ticks still count.
+    Until start() hooks the backend (headless runs), poll() reads the keys the old way and queues the
+    changes it sees.
+    """
+
+    def __init__(self, keyboard_backend, clock, keys=("x",)):
+        self.keyboard = keyboard_backend
+        self.clock = clock
+        self.down = {key: False for key in keys}
+        self.edges = deque(maxlen=64)
+        self.edge_count = 0
+        self._hook = None
+
+    def start(self):
+        if self._hook is None and hasattr(self.keyboard, "hook"):
+            self._hook = self.keyboard.hook(self._on_event)
+
+    def stop(self):
+        if self._hook is not None:
+            self.keyboard.unhook(self._hook)
+            self._hook = None
+
+    def _on_event(self, event):
+        key = (event.name or "").lower()
+        if key in self.down:
+            self._set(key, event.event_type == "down")
+
+    def _set(self, key, pressed):
+        if self.down[key] != pressed:
+            self.down[key] = pressed
+            self.edges.append((self.clock.now(), key, pressed))
+            self.edge_count += 1
+
+    def poll(self):
+        if self._hook is None:
+            for key in self.down:
+                self._set(key, self.keyboard.is_pressed(key))
+
+    def stats(self):
+        return {"key_hook": self._hook is not None, "key_edges": self.edge_count}
+
+
+class InputDispatcher:
+    """
+    Timed queue for injected key events, so gesture logic never blocks the tracking loop.
+
+    Events are (due time, press/release, key). start() runs a dispatcher thread that sleeps until the next
+    event is due. Without the thread (headless runs), the owner calls pump() every tick instead.
+    stats() reports queue depth and dispatch latency (how late each event went out vs when it was due).
+    """
+
+    def __init__(self, keyboard_backend, clock):
+        self.keyboard = keyboard_backend
+        self.clock = clock
+        self.queue = []
+        self.running = False
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._thread = None
+
+        self.dispatched = 0
+        self.max_depth = 0
+        self.last_latency = 0.0
+        self.max_latency = 0.0
+        self._latency_total = 0.0
+
+    def press(self, key, delay=0.0):
+        self._push(delay, True, key)
+
+    def release(self, key, delay=0.0):
+        self._push(delay, False, key)
+
+    def tap(self, key, hold_ms=50.0, delay=0.0):
+        """ Press now (or after delay), release hold_ms later. """
+        self._push(delay, True, key)
+        self._push(delay + hold_ms / 1000.0, False, key)
+
+    def _push(self, delay, is_press, key):
+        with self._cond:
+            self._seq += 1
+            heapq.heappush(self.queue, (self.clock.now() + delay, self._seq, is_press, key))
+            if len(self.queue) > self.max_depth:
+                self.max_depth = len(self.queue)
+            self._cond.notify()
+
+    def pump(self):
+        """ Sends every event that is due. Returns the number sent. """
+        sent = 0
+        while True:
+            with self._cond:
+                if not self.queue or self.queue[0][0] > self.clock.now():
+                    return sent
+                due, _, is_press, key = heapq.heappop(self.queue)
+            if is_press:
+                self.keyboard.press(key)
+            else:
+                self.keyboard.release(key)
+            latency = self.clock.now() - due
+            self.last_latency = latency
+            self.max_latency = max(self.max_latency, latency)
+            self._latency_total += latency
+            self.dispatched += 1
+            sent += 1
+
+    def _run(self):
+        while self.running:
+            self.pump()
+            with self._cond:
+                if not self.running:
+                    break
+                timeout = self.queue[0][0] - self.clock.now() if self.queue else None
+                if timeout is None or timeout > 0:
+                    self._cond.wait(timeout)
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stops the thread and sends whatever is still queued right away. Keys held by a gesture aren't in the
+        queue: SimpleTrackingApp.stop() waits for the loop to exit, then queues their releases first.
+        """
+        with self._cond:
+            self.running = False
+            self._cond.notify()
+            pending = sorted(self.queue)
+            self.queue.clear()
+        for _, _, is_press, key in pending:
+            if is_press:
+                self.keyboard.press(key)
+            else:
+                self.keyboard.release(key)
+
+    def stats(self):
+        return {
+            "queue_depth": len(self.queue),
+            "max_queue_depth": self.max_depth,
+            "dispatched": self.dispatched,
+            "last_latency_ms": self.last_latency * 1000.0,
+            "avg_latency_ms": self._latency_total / self.dispatched * 1000.0 if self.dispatched else 0.0,
+            "max_latency_ms": self.max_latency * 1000.0,
+        }
+
+
+class PoseSource:
+    """
+    Where the tracker gets its device poses from.
+    get_poses() returns an indexable array of TrackedDevicePose structs, or None once the source is exhausted.
+    """
+
+    def find_controllers(self):
+        """ Current controllers as dicts with 'index', 'role' and 'serial'. """
+        return []
+
+    def find_trackers(self):
+        """ Current generic trackers (waist, feet, ...), same dicts as find_controllers(). """
+        return []
+
+    def poll_device_changes(self):
+        """ Called every tick. Returns True when controllers were added, removed or changed role since the last call. """
+        return False
+
+    def get_poses(self, predicted_seconds=0.0):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class OpenVRPoseSource(PoseSource):
+    """
+    Live poses from SteamVR.
+    Controllers and generic trackers are scanned once at startup, after that SteamVR's device events
+    (activated, deactivated, role changed) keep the list current, so devices that turn on late or
+    reconnect are picked up.
+    """
+
+    def __init__(self):
+        self.vr_system = None
+        # Filled in place by OpenVR every tick
+        self.poses = (TrackedDevicePose * MAX_TRACKED_DEVICES)()
+        self.devices = None
+        if openvr is None:
+            print("Error: OpenVR not installed (pip install openvr), no live poses")
+            return
+        try:
+            self.vr_system = openvr.init(openvr.VRApplication_Background)
+            # Reused for every pollNextEvent call
+            self.event = openvr.VREvent_t()
+            self.kinds = {openvr.TrackedDeviceClass_Controller: "controller",
+                          openvr.TrackedDeviceClass_GenericTracker: "tracker"}
+            print("VR System Initialized")
+        except openvr.OpenVRError as e:
+            print(f"Error: {e}")
+
+    def device_property(self, index, prop):
+        try:
+            return self.vr_system.getStringTrackedDeviceProperty(index, prop)
+        except openvr.OpenVRError:
+            return None
+
+    def describe_device(self, index, kind):
+        serial = self.device_property(index, openvr.Prop_SerialNumber_String)
+        if kind == "tracker":
+            controller_type = self.device_property(index, openvr.Prop_ControllerType_String) or ""
+            role = controller_type[len(TRACKER_TYPE_PREFIX):] if controller_type.startswith(
+                TRACKER_TYPE_PREFIX) else controller_type or "tracker"
+        else:
+            hand = self.vr_system.getControllerRoleForTrackedDeviceIndex(index)
+            role = "Left" if hand == openvr.TrackedControllerRole_LeftHand else "Right"
+        return {'index': index, 'role': role, 'serial': serial, 'kind': kind}
+
+    def scan_devices(self):
+        self.devices = {}
+        for i in range(MAX_TRACKED_DEVICES):
+            kind = self.kinds.get(self.vr_system.getTrackedDeviceClass(i))
+            if kind is not None:
+                self.devices[i] = self.describe_device(i, kind)
+
+    def list_devices(self, kind):
+        if self.vr_system is None:
+            return []
+        if self.devices is None:
+            self.scan_devices()
+        return [dict(self.devices[i]) for i in sorted(self.devices) if self.devices[i]['kind'] == kind]
+
+    def find_controllers(self):
+        return self.list_devices("controller")
+
+    def find_trackers(self):
+        return self.list_devices("tracker")
+
+    def poll_device_changes(self):
+        if self.vr_system is None or self.devices is None:
+            return False
+        changed = False
+        event = self.event
+        while self.vr_system.pollNextEvent(event):
+            kind = event.eventType
+            index = event.trackedDeviceIndex
+            if kind == openvr.VREvent_TrackedDeviceActivated:
+                device_kind = self.kinds.get(self.vr_system.getTrackedDeviceClass(index))
+                if device_kind is not None:
+                    self.devices[index] = self.describe_device(index, device_kind)
+                    changed = True
+            elif kind == openvr.VREvent_TrackedDeviceDeactivated:
+                if self.devices.pop(index, None) is not None:
+                    changed = True
+            elif kind == openvr.VREvent_TrackedDeviceRoleChanged:
+                # Sent for the whole system rather than one device, so re-read the roles of the ones we know
+                for i in self.devices:
+                    self.devices[i] = self.describe_device(i, self.devices[i]['kind'])
+                changed = True
+        return changed
+
+    def get_poses(self, predicted_seconds=0.0):
+        if self.vr_system is None:
+            return None
+        self.vr_system.getDeviceToAbsoluteTrackingPose(openvr.TrackingUniverseStanding, predicted_seconds,
+                                                       self.poses)
+        return self.poses
+
+    def close(self):
+        if self.vr_system is not None:
+            openvr.shutdown()
+            self.vr_system = None
+
+
+def controller_key(controller):
+    """ Stable identity for a controller: its serial number, or its device index for sources without one. """
+    return controller.get('serial') or f"#{controller['index']}"
+
+
+def read_recording(path):
+    """
+    Loads a RecordingPoseSource session (or the poses of a SessionRecorder file) into arrays for offline analysis.
+    Returns a dict with "controllers", "devices" (device indices, column order), "t" (F,), "m" (F, D, 3, 4),
+    "v" and "w" (F, D, 3) and "valid" (F, D).
+    """
+    if is_session_file(path):
+        return read_session_poses(path)
+    with open(path, 'r') as f:
+        header = json.loads(f.readline())
+        if header.get("version") != RECORDING_VERSION:
+            raise ValueError(f"Unsupported recording version: {header.get('version')}")
+        frames = [json.loads(line) for line in f if line.strip()]
+
+    devices = sorted({int(idx) for frame in frames for idx in frame["poses"]})
+    count, width = len(frames), len(devices)
+    session = {
+        "controllers": header.get("controllers", []),
+        "trackers": header.get("trackers", []),
+        "devices": devices,
+        "t": np.array([frame["t"] for frame in frames], dtype=float),
+        "m": np.zeros((count, width, 3, 4)),
+        "v": np.zeros((count, width, 3)),
+        "w": np.zeros((count, width, 3)),
+        "valid": np.zeros((count, width), dtype=bool),
+    }
+    for i, frame in enumerate(frames):
+        for col, idx in enumerate(devices):
+            p = frame["poses"].get(str(idx))
+            if p is not None:
+                session["m"][i, col] = p["m"]
+                session["v"][i, col] = p["v"]
+                session["w"][i, col] = p["w"]
+                session["valid"][i, col] = True
+    return session
+
+
+class ReplayPoseSource(PoseSource):
+    """
+    Plays back a session written by RecordingPoseSource, one recorded frame per get_poses() call.
+    File format is JSON lines: a header with the controller list, then one line per frame.
+
+    With preload=True every frame is decoded up front into a compact array of raw pose structs, so
+    playback is a plain copy per tick (no JSON parsing or allocation in the loop).
+    """
+
+    def __init__(self, path, loop=False, preload=False):
+        self.path = path
+        self.loop = loop
+        self.controllers = []
+        self.trackers = []
+        self.frame_time = 0.0
+        self.poses = (TrackedDevicePose * MAX_TRACKED_DEVICES)()
+        self._file = open(path, 'r')
+        header = json.loads(self._file.readline())
+        if header.get("version") != RECORDING_VERSION:
+            raise ValueError(f"Unsupported recording version: {header.get('version')}")
+        self.controllers = header.get("controllers", [])
+        self.trackers = header.get("trackers", [])
+        self._data_start = self._file.tell()
+
+        self._frames = None
+        if preload:
+            self._preload()
+
+    def _preload(self):
+        self._file.close()
+        session = read_recording(self.path)
+        devices = session["devices"]
+        self._rows = np.array(devices, dtype=np.intp)
+        self._times = session["t"]
+
+        # Only the devices that appear in the session are kept, as raw TrackedDevicePose bytes
+        pose_bytes = np.dtype((np.void, ctypes.sizeof(TrackedDevicePose)))
+        self._frames = np.zeros((len(self._times), len(devices)), dtype=pose_bytes)
+        scratch = (TrackedDevicePose * len(devices))()
+        scratch_view = pose_array_view(scratch)
+        scratch_bytes = np.frombuffer(scratch, dtype=pose_bytes)
+        for f in range(len(self._times)):
+            scratch_view['m'] = session["m"][f]
+            scratch_view['velocity'] = session["v"][f]
+            scratch_view['angular_velocity'] = session["w"][f]
+            scratch_view['valid'] = session["valid"][f]
+            self._frames[f] = scratch_bytes
+        self._pose_view = np.frombuffer(self.poses, dtype=pose_bytes)
+        self._cursor = 0
+
+    def find_controllers(self):
+        return [dict(c) for c in self.controllers]
+
+    def find_trackers(self):
+        return [dict(t) for t in self.trackers]
+
+    def get_poses(self, predicted_seconds=0.0):
+        if self._frames is not None:
+            if self._cursor >= len(self._frames):
+                if not self.loop or not len(self._frames):
+                    return None
+                self._cursor = 0
+            self._pose_view[self._rows] = self._frames[self._cursor]
+            self.frame_time = self._times.item(self._cursor)
+            self._cursor += 1
+            return self.poses
+
+        line = self._file.readline()
+        if not line and self.loop:
+            self._file.seek(self._data_start)
+            line = self._file.readline()
+        if not line:
+            return None
+
+        frame = json.loads(line)
+        self.frame_time = frame["t"]
+        ctypes.memset(self.poses, 0, ctypes.sizeof(self.poses))
+        for idx, p in frame["poses"].items():
+            set_pose(self.poses[int(idx)], p["m"], p["v"], p["w"])
+        return self.poses
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+
+class RecordingPoseSource(PoseSource):
+    """ Wraps another pose source and writes every frame it returns to a file ReplayPoseSource can read. """
+
+    def __init__(self, inner, path, clock=None):
+        self.inner = inner
+        self.clock = clock or SystemClock()
+        self._file = open(path, 'w')
+        self._header_written = False
+
+    def poll_device_changes(self):
+        # Only the device lists at the start of the session are kept in the header
+        return self.inner.poll_device_changes()
+
+    def find_controllers(self):
+        controllers = self.inner.find_controllers()
+        if not self._header_written:
+            self._file.write(json.dumps({"version": RECORDING_VERSION, "controllers": controllers,
+                                         "trackers": self.inner.find_trackers()}) + "\n")
+            self._header_written = True
+        return controllers
+
+    def find_trackers(self):
+        return self.inner.find_trackers()
+
+    def get_poses(self, predicted_seconds=0.0):
+        poses = self.inner.get_poses(predicted_seconds)
+        if poses is None:
+            return None
+        if not self._header_written:
+            self.find_controllers()
+
+        frame = {}
+        for i in range(MAX_TRACKED_DEVICES):
+            p = poses[i]
+            if p.bPoseIsValid:
+                m = p.mDeviceToAbsoluteTracking.m
+                frame[str(i)] = {
+                    "m": [[m[r][c] for c in range(4)] for r in range(3)],
+                    "v": list(p.vVelocity.v),
+                    "w": list(p.vAngularVelocity.v),
+                }
+        self._file.write(json.dumps({"t": self.clock.now(), "poses": frame}) + "\n")
+        return poses
+
+    def close(self):
+        self._file.close()
+        self.inner.close()
+
+
+def session_dtype(slots=SESSION_DEVICE_SLOTS, values=OUTPUT_VALUE_COUNT):
+    """
+    One fixed size record per tick. Device fields hold `slots` devices, unused slots have device -1.
+    `values` is the length of the output frame (more than OUTPUT_VALUE_COUNT with tracker slots).
+    """
+    return np.dtype([
+        ('tick', '<u8'),
+        ('t', '<f8'),
+        # Raw poses as the pose source returned them
+        ('device', 'i1', (slots,)),
+        ('m', '<f4', (slots, 3, 4)),
+        ('velocity', '<f4', (slots, 3)),
+        ('angular_velocity', '<f4', (slots, 3)),
+        ('valid', '?', (slots,)),
+        # What the tracker made of them
+        ('hmd_pos', '<f4', (3,)),
+        ('hmd_rot', '<f4', (3,)),
+        ('controller_pos', '<f4', (3,)),
+        ('controller_rot', '<f4', (3,)),
+        ('secondary_pos', '<f4', (3,)),
+        ('secondary_rot', '<f4', (3,)),
+        ('offset_pos', '<f4', (3,)),
+        ('offset_rot', '<f4', (3,)),
+        ('gesture', 'S16'),
+        ('gesture_sequence_active', '?'),
+        ('menu_sequence_active', '?'),
+        # Frame handed to the output channel, output_sent is False on ticks that didn't publish
+        ('output', '<f8', (values,)),
+        ('output_sent', '?'),
+    ], align=True)
+
+
+def read_session(path):
+    """
+    Opens a SessionRecorder file without loading it. Returns (header dict, records) where records is a
+    read-only np.memmap of session_dtype records, so hours of ticks can be sliced and scanned in place.
+    A partly written last record (e.g. after a crash) is ignored.
+    """
+    with open(path, 'rb') as f:
+        raw = f.read(SESSION_HEADER_SIZE)
+    if raw[:len(SESSION_MAGIC)] != SESSION_MAGIC:
+        raise ValueError(f"Not a session file: {path}")
+    header = json.loads(raw[len(SESSION_MAGIC):].rstrip(b'\0').decode('utf-8'))
+    if header.get("version") != SESSION_VERSION:
+        raise ValueError(f"Unsupported session version: {header.get('version')}")
+    dtype = session_dtype(header["slots"], header.get("values", OUTPUT_VALUE_COUNT))
+    if dtype.itemsize != header["record_size"]:
+        raise ValueError(f"Session record size {header['record_size']} doesn't match {dtype.itemsize}")
+
+    count = (os.path.getsize(path) - SESSION_HEADER_SIZE) // dtype.itemsize
+    if count <= 0:
+        return header, np.zeros(0, dtype=dtype)
+    return header, np.memmap(path, dtype=dtype, mode='r', offset=SESSION_HEADER_SIZE, shape=(count,))
+
+
+def is_session_file(path):
+    with open(path, 'rb') as f:
+        return f.read(len(SESSION_MAGIC)) == SESSION_MAGIC
+
+
+def read_session_poses(path):
+    """ The raw poses of a SessionRecorder file in the read_recording() layout. """
+    header, records = read_session(path)
+    slots = records['device']
+    devices = sorted(int(i) for i in np.unique(slots) if i >= 0)
+    count = len(records)
+    session = {
+        "controllers": header.get("controllers", []),
+        "trackers": header.get("trackers", []),
+        "devices": devices,
+        "t": np.array(records['t'], dtype=float),
+        "m": np.zeros((count, len(devices), 3, 4)),
+        "v": np.zeros((count, len(devices), 3)),
+        "w": np.zeros((count, len(devices), 3)),
+        "valid": np.zeros((count, len(devices)), dtype=bool),
+    }
+    for col, idx in enumerate(devices):
+        frames, k = np.nonzero(slots == idx)
+        session["m"][frames, col] = records['m'][frames, k]
+        session["v"][frames, col] = records['velocity'][frames, k]
+        session["w"][frames, col] = records['angular_velocity'][frames, k]
+        session["valid"][frames, col] = records['valid'][frames, k]
+    return session
+
+
+def open_recording(path, loop=False):
+    """ Replay source for either recording format: binary SessionRecorder files or RecordingPoseSource JSON lines. """
+    if is_session_file(path):
+        return SessionReplayPoseSource(path, loop=loop)
+    return ReplayPoseSource(path, loop=loop)
+
+
+class SessionRecorder:
+    """
+    Logs every tick of a SimpleTrackingApp to an append-only binary file of fixed size records
+    (session_dtype): raw device poses, the controller values, gesture state and the output frame.
+
+    Ticks are written into an in-memory ring of `ring_size` records. A writer thread appends the filled
+    part to the file every `flush_interval` seconds, so the tracking loop never waits on the disk. If the
+    ring fills up anyway (e.g. a headless run going faster than real time), record() writes it out itself.
+    Read the file back with read_session() or play it with SessionReplayPoseSource.
+    """
+
+    def __init__(self, path, controllers=(), trackers=(), slots=SESSION_DEVICE_SLOTS, values=OUTPUT_VALUE_COUNT,
+                 ring_size=SESSION_RING_SIZE, flush_interval=SESSION_FLUSH_INTERVAL, threaded=True, info=None):
+        self.path = path
+        self.slots = slots
+        self.dtype = session_dtype(slots, values)
+        self.ring = np.zeros(ring_size, dtype=self.dtype)
+        self.flush_interval = flush_interval
+        self.head = 0  # records written into the ring
+        self.tail = 0  # records written to the file
+        self.stalls = 0
+        self._lock = threading.Lock()
+        self._poses = None
+        self._view = None
+
+        header = dict(info or {}, version=SESSION_VERSION, slots=slots, values=values,
+                      record_size=self.dtype.itemsize, controllers=list(controllers), trackers=list(trackers),
+                      created=time.strftime("%Y-%m-%dT%H:%M:%S"))
+        raw = SESSION_MAGIC + json.dumps(header).encode('utf-8')
+        if len(raw) > SESSION_HEADER_SIZE:
+            raise ValueError("Session header too large")
+        self._file = open(path, 'wb')
+        self._file.write(raw.ljust(SESSION_HEADER_SIZE, b'\0'))
+
+        # Column views of the ring, made once so record() only copies values
+        self._cols = {name: self.ring[name] for name in self.dtype.names}
+        # Byte view of the ring, written to the file without an intermediate copy
+        self._bytes = self.ring.view(np.uint8).reshape(ring_size, self.dtype.itemsize)
+        self._device_rows = np.zeros(slots, dtype=np.intp)
+
+        self.running = threaded
+        self.thread = None
+        if threaded:
+            self.thread = threading.Thread(target=self._writer, daemon=True)
+            self.thread.start()
+
+    def record(self, app, poses, output_sent):
+        """ Stores the current tick. Called by SimpleTrackingApp.tick() after the output stage. """
+        if self.head - self.tail >= len(self.ring):
+            self.stalls += 1
+            self.flush()
+        i = self.head % len(self.ring)
+        c = self._cols
+
+        c['tick'][i] = self.head
+        c['t'][i] = app.last_time
+
+        if poses is not self._poses:
+            self._poses = poses
+            self._view = pose_array_view(poses)
+        rows = self._device_rows
+        count = 1
+        rows[0] = HMD_INDEX
+        for devices in (app.controllers, app.trackers):
+            for device in devices:
+                if count == self.slots:
+                    break
+                rows[count] = device['index']
+                count += 1
+        device = c['device'][i]
+        device[:count] = rows[:count]
+        device[count:] = -1
+        recorded = self._view[rows[:count]]
+        c['m'][i, :count] = recorded['m']
+        c['velocity'][i, :count] = recorded['velocity']
+        c['angular_velocity'][i, :count] = recorded['angular_velocity']
+        c['valid'][i, :count] = recorded['valid']
+        c['valid'][i, count:] = False
+
+        c['hmd_pos'][i] = app.hmd_pos
+        c['hmd_rot'][i] = app.hmd_rot
+        c['controller_pos'][i] = app.controller_pos
+        c['controller_rot'][i] = app.controller_rot
+        c['secondary_pos'][i] = app.secondary_controller_pos
+        c['secondary_rot'][i] = app.secondary_controller_rot
+        c['offset_pos'][i] = (XOffset, YOffset, ZOffset)
+        c['offset_rot'][i] = (PitchOffset, RollOffset, YawOffset)
+        c['gesture'][i] = app.gesture_active_type
+        c['gesture_sequence_active'][i] = app.gesture_sequence_active
+        c['menu_sequence_active'][i] = app.menu_sequence_active
+        c['output'][i] = app.output_values
+        c['output_sent'][i] = output_sent
+        self.head += 1
+
+    def flush(self):
+        """ Appends every record not yet on disk. Safe to call from any thread. """
+        with self._lock:
+            head = self.head
+            size = len(self.ring)
+            while self.tail < head:
+                start = self.tail % size
+                end = min(size, start + head - self.tail)
+                self._file.write(self._bytes[start:end])
+                self.tail += end - start
+            self._file.flush()
+
+    def _writer(self):
+        while self.running:
+            time.sleep(self.flush_interval)
+            if self.running:
+                self.flush()
+
+    def recent(self, count):
+        """ Copy of the last `count` ticks still held in memory, oldest first. """
+        count = min(count, self.head, len(self.ring))
+        idx = np.arange(self.head - count, self.head) % len(self.ring)
+        return self.ring[idx]
+
+    def stats(self):
+        return {
+            "records": self.head,
+            "written": self.tail,
+            "stalls": self.stalls,
+            "bytes": SESSION_HEADER_SIZE + self.tail * self.dtype.itemsize,
+        }
+
+    def close(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join()
+        self.flush()
+        self._file.close()
+
+
+class SessionReplayPoseSource(PoseSource):
+    """
+    Plays back the raw poses of a SessionRecorder file, one record per get_poses() call.
+    The file is memory-mapped, so playback starts instantly and memory use doesn't grow with its length.
+    """
+
+    def __init__(self, path, loop=False):
+        self.path = path
+        self.loop = loop
+        self.header, self.records = read_session(path)
+        self.controllers = self.header.get("controllers", [])
+        self.trackers = self.header.get("trackers", [])
+        self.frame_time = 0.0
+        self.poses = (TrackedDevicePose * MAX_TRACKED_DEVICES)()
+        self._view = pose_array_view(self.poses)
+        self._cursor = 0
+
+    def find_controllers(self):
+        return [dict(c) for c in self.controllers]
+
+    def find_trackers(self):
+        return [dict(t) for t in self.trackers]
+
+    def get_poses(self, predicted_seconds=0.0):
+        if self._cursor >= len(self.records):
+            if not self.loop or not len(self.records):
+                return None
+            self._cursor = 0
+        record = self.records[self._cursor]
+        self._cursor += 1
+        self.frame_time = float(record['t'])
+
+        view = self._view
+        view['valid'] = False
+        devices = record['device']
+        for k in range(len(devices)):
+            idx = devices[k]
+            if idx < 0:
+                break
+            pose = view[idx]
+            pose['m'] = record['m'][k]
+            pose['velocity'] = record['velocity'][k]
+            pose['angular_velocity'] = record['angular_velocity'][k]
+            pose['valid'] = record['valid'][k]
+        return self.poses
+
+    def close(self):
+        # Drop the map so the file can be moved or deleted right away on Windows
+        self.records = None
+
+
+class SyntheticPoseSource(PoseSource):
+    """
+    Scripted motion for tests and benchmarks.
+    `motions` maps a device index to a function of time returning a 3x4 matrix (see make_pose_matrix).
+    Velocities are derived by finite differences so prediction code sees sensible values.
+    body_trackers=True adds waist and foot trackers walking in place (see BODY_TRACKERS).
+    """
+    # Device index and role of the body_trackers, each moved by the <role>_motion method
+    BODY_TRACKERS = ((3, "waist"), (4, "left_foot"), (5, "right_foot"))
+
+    def __init__(self, clock, motions=None, controllers=None, duration=None, trackers=None, body_trackers=False):
+        self.clock = clock
+        self.start_time = clock.now()
+        self.duration = duration
+        if motions is None:
+            motions = {
+                HMD_INDEX: SyntheticPoseSource.hmd_idle,
+                1: SyntheticPoseSource.primary_aim,
+                2: SyntheticPoseSource.secondary_reach,
+            }
+            controllers = controllers or [{'index': 1, 'role': "Right", 'serial': "SYNTH-R"},
+                                          {'index': 2, 'role': "Left", 'serial': "SYNTH-L"}]
+        self.motions = motions
+        self.controllers = controllers or []
+        self.trackers = trackers or []
+        if body_trackers:
+            for index, role in self.BODY_TRACKERS:
+                self.motions[index] = getattr(self, f"{role}_motion")
+                self.trackers.append({'index': index, 'role': role, 'serial': f"SYNTH-{role.upper()}"})
+        self.poses = (TrackedDevicePose * MAX_TRACKED_DEVICES)()
+        self.disconnected = set()
+        self.devices_changed = False
+
+    def disconnect(self, index):
+        """ Simulates a device dropping out: its pose goes invalid and it leaves the controller/tracker list. """
+        self.disconnected.add(index)
+        self.poses[index].bPoseIsValid = False
+        self.devices_changed = True
+
+    def connect(self, index, role=None):
+        """ Brings a disconnected device back, optionally with a different role. """
+        self.disconnected.discard(index)
+        if role is not None:
+            for c in self.controllers + self.trackers:
+                if c['index'] == index:
+                    c['role'] = role
+        self.devices_changed = True
+
+    def poll_device_changes(self):
+        changed = self.devices_changed
+        self.devices_changed = False
+        return changed
+
+    @staticmethod
+    def hmd_idle(t):
+        return make_pose_matrix([0.02 * math.sin(t * 0.7), 1.7, 0.01 * math.sin(t * 0.5)],
+                                yaw=10.0 * math.sin(t * 0.3), pitch=3.0 * math.sin(t * 0.4))
+
+    @staticmethod
+    def pulse(t, period, start, end, ramp=0.25):
+        """ Smooth 0 -> 1 -> 0 window repeating every `period` seconds, so finite-difference velocities stay sane. """
+        phase = t % period
+        rise = min(max((phase - start) / ramp, 0.0), 1.0)
+        fall = min(max((end - phase) / ramp, 0.0), 1.0)
+        x = min(rise, fall)
+        return x * x * (3.0 - 2.0 * x)
+
+    @staticmethod
+    def primary_aim(t):
+        # Sweeps a small circle in front of the player and dips below the holster cutoff every 10 seconds.
+        dip = -0.5 * SyntheticPoseSource.pulse(t, 10.0, 8.0, 10.0)
+        return make_pose_matrix([0.2 + 0.1 * math.cos(t), 1.3 + 0.1 * math.sin(t) + dip, -0.4],
+                                yaw=15.0 * math.sin(t), pitch=10.0 * math.cos(t))
+
+    @staticmethod
+    def secondary_reach(t):
+        # Rests at the hip, then reaches up to the left shoulder for a second every 6 seconds.
+        k = SyntheticPoseSource.pulse(t, 6.0, 4.75, 6.0)
+        return make_pose_matrix([-0.25 + 0.1 * k, 1.0 + 0.75 * k, -0.1],
+                                yaw=5.0 * math.sin(t) * (1.0 - k) - 30.0 * k, pitch=60.0 * k)
+
+    @staticmethod
+    def waist_motion(t):
+        return make_pose_matrix([0.03 * math.sin(t * 1.8), 1.0 + 0.01 * math.sin(t * 3.6), 0.05],
+                                yaw=8.0 * math.sin(t * 0.3))
+
+    @staticmethod
+    def foot_step(t, side, phase):
+        """ Foot lifting and landing in place, `side` meters left/right of center. """
+        lift = max(0.0, math.sin(t * 1.8 + phase))
+        return make_pose_matrix([side, 0.08 + 0.15 * lift * lift, 0.1 - 0.1 * lift], pitch=-20.0 * lift)
+
+    @staticmethod
+    def left_foot_motion(t):
+        return SyntheticPoseSource.foot_step(t, -0.15, 0.0)
+
+    @staticmethod
+    def right_foot_motion(t):
+        return SyntheticPoseSource.foot_step(t, 0.15, math.pi)
+
+    def find_controllers(self):
+        return [dict(c) for c in self.controllers if c['index'] not in self.disconnected]
+
+    def find_trackers(self):
+        return [dict(t) for t in self.trackers if t['index'] not in self.disconnected]
+
+    def get_poses(self, predicted_seconds=0.0):
+        t = self.clock.now() - self.start_time
+        if self.duration is not None and t > self.duration:
+            return None
+
+        t += predicted_seconds
+        eps = 1e-3
+        poses = self.poses
+        for idx, motion in self.motions.items():
+            if idx in self.disconnected:
+                continue
+            m0 = np.array(motion(t))
+            m1 = np.array(motion(t + eps))
+            velocity = (m1[:, 3] - m0[:, 3]) / eps
+            d_rot = m1[:, :3] @ m0[:, :3].T
+            angular_velocity = np.array([d_rot[2, 1] - d_rot[1, 2],
+                                         d_rot[0, 2] - d_rot[2, 0],
+                                         d_rot[1, 0] - d_rot[0, 1]]) / (2 * eps)
+            set_pose(poses[idx], m0, velocity, angular_velocity)
+        return poses
+
+
+class GestureIndex:
+    """
+    Gesture targets compiled into arrays with a uniform grid over their positions.
+
+    The cell size is the position sensitivity and every target is registered in its own cell and the 26
+    around it, so anything within reach of a controller position lives in that position's cell. A query is
+    one dict lookup plus a vectorized distance / angle check of the few targets found there, no matter how
+    many targets are defined. Angles are checked as the rotation between the controller and the target
+    (geodesic angle), using the target angles converted to quaternions once at build time.
+
+    With exit_scale > 1 the cells are sized for the wider exit thresholds and a query also reports the
+    targets the controller is near (within exit_scale times both sensitivities), see GestureEngine.
+    """
+
+    def __init__(self):
+        self.names = []
+        self.pos = np.zeros((0, 3))
+        self.rot = np.zeros((0, 3))
+        self.quat = np.zeros((0, 4))
+        self.cells = {}
+        self.cell_size = 0.0
+        self.pos_sensitivity = None
+        self.rot_sensitivity = None
+        self.min_dot = 1.0
+        self.exit_scale = 1.0
+        self.exit_pos = 0.0
+        self.exit_min_dot = 1.0
+
+    def build(self, targets, pos_sensitivity, rot_sensitivity, active_bank=None, exit_scale=1.0):
+        """ targets is SimpleTrackingApp.targets. Targets without a bank are always active. """
+        self.names = [name for name, t in targets.items() if t.get("bank") in (None, active_bank)]
+        self.pos = np.array([targets[name]["pos"] for name in self.names], dtype=float).reshape(-1, 3)
+        self.rot = np.array([targets[name]["rot"] for name in self.names], dtype=float).reshape(-1, 3)
+        self.quat = target_quaternions(self.rot)
+        self.pos_sensitivity = pos_sensitivity
+        self.rot_sensitivity = rot_sensitivity
+        # Within rot_sensitivity degrees <=> |q . target| >= cos(rot_sensitivity / 2)
+        self.min_dot = math.cos(math.radians(min(rot_sensitivity, 180.0)) / 2.0)
+        self.exit_scale = max(exit_scale, 1.0)
+        self.exit_pos = pos_sensitivity * self.exit_scale
+        self.exit_min_dot = math.cos(math.radians(min(rot_sensitivity * self.exit_scale, 180.0)) / 2.0)
+        self.cell_size = max(self.exit_pos, 1e-3)
+
+        cells = {}
+        for i, p in enumerate(self.pos):
+            cx, cy, cz = (math.floor(v / self.cell_size) for v in p)
+            for dx in (-1, 0, 1):
+                for dy in (-1, 0, 1):
+                    for dz in (-1, 0, 1):
+                        cells.setdefault((cx + dx, cy + dy, cz + dz), []).append(i)
+        self.cells = {cell: np.array(ids, dtype=np.intp) for cell, ids in cells.items()}
+
+    def query(self, pos, quat):
+        """
+        (inside, near) for the controller position and rotation (quaternion), names in target order: inside
+        are the targets within both sensitivities, near the ones within the exit thresholds (inside included).
+        Both are empty tuples when nothing is close, so the common case builds no lists.
+        """
+        size = self.cell_size
+        candidates = self.cells.get((math.floor(pos[0] / size), math.floor(pos[1] / size),
+                                     math.floor(pos[2] / size)))
+        if candidates is None:
+            return (), ()
+
+        # Early rejection on position, angles only for what's left
+        d = self.pos[candidates] - pos
+        d2 = np.einsum('ij,ij->i', d, d)
+        close = d2 <= self.exit_pos * self.exit_pos
+        candidates = candidates[close]
+        if not len(candidates):
+            return (), ()
+        dots = np.abs(self.quat[candidates] @ quat)
+        near = dots >= self.exit_min_dot
+        inside = near & (d2[close] <= self.pos_sensitivity * self.pos_sensitivity) & (dots >= self.min_dot)
+        names = self.names
+        return [names[i] for i in candidates[inside]], [names[i] for i in candidates[near]]
+
+
+class GestureEngine:
+    """
+    Turns the per tick target matches into edges, one small state machine per target:
+
+        idle --inside for enter_dwell--> active --not near for exit_dwell--> idle
+
+    A target has to stay inside its (enter) thresholds for enter_dwell before it fires, and once active it
+    only ends after being outside the wider exit thresholds for exit_dwell, so tracking noise at the border
+    doesn't turn into a burst of presses. After ending, a target can't fire again for `refractory` seconds,
+    and `cooldowns` (name -> seconds) holds targets off for longer after they fired (the Pip-Boy and menu
+    sequences). update() returns only the changes, [(name, True)] when a target starts and (name, False)
+    when it ends; in between nothing is sent to the input layer.
+    """
+
+    def __init__(self, enter_dwell=0.0, exit_dwell=0.0, refractory=0.0):
+        self.enter_dwell = enter_dwell
+        self.exit_dwell = exit_dwell
+        self.refractory = refractory
+        self.cooldowns = {}
+        self.active = {}     # name -> time it started
+        self.entering = {}   # name -> first tick inside, not started yet
+        self.leaving = {}    # name -> first tick no longer near, still active
+        self.ready_at = {}   # name -> earliest time it may start again
+        self.enters = 0
+        self.exits = 0
+        self.absorbed = 0
+
+    def reset(self):
+        """ Forgets which targets are active or in a dwell time. Cooldowns and refractory times still apply. """
+        self.active.clear()
+        self.entering.clear()
+        self.leaving.clear()
+
+    @property
+    def pending(self):
+        """ True while a target is waiting out a dwell time, so the tick loop keeps running at full rate. """
+        return bool(self.entering or self.leaving)
+
+    def update(self, now, inside, near, blocked=()):
+        """ inside / near as from GestureIndex.query. Targets in `blocked` don't start (but may end). """
+        if not (inside or self.active or self.entering):
+            return ()
+        edges = []
+
+        for name in list(self.active):
+            if name in near:
+                if self.leaving.pop(name, None) is not None:
+                    self.absorbed += 1
+                continue
+            since = self.leaving.setdefault(name, now)
+            if now - since >= self.exit_dwell:
+                del self.active[name], self.leaving[name]
+                self.ready_at[name] = max(self.ready_at.get(name, 0.0), now + self.refractory)
+                self.exits += 1
+                edges.append((name, False))
+
+        for name in list(self.entering):
+            if name not in inside:
+                del self.entering[name]
+                self.absorbed += 1
+
+        for name in inside:
+            if name in self.active:
+                continue
+            if name in blocked or now < self.ready_at.get(name, 0.0):
+                self.entering.pop(name, None)
+                continue
+            since = self.entering.setdefault(name, now)
+            if now - since >= self.enter_dwell:
+                del self.entering[name]
+                self.active[name] = now
+                self.ready_at[name] = now + self.cooldowns.get(name, 0.0)
+                self.enters += 1
+                edges.append((name, True))
+        return edges
+
+    def stats(self):
+        return {"active": list(self.active), "enters": self.enters, "exits": self.exits,
+                "absorbed": self.absorbed}
+
+
+class CalibrationProfile:
+    """
+    A calibration profile compiled into (2 + trackers, 6) arrays, row 0 the primary controller, row 1 the
+    secondary and then one row per tracker slot, so every device is mapped to game values with a handful
+    of in-place NumPy ops:
+
+        adjusted = raw * scale + offsets + bias      (offsets: the manual X/Y/Z/Yaw/Pitch/Roll offsets)
+        game[:, k] = sign[k] * adjusted[:, order[k]] + output_bias[k]
+
+    A profile is a dict with the keys of DEFAULT_CALIBRATION_PROFILE. Missing keys come from the default,
+    an optional "secondary" dict overrides scale/bias/order/sign/output_bias for the secondary only and
+    "trackers" does the same for the trackers (on top of the secondary's values).
+    """
+    FIELDS = ("scale", "bias", "order", "sign", "output_bias")
+
+    def __init__(self, name=DEFAULT_CALIBRATION, profile=None, trackers=0):
+        self.name = name
+        primary = dict(DEFAULT_CALIBRATION_PROFILE, **(profile or {}))
+        secondary = dict(primary, **primary.get("secondary", {}))
+        tracker = dict(secondary, **primary.get("trackers", {}))
+        rows = [self.compile_row(primary), self.compile_row(secondary)] + [self.compile_row(tracker)] * trackers
+        self.scale, self.bias, self.order, self.sign, self.output_bias = (
+            np.array([r[i] for r in rows]) for i in range(len(self.FIELDS)))
+        self.holster_pose = np.array(self.axis_list(primary["holster_pose"], "holster_pose"), dtype=float)
+
+        self.adjusted = np.zeros((len(rows), 6))
+        self.game = np.zeros((len(rows), 6))
+        # Flat indices for gathering adjusted[:, order] with one np.take
+        self._gather = (self.order + np.arange(len(rows))[:, None] * 6).ravel()
+        self._game_flat = self.game.reshape(-1)
+
+    @staticmethod
+    def axis_list(values, field):
+        if len(values) != len(CALIBRATION_AXES):
+            raise ValueError(f"'{field}' needs {len(CALIBRATION_AXES)} values, got {len(values)}")
+        return [float(v) for v in values]
+
+    @classmethod
+    def compile_row(cls, profile):
+        order = [CALIBRATION_AXES.index(a) if a in CALIBRATION_AXES else int(a) for a in profile["order"]]
+        if sorted(order) != list(range(len(CALIBRATION_AXES))):
+            raise ValueError(f"'order' must use each of {', '.join(CALIBRATION_AXES)} once, got {profile['order']}")
+        return (cls.axis_list(profile["scale"], "scale"), cls.axis_list(profile["bias"], "bias"), order,
+                cls.axis_list(profile["sign"], "sign"), cls.axis_list(profile["output_bias"], "output_bias"))
+
+    def apply(self, raw, offsets):
+        """ raw and offsets are (rows, 6) arrays in CALIBRATION_AXES order. Returns self.game, reused. """
+        adjusted, game = self.adjusted, self.game
+        np.multiply(raw, self.scale, out=adjusted)
+        np.add(adjusted, offsets, out=adjusted)
+        np.add(adjusted, self.bias, out=adjusted)
+        adjusted.take(self._gather, out=self._game_flat, mode='clip')
+        np.multiply(game, self.sign, out=game)
+        np.add(game, self.output_bias, out=game)
+        return game
+
+
+class FilenameOutputChannel:
+    """
+    Original transport. Renames the single file in Data/NVSE/Test so its name holds the values.
+    Only as many tracker blocks as fit in MAX_PATH with that folder are sent, the rest are left off the name.
+    """
+
+    def __init__(self, test_dir):
+        self.test_dir = test_dir
+        name_length = min(MAX_FILENAME_LENGTH, MAX_PATH - 2 - len(os.path.abspath(test_dir)))
+        room = name_length + 1 - FILENAME_VALUE_WIDTH * OUTPUT_VALUE_COUNT
+        self.max_slots = max(0, room // (FILENAME_VALUE_WIDTH * TRACKER_BLOCK_SIZE))
+        self.max_values = OUTPUT_VALUE_COUNT + TRACKER_BLOCK_SIZE * self.max_slots
+        self.warned = False
+
+    def publish(self, values, timestamp=0.0):
+        if len(values) > self.max_values:
+            if not self.warned:
+                slots = (len(values) - OUTPUT_VALUE_COUNT) // TRACKER_BLOCK_SIZE
+                print(f"Only {self.max_slots} of {slots} tracker slots fit in the file name under {self.test_dir}. "
+                      f"Use the mmap output channel for more.")
+                self.warned = True
+            values = values[:self.max_values]
+        encoded_name = "_".join([f"{v:.2f}" for v in values])
+
+        if not os.path.exists(self.test_dir):
+            return False
+
+        files = os.listdir(self.test_dir)
+        if not files:
+            with open(os.path.join(self.test_dir, encoded_name), 'w') as f:
+                f.write("VR")
+        else:
+            old_path = os.path.join(self.test_dir, files[0])
+            new_path = os.path.join(self.test_dir, encoded_name)
+            if old_path != new_path: os.rename(old_path, new_path)
+        return True
+
+    def close(self):
+        pass
+
+
+class MmapOutputChannel:
+    """
+    Publishes frames into a fixed layout memory-mapped file, no directory scans or renames.
+
+    Layout (little endian):
+        0   4s   magic 'FNVR'
+        4   u16  layout version
+        6   u16  header size in bytes (values start here)
+        8   u32  number of float64 values in the frame
+        12  u32  reserved
+        16  u64  sequence (odd while a write is in progress)
+        24  f64  tracker timestamp of the frame
+        32  f64  values[MMAP_MAX_VALUES]
+
+    Readers use the seqlock protocol: read the sequence, skip if odd, copy the values, then re-read the
+    sequence and retry if it changed. See MmapOutputReader.
+    """
+    COUNT_OFFSET = 8
+    SEQ_OFFSET = 16
+    TIMESTAMP_OFFSET = 24
+
+    def __init__(self, path):
+        self.path = path
+        self.seq = 0
+        self.size = MMAP_HEADER.size + 8 * MMAP_MAX_VALUES
+        with open(path, 'a+b') as f:
+            f.truncate(self.size)
+        self._file = open(path, 'r+b')
+        self._map = mmap.mmap(self._file.fileno(), self.size)
+        MMAP_HEADER.pack_into(self._map, 0, MMAP_MAGIC, MMAP_VERSION, MMAP_HEADER.size, 0, 0, self.seq, 0.0)
+        # Writable NumPy view over the value block, so publishing is a plain copy
+        self._values = np.frombuffer(self._map, dtype='<f8', count=MMAP_MAX_VALUES, offset=MMAP_HEADER.size)
+
+    def publish(self, values, timestamp=0.0):
+        count = min(len(values), MMAP_MAX_VALUES)
+
+        # Odd sequence marks the frame as being written
+        self.seq += 1
+        struct.pack_into('<Q', self._map, self.SEQ_OFFSET, self.seq)
+        struct.pack_into('<I', self._map, self.COUNT_OFFSET, count)
+        struct.pack_into('<d', self._map, self.TIMESTAMP_OFFSET, timestamp)
+        self._values[:count] = values[:count]
+        self.seq += 1
+        struct.pack_into('<Q', self._map, self.SEQ_OFFSET, self.seq)
+        return True
+
+    def close(self):
+        # The NumPy view holds an export of the map, drop it first or close() refuses
+        self._values = None
+        self._map.close()
+        self._file.close()
+
+
+class DedupOutputWriter:
+    """
+    Sits in front of an output channel and drops frames whose values, quantized the same way the
+    filename encoding rounds them (OUTPUT_DECIMALS), are identical to the last frame published.
+    A resting or holstered hand then costs no filesystem work. An identical frame still goes out every
+    keepalive seconds (<= 0 disables the keep-alive).
+    """
+
+    def __init__(self, channel, keepalive=DEFAULT_OUTPUT_KEEPALIVE_MS / 1000.0, decimals=OUTPUT_DECIMALS):
+        self.channel = channel
+        self.keepalive = keepalive
+        self.scale = 10.0 ** decimals
+        self.published = 0
+        self.suppressed = 0
+        self.last_publish_time = None
+        self._quantized = np.zeros(MMAP_MAX_VALUES)
+        self._last = np.zeros(MMAP_MAX_VALUES)
+        self._last_count = -1
+
+    def publish(self, values, timestamp=0.0):
+        count = len(values)
+        q = self._quantized[:count]
+        np.multiply(values, self.scale, out=q)
+        np.rint(q, out=q)
+
+        if (count == self._last_count and (q == self._last[:count]).all()
+                and (self.keepalive <= 0 or timestamp - self.last_publish_time < self.keepalive)):
+            self.suppressed += 1
+            return True
+
+        ok = self.channel.publish(values, timestamp)
+        if ok:
+            self._last[:count] = q
+            self._last_count = count
+            self.last_publish_time = timestamp
+            self.published += 1
+        return ok
+
+    def stats(self):
+        total = self.published + self.suppressed
+        return {
+            "published": self.published,
+            "suppressed": self.suppressed,
+            "suppressed_pct": 100.0 * self.suppressed / total if total else 0.0,
+        }
+
+    def close(self):
+        self.channel.close()
+
+
+class MmapOutputReader:
+    """ Reference reader for MmapOutputChannel. read() returns (sequence, timestamp, values) or None. """
+
+    def __init__(self, path, retries=100):
+        self.retries = retries
+        self._file = open(path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, header_size, _, _, _, _ = MMAP_HEADER.unpack_from(self._map, 0)
+        if magic != MMAP_MAGIC or version != MMAP_VERSION:
+            raise ValueError(f"Not an FNVR v{MMAP_VERSION} pose file: {path}")
+        self.header_size = header_size
+
+    def read(self):
+        for _ in range(self.retries):
+            seq_before, = struct.unpack_from('<Q', self._map, MmapOutputChannel.SEQ_OFFSET)
+            if seq_before & 1:
+                continue
+            count, = struct.unpack_from('<I', self._map, MmapOutputChannel.COUNT_OFFSET)
+            timestamp, = struct.unpack_from('<d', self._map, MmapOutputChannel.TIMESTAMP_OFFSET)
+            values = struct.unpack_from(f'<{count}d', self._map, self.header_size)
+            seq_after, = struct.unpack_from('<Q', self._map, MmapOutputChannel.SEQ_OFFSET)
+            if seq_before == seq_after:
+                return seq_before // 2, timestamp, list(values)
+        return None
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+
+def parse_address(text, default_host="127.0.0.1"):
+    """ "host:port" or just "port" -> (host, port) """
+    host, _, port = text.rpartition(":")
+    return host or default_host, int(port)
+
+
+class UdpFramePublisher:
+    """
+    Sends every output frame as one small datagram to each target (localhost by default), so overlays,
+    loggers or tools on another machine get frames at the full tick rate without touching the game folder.
+    Give each consumer its own target port.
+
+    Datagram (little endian), UDP_HEADER then the values:
+        0   4s   magic 'FNVU'
+        4   u16  schema version (UDP_VERSION)
+        6   u16  number of values
+        8   u32  reserved
+        12  u64  sequence, +1 per frame (same for every target)
+        20  f64  tracker timestamp of the frame
+        28  f64  send time, time.perf_counter() seconds (monotonic, comparable on the same machine)
+        36  f32  values[count]
+
+    Sending never blocks the loop: a full socket buffer drops the datagram and counts it.
+    See UdpFrameReceiver for the reference receiver.
+    """
+
+    def __init__(self, targets=DEFAULT_UDP_TARGETS, max_values=MMAP_MAX_VALUES):
+        self.targets = [parse_address(t) if isinstance(t, str) else tuple(t) for t in targets]
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setblocking(False)
+        self.seq = 0
+        self.sent = 0
+        self.dropped = 0
+        self.errors = 0
+        self._buffer = bytearray(UDP_HEADER.size + 4 * max_values)
+        self._view = memoryview(self._buffer)
+        # Values are written straight into the datagram buffer
+        self._values = np.frombuffer(self._buffer, dtype='<f4', count=max_values, offset=UDP_HEADER.size)
+
+    def publish(self, values, timestamp=0.0):
+        count = min(len(values), len(self._values))
+        self.seq += 1
+        self._values[:count] = values[:count]
+        UDP_HEADER.pack_into(self._buffer, 0, UDP_MAGIC, UDP_VERSION, count, 0, self.seq, timestamp,
+                             time.perf_counter())
+        datagram = self._view[:UDP_HEADER.size + 4 * count]
+        for target in self.targets:
+            try:
+                self.sock.sendto(datagram, target)
+                self.sent += 1
+            except BlockingIOError:
+                self.dropped += 1
+            except OSError:
+                # e.g. Windows reporting an earlier datagram hit a closed port. Nobody listening is fine.
+                self.errors += 1
+        return True
+
+    def stats(self):
+        return {"frames": self.seq, "sent": self.sent, "dropped": self.dropped, "errors": self.errors}
+
+    def close(self):
+        self._values = None
+        self._view.release()
+        self.sock.close()
+
+
+class UdpFrameReceiver:
+    """
+    Reference receiver for UdpFramePublisher.
+    recv() returns (sequence, frame_time, send_time, receive_time, values) or None when nothing arrived
+    within the timeout. receive_time is time.perf_counter(), so receive_time - send_time is the
+    end-to-end latency when both ends run on the same machine.
+    """
+
+    def __init__(self, port, host="127.0.0.1", timeout=1.0):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind((host, port))
+        self.sock.settimeout(timeout)
+        self._buffer = bytearray(65536)
+
+    @staticmethod
+    def decode(data):
+        magic, version, count, _, seq, frame_time, send_time = UDP_HEADER.unpack_from(data, 0)
+        if magic != UDP_MAGIC or version != UDP_VERSION:
+            raise ValueError(f"Not an FNVR v{UDP_VERSION} frame")
+        values = struct.unpack_from(f'<{count}f', data, UDP_HEADER.size)
+        return seq, frame_time, send_time, list(values)
+
+    def recv(self):
+        try:
+            size = self.sock.recv_into(self._buffer)
+        except socket.timeout:
+            return None
+        received = time.perf_counter()
+        seq, frame_time, send_time, values = self.decode(self._buffer[:size])
+        return seq, frame_time, send_time, received, values
+
+    def close(self):
+        self.sock.close()
+
+
+class SnapshotRing:
+    """
+    FrameSnapshots in shared memory, so a GUI in another process can show them without asking the tracker.
+    The creator (name=None) owns the block, the other side attaches by name. shared=False keeps the ring in
+    a plain buffer instead, for a GUI on another thread of the same process (SimpleTrackingApp.snapshot).
+
+    write() copies the tracker's values into the next of `size` slots and then bumps the count in the
+    header, nothing is allocated per tick. read() copies the newest slot and checks the count again: it's
+    only torn if the writer lapped the whole ring meanwhile, which at GUI rates it never does, and then it
+    simply reads again.
+    """
+
+    DTYPE = np.dtype([
+        ('tick', '<i8'), ('time', '<f8'),
+        ('hmd_pos', '<f8', 3), ('hmd_rot', '<f8', 3),
+        ('controller_pos', '<f8', 3), ('controller_rot', '<f8', 3),
+        ('secondary_pos', '<f8', 3), ('secondary_rot', '<f8', 3),
+        ('offset_pos', '<f8', 3), ('offset_rot', '<f8', 3),
+        ('gesture_active_type', f'S{SNAPSHOT_GESTURE_LENGTH}'), ('gesture_sequence_active', '?'),
+        ('last_activation_time', '<f8'),
+        ('trackers', '<u1'), ('tracker_valid', '?', MAX_TRACKER_SLOTS),
+    ], align=True)
+    HEADER_SIZE = 64
+
+    def __init__(self, name=None, size=SNAPSHOT_RING_SIZE, retries=10, shared=True):
+        self.retries = retries
+        self.owner = name is None
+        self.shm = None
+        if not shared:
+            buf = bytearray(self.HEADER_SIZE + size * self.DTYPE.itemsize)
+            self.name = None
+        elif self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=self.HEADER_SIZE + size * self.DTYPE.itemsize)
+            buf = self.shm.buf
+            SNAPSHOT_HEADER.pack_into(buf, 0, SNAPSHOT_MAGIC, SNAPSHOT_VERSION, size, 0)
+            self.name = self.shm.name
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            buf = self.shm.buf
+            magic, version, size, _ = SNAPSHOT_HEADER.unpack_from(buf, 0)
+            if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+                raise ValueError(f"Not an FNVR v{SNAPSHOT_VERSION} snapshot ring: {name}")
+            self.name = self.shm.name
+        self.size = size
+        self._count = np.ndarray(1, dtype='<u8', buffer=buf, offset=8)
+        self.records = np.ndarray(size, dtype=self.DTYPE, buffer=buf, offset=self.HEADER_SIZE)
+        # Column views of the records, made once so write() only copies values
+        self._cols = {name: self.records[name] for name in self.DTYPE.names}
+
+    def write(self, app):
+        """ Stores the current tick of a SimpleTrackingApp. Called by SimpleTrackingApp.publish_snapshot(). """
+        count = int(self._count[0])
+        i = count % self.size
+        c = self._cols
+        c['tick'][i] = app.tick_count
+        c['time'][i] = app.last_time
+        c['hmd_pos'][i] = app.hmd_pos
+        c['hmd_rot'][i] = app.hmd_rot
+        c['controller_pos'][i] = app.controller_pos
+        c['controller_rot'][i] = app.controller_rot
+        c['secondary_pos'][i] = app.secondary_controller_pos
+        c['secondary_rot'][i] = app.secondary_controller_rot
+        c['offset_pos'][i] = (XOffset, YOffset, ZOffset)
+        c['offset_rot'][i] = (PitchOffset, RollOffset, YawOffset)
+        c['gesture_active_type'][i] = app.gesture_active_type[:SNAPSHOT_GESTURE_LENGTH]
+        c['gesture_sequence_active'][i] = app.gesture_sequence_active
+        c['last_activation_time'][i] = app.last_activation_time
+        valid = app.tracker_valid
+        trackers = min(len(valid), MAX_TRACKER_SLOTS)
+        c['trackers'][i] = trackers
+        c['tracker_valid'][i, :trackers] = valid[:trackers]
+        c['tracker_valid'][i, trackers:] = False
+        self._count[0] = count + 1
+
+    def read(self):
+        """ Newest snapshot as a FrameSnapshot, or None before the first one. """
+        for _ in range(self.retries):
+            count = int(self._count[0])
+            if count == 0:
+                return None
+            r = self.records[(count - 1) % self.size].copy()
+            if int(self._count[0]) - count < self.size - 1:
+                return FrameSnapshot(
+                    int(r['tick']), float(r['time']),
+                    tuple(r['hmd_pos'].tolist()), tuple(r['hmd_rot'].tolist()),
+                    tuple(r['controller_pos'].tolist()), tuple(r['controller_rot'].tolist()),
+                    tuple(r['secondary_pos'].tolist()), tuple(r['secondary_rot'].tolist()),
+                    tuple(r['offset_pos'].tolist()), tuple(r['offset_rot'].tolist()),
+                    r['gesture_active_type'].decode(), bool(r['gesture_sequence_active']),
+                    float(r['last_activation_time']), tuple(r['tracker_valid'][:r['trackers']].tolist()))
+        return None
+
+    def written(self):
+        return int(self._count[0])
+
+    def close(self):
+        self._count = None
+        self.records = None
+        self._cols = None
+        if self.shm is None:
+            return
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
 class SimpleTrackingApp:
-    def __init__(self, gui_callback=None):
+    def __init__(self, gui_callback=None, pose_source=None, clock=None, keyboard_backend=None,
+                 config_file=CONFIG_FILE):
         self.vr_system = None
+        self.pose_source = pose_source
+        self.clock = clock or SystemClock()
+        self.keyboard = keyboard_backend or load_keyboard()
+        self.input = InputDispatcher(self.keyboard, self.clock)
+        self.keys = KeyStateCache(self.keyboard, self.clock)
+        self.profiler = StageProfiler(TICK_STAGES)
+        self.config_file = config_file
         self.controllers = []
         self.active_controller_idx = 0
         self.secondary_controller_idx = -1
+        # Generic trackers, and the output slots they fill (see configure_tracker_slots)
+        self.trackers = []
+        self.tracker_slots = []
+        # Slots follow the controller's serial number, so they survive reconnects and index changes
+        self.primary_serial = None
+        self.secondary_serial = None
+        self.devices_version = 0
         self.current_vals = {}
-        # Used for manual offset anchoring
-        self.anchor_vals = None
+        # Used for manual offset anchoring: [iX, iY, iZ, iXr, iYr, iZr] captured while X is held
+        self.anchor_vals = [0.0] * 6
+        self.anchor_active = False
 
         self.fpXr_current = 0.0
         self.fpZr_current = 0.0
         self.lerp_speed = 8.0
-        self.last_time = time.time()
+        self.last_time = self.clock.now()
         self.running = False
+        self.thread = None
         self.gui_callback = gui_callback
+        self.pose_batch = PoseBatch()
+        self.tick_rate = DEFAULT_TICK_RATE
+        self.busy_wait_ms = DEFAULT_BUSY_WAIT_MS
+        self.prediction_ms = DEFAULT_PREDICTION_MS
+        self.extrapolation_ms = DEFAULT_EXTRAPOLATION_MS
+        self.pose_filter_name = DEFAULT_POSE_FILTER
+        self.filter_params = {"one_euro": dict(DEFAULT_ONE_EURO), "kalman": dict(DEFAULT_KALMAN)}
+        self.pose_filter = None
+        self.scheduler = FixedRateScheduler(self.clock)
+        self.adaptive_params = dict(DEFAULT_ADAPTIVE_RATE)
+        self.adaptive_rate = None
+        self.display_rate = DEFAULT_DISPLAY_RATE
+        self.tick_count = 0
+        # Every tick goes into this ring, the snapshot property builds a FrameSnapshot from it on demand
+        self.snapshots = SnapshotRing(shared=False)
+        self._snapshot = None
+        self._snapshot_count = 0
+        # Set when the GUI runs in another process (see TrackerProcess)
+        self.snapshot_ring = None
+        self.session_recorder = None
 
         self.hmd_pos = [0.0, 0.0, 0.0]
         self.hmd_rot = [0.0, 0.0, 0.0]
@@ -89,14 +2879,24 @@ class SimpleTrackingApp:
         self.controller_rot = [0.0, 0.0, 0.0]
         self.secondary_controller_pos = [0.0, 0.0, 0.0]
         self.secondary_controller_rot = [0.0, 0.0, 0.0]
+        # Same rotation as a quaternion (PoseBatch.quat), what the gestures are matched on
+        self.secondary_controller_quat = QUAT_IDENTITY.copy()
 
-        self.last_x_press_time = 0
+        # No earlier press, so the first one can't complete a double tap whatever the clock starts at
+        self.last_x_press_time = float('-inf')
         self.x_was_pressed = False
 
         # Defaults
         self.game_dir = DEFAULT_GAME_PATH
         self.test_dir = ""
         self.holster_cutoff = DEFAULT_HOLSTER_CUTOFF
+        self.output_channel_name = DEFAULT_OUTPUT_CHANNEL
+        self.output_channel = None
+        self.output_dedup = DEFAULT_OUTPUT_DEDUP
+        self.output_keepalive_ms = DEFAULT_OUTPUT_KEEPALIVE_MS
+        self.udp_publish = DEFAULT_UDP_PUBLISH
+        self.udp_targets = list(DEFAULT_UDP_TARGETS)
+        self.udp_publisher = None
 
         # Target Data Storage
         self.targets = {
@@ -110,6 +2910,13 @@ class SimpleTrackingApp:
         self.pos_sensitivity = 0.15
         self.rot_sensitivity = 40.0
 
+        # Output calibration: name -> profile dict from the config, and the active one compiled
+        self.calibration_profiles = {DEFAULT_CALIBRATION: dict(DEFAULT_CALIBRATION_PROFILE)}
+        self.calibration_name = DEFAULT_CALIBRATION
+        self.calibration = CalibrationProfile()
+        # Inputs to the calibration (rows: primary, secondary, tracker slots) are sized there too
+        self.configure_tracker_slots([])
+
         # Gesture States
         self.gesture_active_type = "NONE"
 
@@ -131,22 +2938,43 @@ class SimpleTrackingApp:
         self.hotkey_states = {}
         for k in range(1, 9):
             self.hotkey_states[str(k)] = {'is_held': False}
+        self.held_hotkeys = []
+
+        # Compiled gesture targets, rebuilt whenever targets, sensitivities or the bank change
+        self.gesture_index = GestureIndex()
+        self.gesture_bank = None
+        self.gestures_dirty = True
+        # Gesture start / end edges, the Pip-Boy and menu cooldowns live in there too
+        self.gesture_timing = dict(DEFAULT_GESTURE_TIMING)
+        self.gesture_engine = GestureEngine()
 
         # Load Configuration
         self.load_config()
         self.update_test_dir_path()
 
-        try:
-            self.vr_system = openvr.init(openvr.VRApplication_Background)
-            print("VR System Initialized")
-            self.find_controllers()
-        except openvr.OpenVRError as e:
-            print(f"Error: {e}")
+        if self.pose_source is None:
+            self.pose_source = OpenVRPoseSource()
+            self.vr_system = self.pose_source.vr_system
+        self.find_controllers()
 
     def load_config(self):
         default_config = {
             "game_directory": DEFAULT_GAME_PATH,
             "holster_cutoff": DEFAULT_HOLSTER_CUTOFF,
+            "output_channel": DEFAULT_OUTPUT_CHANNEL,
+            "output_dedup": DEFAULT_OUTPUT_DEDUP,
+            "output_keepalive_ms": DEFAULT_OUTPUT_KEEPALIVE_MS,
+            "udp_publish": DEFAULT_UDP_PUBLISH, "udp_targets": DEFAULT_UDP_TARGETS,
+            "tick_rate": DEFAULT_TICK_RATE, "busy_wait_ms": DEFAULT_BUSY_WAIT_MS,
+            "prediction_ms": DEFAULT_PREDICTION_MS, "extrapolation_ms": DEFAULT_EXTRAPOLATION_MS,
+            "pose_filter": DEFAULT_POSE_FILTER, "one_euro": DEFAULT_ONE_EURO, "kalman": DEFAULT_KALMAN,
+            "adaptive_rate": DEFAULT_ADAPTIVE_RATE,
+            "gesture_timing": DEFAULT_GESTURE_TIMING,
+            "display_rate": DEFAULT_DISPLAY_RATE,
+            "calibration_profile": DEFAULT_CALIBRATION,
+            "calibration_profiles": {DEFAULT_CALIBRATION: DEFAULT_CALIBRATION_PROFILE},
+            "tracker_slots": [],
+            "primary_serial": None, "secondary_serial": None,
             "pipboy_pos": DEFAULT_PIP_POS, "pipboy_rot": DEFAULT_PIP_ROT,
             "menu_pos": DEFAULT_MENU_POS, "menu_rot": DEFAULT_MENU_ROT,
         }
@@ -155,13 +2983,13 @@ class SimpleTrackingApp:
             default_config[f"{k}_pos"] = DEFAULT_HK_POS
             default_config[f"{k}_rot"] = DEFAULT_HK_ROT
 
-        if not os.path.exists(CONFIG_FILE):
+        if not os.path.exists(self.config_file):
             print("Config file not found. Creating default.")
             self.save_config(default_config)
             data = default_config
         else:
             try:
-                with open(CONFIG_FILE, 'r') as f:
+                with open(self.config_file, 'r') as f:
                     data = json.load(f)
             except json.JSONDecodeError:
                 print("Config file corrupted. Using defaults.")
@@ -169,24 +2997,92 @@ class SimpleTrackingApp:
 
         self.game_dir = data.get("game_directory", DEFAULT_GAME_PATH)
         self.holster_cutoff = data.get("holster_cutoff", DEFAULT_HOLSTER_CUTOFF)
+        self.output_channel_name = data.get("output_channel", DEFAULT_OUTPUT_CHANNEL)
+        if self.output_channel_name not in OUTPUT_CHANNELS:
+            print(f"Unknown output channel '{self.output_channel_name}'. Using {DEFAULT_OUTPUT_CHANNEL}.")
+            self.output_channel_name = DEFAULT_OUTPUT_CHANNEL
+        self.output_dedup = data.get("output_dedup", DEFAULT_OUTPUT_DEDUP)
+        self.output_keepalive_ms = data.get("output_keepalive_ms", DEFAULT_OUTPUT_KEEPALIVE_MS)
+        self.udp_publish = data.get("udp_publish", DEFAULT_UDP_PUBLISH)
+        self.udp_targets = list(data.get("udp_targets", DEFAULT_UDP_TARGETS))
+        self.open_udp_publisher()
+        self.tick_rate = data.get("tick_rate", DEFAULT_TICK_RATE)
+        self.busy_wait_ms = data.get("busy_wait_ms", DEFAULT_BUSY_WAIT_MS)
+        self.prediction_ms = data.get("prediction_ms", DEFAULT_PREDICTION_MS)
+        self.extrapolation_ms = data.get("extrapolation_ms", DEFAULT_EXTRAPOLATION_MS)
+        self.pose_filter_name = data.get("pose_filter", DEFAULT_POSE_FILTER)
+        if self.pose_filter_name not in POSE_FILTERS:
+            print(f"Unknown pose filter '{self.pose_filter_name}'. Using {DEFAULT_POSE_FILTER}.")
+            self.pose_filter_name = DEFAULT_POSE_FILTER
+        self.filter_params = {"one_euro": dict(DEFAULT_ONE_EURO, **data.get("one_euro", {})),
+                              "kalman": dict(DEFAULT_KALMAN, **data.get("kalman", {}))}
+        self.build_pose_filter()
+        self.adaptive_params = dict(DEFAULT_ADAPTIVE_RATE, **data.get("adaptive_rate", {}))
+        self.build_adaptive_rate()
+        self.gesture_timing = dict(DEFAULT_GESTURE_TIMING, **data.get("gesture_timing", {}))
+        self.build_gesture_engine()
+        self.display_rate = data.get("display_rate", DEFAULT_DISPLAY_RATE)
+        self.calibration_profiles = {DEFAULT_CALIBRATION: dict(DEFAULT_CALIBRATION_PROFILE)}
+        self.calibration_profiles.update(data.get("calibration_profiles", {}))
+        self.calibration_name = data.get("calibration_profile", DEFAULT_CALIBRATION)
+        self.configure_tracker_slots(data.get("tracker_slots", []))
+        self.primary_serial = data.get("primary_serial")
+        self.secondary_serial = data.get("secondary_serial")
+        self.scheduler.set_rate(self.tick_rate)
+        self.scheduler.busy_wait = self.busy_wait_ms / 1000.0
 
         for key in self.targets.keys():
             self.targets[key]["pos"] = data.get(f"{key}_pos", DEFAULT_PIP_POS if key == "pipboy" else DEFAULT_HK_POS)
             self.targets[key]["rot"] = data.get(f"{key}_rot", DEFAULT_PIP_ROT if key == "pipboy" else DEFAULT_HK_ROT)
 
+        # Custom gestures: [{"name", "key", "pos", "rot", "bank"}]. They hold their key like hotkeys 1-8.
+        for gesture in data.get("gestures", []):
+            name = gesture["name"]
+            self.targets[name] = {"pos": list(gesture["pos"]), "rot": list(gesture["rot"]),
+                                  "key": gesture.get("key", name), "bank": gesture.get("bank")}
+            self.hotkey_states[name] = {'is_held': False}
+        self.gesture_bank = data.get("gesture_bank")
+        self.gestures_dirty = True
+
     def save_config(self, data_override=None):
         if data_override:
             data = data_override
         else:
             data = {
                 "game_directory": self.game_dir,
-                "holster_cutoff": self.holster_cutoff
+                "holster_cutoff": self.holster_cutoff,
+                "output_channel": self.output_channel_name,
+                "output_dedup": self.output_dedup,
+                "output_keepalive_ms": self.output_keepalive_ms,
+                "udp_publish": self.udp_publish,
+                "udp_targets": self.udp_targets,
+                "tick_rate": self.tick_rate,
+                "busy_wait_ms": self.busy_wait_ms,
+                "prediction_ms": self.prediction_ms,
+                "extrapolation_ms": self.extrapolation_ms,
+                "pose_filter": self.pose_filter_name,
+                "one_euro": self.filter_params["one_euro"],
+                "kalman": self.filter_params["kalman"],
+                "adaptive_rate": self.adaptive_params,
+                "gesture_timing": self.gesture_timing,
+                "display_rate": self.display_rate,
+                "calibration_profile": self.calibration_name,
+                "calibration_profiles": self.calibration_profiles,
+                "tracker_slots": self.tracker_slots,
+                "primary_serial": self.primary_serial,
+                "secondary_serial": self.secondary_serial
             }
+            data["gesture_bank"] = self.gesture_bank
+            data["gestures"] = []
             for key, val in self.targets.items():
+                if "key" in val:
+                    data["gestures"].append({"name": key, "key": val["key"], "pos": val["pos"], "rot": val["rot"],
+                                             "bank": val.get("bank")})
+                    continue
                 data[f"{key}_pos"] = val["pos"]
                 data[f"{key}_rot"] = val["rot"]
 
-        with open(CONFIG_FILE, 'w') as f:
+        with open(self.config_file, 'w') as f:
             json.dump(data, f, indent=4)
         print("Configuration saved.")
 
@@ -203,12 +3099,214 @@ class SimpleTrackingApp:
                 os.makedirs(self.test_dir, exist_ok=True)
             except Exception as e:
                 print(f"Directory Creation Error: {e}")
+        self.open_output_channel()
+
+    def open_output_channel(self):
+        if self.output_channel is not None:
+            self.output_channel.close()
+            self.output_channel = None
+
+        if self.output_channel_name == "mmap":
+            try:
+                self.output_channel = MmapOutputChannel(os.path.join(os.path.dirname(self.test_dir), MMAP_FILE_NAME))
+            except Exception as e:
+                print(f"Memory Map Error: {e}. Falling back to filename output.")
+        if self.output_channel is None:
+            self.output_channel = FilenameOutputChannel(self.test_dir)
+        if self.output_dedup:
+            self.output_channel = DedupOutputWriter(self.output_channel, self.output_keepalive_ms / 1000.0)
+
+    def get_output_stats(self):
+        if isinstance(self.output_channel, DedupOutputWriter):
+            return self.output_channel.stats()
+        return {}
+
+    def open_udp_publisher(self):
+        if self.udp_publisher is not None:
+            self.udp_publisher.close()
+            self.udp_publisher = None
+        if self.udp_publish:
+            try:
+                self.udp_publisher = UdpFramePublisher(self.udp_targets)
+            except (OSError, ValueError) as e:
+                print(f"UDP Publisher Error: {e}. Frames won't be sent over UDP.")
+
+    def set_udp_publish(self, enabled, targets=None):
+        if targets is not None:
+            self.udp_targets = list(targets)
+        self.udp_publish = bool(enabled)
+        self.open_udp_publisher()
+        self.save_config()
+
+    def get_udp_stats(self):
+        publisher = self.udp_publisher
+        return publisher.stats() if publisher is not None else {}
+
+    def close_outputs(self):
+        self.output_channel.close()
+        if self.udp_publisher is not None:
+            self.udp_publisher.close()
+            self.udp_publisher = None
+
+    def build_pose_filter(self):
+        self.pose_filter = make_pose_filter(self.pose_filter_name, MAX_TRACKED_DEVICES,
+                                            self.filter_params.get(self.pose_filter_name))
+
+    def build_adaptive_rate(self):
+        params = self.adaptive_params
+        self.adaptive_rate = None
+        self.scheduler.set_idle(None)
+        if params["enabled"] and params["idle_rate"] > 0:
+            self.adaptive_rate = AdaptiveRate(params["idle_rate"], params["idle_after_ms"] / 1000.0,
+                                              params["distance"], params["angle"])
+
+    def build_gesture_engine(self):
+        """ Applies gesture_timing. The engine is kept, so keys held right now still get released. """
+        timing = self.gesture_timing
+        engine = self.gesture_engine
+        engine.enter_dwell = timing["enter_dwell_ms"] / 1000.0
+        engine.exit_dwell = timing["exit_dwell_ms"] / 1000.0
+        engine.refractory = timing["refractory_ms"] / 1000.0
+        self.gestures_dirty = True
+
+    def build_calibration(self):
+        profile = self.calibration_profiles.get(self.calibration_name)
+        if profile is None:
+            print(f"Unknown calibration profile '{self.calibration_name}'. Using {DEFAULT_CALIBRATION}.")
+            self.calibration_name = DEFAULT_CALIBRATION
+            profile = self.calibration_profiles[DEFAULT_CALIBRATION]
+        trackers = len(self.tracker_slots)
+        try:
+            self.calibration = CalibrationProfile(self.calibration_name, profile, trackers)
+        except (ValueError, KeyError, TypeError) as e:
+            print(f"Calibration profile '{self.calibration_name}' is invalid ({e}). Using the default.")
+            self.calibration_name = DEFAULT_CALIBRATION
+            self.calibration = CalibrationProfile(trackers=trackers)
+
+    def configure_tracker_slots(self, slots):
+        """
+        Sets which trackers get an output block, by role ("waist", "left_foot", ...) or serial, in output
+        order. Sizes the per-slot arrays and the output frame once, the loop then only fills them.
+        """
+        if len(slots) > MAX_TRACKER_SLOTS:
+            print(f"Only {MAX_TRACKER_SLOTS} tracker slots fit in an output frame, ignoring the rest.")
+            slots = slots[:MAX_TRACKER_SLOTS]
+        count = len(slots)
+        self.tracker_slots = list(slots)
+        # Batch row per slot, row 0 (the HMD) for slots no connected tracker fills
+        self.tracker_rows = np.zeros(count, dtype=np.intp)
+        self.tracker_bound = np.zeros(count, dtype=bool)
+        self.tracker_valid = np.zeros(count, dtype=bool)
+        self.tracker_pose = np.zeros((count, 6))
+        # x, y, z, yaw, pitch, roll per slot, same convention as the secondary controller values
+        self.tracker_values = np.zeros((count, 6))
+        self.tracker_mask = self.tracker_valid[:, None]
+
+        self.output_values = np.zeros(OUTPUT_VALUE_COUNT + TRACKER_BLOCK_SIZE * count)
+        self.tracker_blocks = self.output_values[OUTPUT_VALUE_COUNT:].reshape(count, TRACKER_BLOCK_SIZE)
+        self.calibration_raw = np.zeros((2 + count, 6))
+        self.calibration_offsets = np.zeros((2 + count, 6))
+        self.build_calibration()
+        self.bind_trackers()
+
+    def bind_trackers(self):
+        """ Points each tracker slot at the batch row of the tracker with that role or serial. """
+        self.tracker_rows[:] = 0
+        self.tracker_bound[:] = False
+        first_row = 1 + len(self.controllers)
+        for row, tracker in enumerate(self.trackers, first_row):
+            for key in (tracker.get('serial'), tracker.get('role')):
+                if key in self.tracker_slots:
+                    slot = self.tracker_slots.index(key)
+                    if not self.tracker_bound[slot]:
+                        self.tracker_rows[slot] = row
+                        self.tracker_bound[slot] = True
+                    break
+
+    def update_trackers(self, batch):
+        """ Copies every tracker slot out of the pose batch at once, zeros for missing or lost trackers. """
+        batch.pose6.take(self.tracker_rows, axis=0, out=self.tracker_pose, mode='clip')
+        # Same axis order as the controllers: forward, side, up from the batch's x, y, z
+        self.tracker_pose.take(TRACKER_AXES, axis=1, out=self.tracker_values, mode='clip')
+        batch.valid.take(self.tracker_rows, out=self.tracker_valid, mode='clip')
+        np.logical_and(self.tracker_valid, self.tracker_bound, out=self.tracker_valid)
+        np.multiply(self.tracker_values, self.tracker_mask, out=self.tracker_values)
+
+    def set_calibration_profile(self, name):
+        """ Switches the output calibration, e.g. per weapon. Takes effect on the next tick. """
+        if name in self.calibration_profiles and name != self.calibration_name:
+            self.calibration_name = name
+            self.build_calibration()
+            self.save_config()
+
+    def get_calibration_profiles(self):
+        return list(self.calibration_profiles)
+
+    def set_pose_filter(self, name):
+        if name in POSE_FILTERS and name != self.pose_filter_name:
+            self.pose_filter_name = name
+            self.build_pose_filter()
+            self.save_config()
+
+    def set_input_settings(self, pos_sensitivity, rot_sensitivity, holster_cutoff, prediction_ms, extrapolation_ms):
+        self.pos_sensitivity = pos_sensitivity
+        self.rot_sensitivity = rot_sensitivity
+        # Only the holster and prediction settings are saved
+        if (self.holster_cutoff, self.prediction_ms, self.extrapolation_ms) != (holster_cutoff, prediction_ms,
+                                                                                 extrapolation_ms):
+            self.holster_cutoff = holster_cutoff
+            self.prediction_ms = prediction_ms
+            self.extrapolation_ms = extrapolation_ms
+            self.save_config()
+
+    def set_tick_rate(self, rate_hz):
+        if rate_hz > 0 and rate_hz != self.tick_rate:
+            self.tick_rate = rate_hz
+            self.scheduler.set_rate(rate_hz)
+            self.save_config()
+
+    def get_timing_stats(self):
+        return self.scheduler.stats()
+
+    def get_input_stats(self):
+        return dict(self.input.stats(), **self.keys.stats())
+
+    def get_idle_stats(self):
+        adaptive = self.adaptive_rate
+        return adaptive.stats() if adaptive is not None else {}
+
+    def get_gesture_stats(self):
+        return self.gesture_engine.stats()
+
+    def get_stage_stats(self):
+        return self.profiler.stats()
+
+    def get_stats(self):
+        """ Everything measured about the loop in one dict, for tools and the GUI. """
+        stats = self.profiler.stats()
+        stats["timing"] = self.get_timing_stats()
+        stats["output"] = self.get_output_stats()
+        stats["udp"] = self.get_udp_stats()
+        stats["idle"] = self.get_idle_stats()
+        stats["input"] = self.get_input_stats()
+        stats["gestures"] = self.get_gesture_stats()
+        return stats
+
+    def export_stats_csv(self, path, raw=False):
+        self.profiler.export_csv(path, raw)
+
+    def set_output_channel(self, name):
+        if name in OUTPUT_CHANNELS and name != self.output_channel_name:
+            self.output_channel_name = name
+            self.open_output_channel()
+            self.save_config()
 
     def set_target_from_secondary(self, target_key):
         if self.secondary_controller_idx != -1:
             self.targets[target_key]["pos"] = list(self.secondary_controller_pos)
             self.targets[target_key]["rot"] = list(self.secondary_controller_rot)
             print(f"Set {target_key} Target: {self.targets[target_key]['pos']}")
+            self.gestures_dirty = True
             self.save_config()
 
     def reset_target(self, target_key):
@@ -221,19 +3319,71 @@ class SimpleTrackingApp:
         else:
             self.targets[target_key]["pos"] = list(DEFAULT_HK_POS)
             self.targets[target_key]["rot"] = list(DEFAULT_HK_ROT)
+        self.gestures_dirty = True
+        self.save_config()
+
+    def add_gesture(self, name, key, bank=None):
+        """ Adds (or moves) a custom gesture at the secondary controller's current pose. """
+        if self.secondary_controller_idx == -1 or name in ("pipboy", "menu") or name in map(str, range(1, 9)):
+            return
+        self.targets[name] = {"pos": list(self.secondary_controller_pos), "rot": list(self.secondary_controller_rot),
+                              "key": key, "bank": bank}
+        self.hotkey_states.setdefault(name, {'is_held': False})
+        print(f"Added gesture {name} ({key}) in bank {bank}")
+        self.gestures_dirty = True
+        self.save_config()
+
+    def remove_gesture(self, name):
+        if "key" in self.targets.get(name, {}):
+            del self.targets[name]
+            self.gestures_dirty = True
+            self.save_config()
+
+    def get_gesture_banks(self):
+        return sorted({t["bank"] for t in self.targets.values() if t.get("bank")})
+
+    def set_gesture_bank(self, bank):
+        self.gesture_bank = bank or None
+        self.gestures_dirty = True
         self.save_config()
 
     def find_controllers(self):
-        self.controllers = []
-        for i in range(openvr.k_unMaxTrackedDeviceCount):
-            if self.vr_system.getTrackedDeviceClass(i) == openvr.TrackedDeviceClass_Controller:
-                role = self.vr_system.getControllerRoleForTrackedDeviceIndex(i)
-                role_name = "Left" if role == openvr.TrackedControllerRole_LeftHand else "Right"
-                self.controllers.append({'index': i, 'role': role_name})
+        """
+        Reads the controller and tracker lists from the pose source and points the primary/secondary and
+        tracker slots at them.
+        Called at startup and whenever the source reports a device change, never as a per-tick rescan.
+        """
+        controllers = self.pose_source.find_controllers()
+        keys = [controller_key(c) for c in controllers]
+
+        if self.primary_serial is None and controllers:
+            self.primary_serial = keys[0]
+        secondary = keys.index(self.secondary_serial) if self.secondary_serial in keys else -1
+        if self.primary_serial in keys:
+            primary = keys.index(self.primary_serial)
+        else:
+            # Remembered primary is gone (dropped out or a different set of controllers). Fall back to the
+            # first controller that isn't the secondary, without forgetting the serial, so it comes back
+            # to the right hand when it reconnects.
+            primary = next((i for i in range(len(controllers)) if i != secondary), -1)
+
+        trackers = self.pose_source.find_trackers()
+        self.pose_batch.set_devices([c['index'] for c in controllers] + [t['index'] for t in trackers])
+        if self.pose_filter is not None:
+            # Rows now belong to different devices
+            self.pose_filter.reset()
+        self.active_controller_idx = primary
+        self.secondary_controller_idx = secondary
+        self.controllers = controllers
+        self.trackers = trackers
+        self.bind_trackers()
+        self.devices_version += 1
 
     def cycle_controller(self):
         if self.controllers:
             self.active_controller_idx = (self.active_controller_idx + 1) % len(self.controllers)
+            self.primary_serial = controller_key(self.controllers[self.active_controller_idx])
+            self.save_config()
             return self.controllers[self.active_controller_idx]['role']
         return "None"
 
@@ -242,68 +3392,89 @@ class SimpleTrackingApp:
             self.secondary_controller_idx += 1
             if self.secondary_controller_idx >= len(self.controllers):
                 self.secondary_controller_idx = -1
+            self.secondary_serial = None if self.secondary_controller_idx == -1 else controller_key(
+                self.controllers[self.secondary_controller_idx])
+            self.save_config()
             return "None" if self.secondary_controller_idx == -1 else self.controllers[self.secondary_controller_idx][
                 'role']
         return "None"
 
-    def is_match(self, target_pos, target_rot):
-        pos_dist = math.sqrt(sum((a - b) ** 2 for a, b in zip(self.secondary_controller_pos, target_pos)))
-        rot_diffs = [abs(a - b) for a, b in zip(self.secondary_controller_rot, target_rot)]
-        rot_diffs = [min(d, 360 - d) for d in rot_diffs]
-        return (pos_dist <= self.pos_sensitivity) and all(d <= self.rot_sensitivity for d in rot_diffs)
+    def check_gestures(self, tracked=True):
+        """
+        Matches the secondary controller against the targets and acts on the edges from the gesture engine:
+        the Pip-Boy and menu start their sequences, hotkeys and custom gestures press / release their key.
+        """
+        index = self.gesture_index
+        engine = self.gesture_engine
+        if tracked and self.secondary_controller_idx != -1:
+            if (self.gestures_dirty or index.pos_sensitivity != self.pos_sensitivity
+                    or index.rot_sensitivity != self.rot_sensitivity):
+                index.build(self.targets, self.pos_sensitivity, self.rot_sensitivity, self.gesture_bank,
+                            self.gesture_timing["exit_scale"])
+                engine.cooldowns = {"pipboy": self.activation_duration + self.cooldown_period,
+                                    "menu": self.menu_cooldown}
+                self.gestures_dirty = False
+            inside, near = index.query(self.secondary_controller_pos, self.secondary_controller_quat)
+        else:
+            inside = near = ()
 
-    def check_gestures(self):
-        """Main loop to check all gesture types."""
-        if self.secondary_controller_idx == -1:
-            self.gesture_active_type = "NONE"
-            return
+        # The sequences don't overlap, and the Pip-Boy wins over the menu
+        if self.gesture_sequence_active or self.menu_sequence_active:
+            blocked = SEQUENCE_GESTURES
+        elif "pipboy" in inside:
+            blocked = ("menu",)
+        else:
+            blocked = ()
 
-        # 1. Pipboy
-        pip_match = self.is_match(self.targets["pipboy"]["pos"], self.targets["pipboy"]["rot"])
+        for name, started in engine.update(self.clock.now(), inside, near, blocked):
+            if name == "pipboy":
+                if started:
+                    self.start_pipboy_sequence()
+            elif name == "menu":
+                if started:
+                    self.start_menu_sequence()
+            else:
+                self.update_hotkey(name, started)
 
-        if pip_match:
+        # Status for the UI
+        active = engine.active
+        if "pipboy" in active:
             self.gesture_active_type = "PIPBOY"
-            now = time.time()
-            if not self.gesture_sequence_active and not self.menu_sequence_active:
-                if (now - self.last_activation_time > (self.activation_duration + self.cooldown_period)):
-                    self.start_pipboy_sequence()
-        elif self.is_match(self.targets["menu"]["pos"], self.targets["menu"]["rot"]):
+        elif "menu" in active:
             self.gesture_active_type = "MENU"
-            now = time.time()
-            if not self.menu_sequence_active and not self.gesture_sequence_active:
-                if (now - self.last_menu_activation_time > self.menu_cooldown):
-                    self.start_menu_sequence()
+        elif self.held_hotkeys:
+            self.gesture_active_type = self.hotkey_states[self.held_hotkeys[0]]['status']
         else:
             self.gesture_active_type = "NONE"
 
-        # 3. Check Hotkeys 1-8
-        self.update_hotkeys()
+    def release_gestures(self):
+        """ Lets go of every key a gesture is holding and ends all gestures, for when tracking stops. """
+        for name in list(self.held_hotkeys):
+            self.update_hotkey(name, False)
+        self.gesture_engine.reset()
+        self.gesture_active_type = "NONE"
 
-    def update_hotkeys(self):
-        """Updates instantaneous hotkey presses based on gesture presence."""
-        for k in range(1, 9):
-            key = str(k)
-            matched = self.is_match(self.targets[key]["pos"], self.targets[key]["rot"])
-            state = self.hotkey_states[key]
-
-            if matched:
-                if not state['is_held']:
-                    keyboard.press(key)
-                    state['is_held'] = True
-                    print(f"Hotkey {key} DOWN")
-
-                # Update status for UI
-                if self.gesture_active_type == "NONE":
-                    self.gesture_active_type = f"HOLDING {key}"
-            else:
-                if state['is_held']:
-                    keyboard.release(key)
-                    state['is_held'] = False
-                    print(f"Hotkey {key} UP")
+    def update_hotkey(self, name, held):
+        """ Presses or releases a hotkey / custom gesture's key when its gesture starts or ends. """
+        state = self.hotkey_states.get(name)
+        if state is None:
+            return
+        if held:
+            # Remember the key, so it's the one released even if the gesture is edited or removed meanwhile
+            key = self.targets[name].get("key", name)
+            self.input.press(key)
+            state.update(is_held=True, key=key, status=f"HOLDING {key}")
+            self.held_hotkeys.append(name)
+            print(f"Hotkey {key} DOWN")
+        elif state['is_held']:
+            self.input.release(state['key'])
+            state['is_held'] = False
+            self.held_hotkeys.remove(name)
+            print(f"Hotkey {state['key']} UP")
 
     def start_pipboy_sequence(self):
         self.gesture_sequence_active = True
-        self.last_activation_time = time.time()
+        self.last_activation_time = self.clock.now()
         self.fpXr_override = 1.0
         self.tab_pressed = False
 
@@ -312,11 +3483,9 @@ class SimpleTrackingApp:
             self.fpXr_override = 0.0
             return
 
-        elapsed = time.time() - self.last_activation_time
+        elapsed = self.clock.now() - self.last_activation_time
         if elapsed >= 1.0 and not self.tab_pressed:
-            keyboard.press('Tab')
-            time.sleep(0.05)
-            keyboard.release('Tab')
+            self.input.tap('Tab', 50)
             self.tab_pressed = True
 
         if elapsed >= self.activation_duration:
@@ -325,7 +3494,7 @@ class SimpleTrackingApp:
 
     def start_menu_sequence(self):
         self.menu_sequence_active = True
-        self.last_menu_activation_time = time.time()
+        self.last_menu_activation_time = self.clock.now()
         self.menu_esc_pressed = False
         print("Menu Sequence Started")
 
@@ -333,13 +3502,13 @@ class SimpleTrackingApp:
         if not self.menu_sequence_active:
             return
 
-        elapsed = time.time() - self.last_menu_activation_time
+        elapsed = self.clock.now() - self.last_menu_activation_time
         if not self.menu_esc_pressed:
-            keyboard.press('esc')
+            # Held for 100 ms, released by the dispatcher
+            self.input.tap('esc', 100)
             self.menu_esc_pressed = True
 
         if elapsed >= 0.1:
-            keyboard.release('esc')
             self.menu_sequence_active = False
             print("Menu Sequence Ended")
 
@@ -348,50 +3517,49 @@ class SimpleTrackingApp:
         PitchOffset = RollOffset = YawOffset = XOffset = YOffset = ZOffset = 0.0
 
     def handle_manual_offsets(self):
-        global PitchOffset, RollOffset, YawOffset, XOffset, YOffset, ZOffset
-        is_x_down = keyboard.is_pressed('x')
-        if is_x_down and not self.x_was_pressed:
-            current_time = time.time()
-            if current_time - self.last_x_press_time < 1.0:
+        """ Double tap X within a second to reset the offsets. Goes by the press times from the key hook. """
+        keys = self.keys
+        keys.poll()
+        edges = keys.edges
+        while edges:
+            press_time, key, pressed = edges.popleft()
+            if key != 'x' or not pressed:
+                continue
+            if press_time - self.last_x_press_time < 1.0:
                 self.reset_offsets()
-                self.last_x_press_time = 0
+                self.last_x_press_time = float('-inf')
             else:
-                self.last_x_press_time = current_time
-        self.x_was_pressed = is_x_down
+                self.last_x_press_time = press_time
+        self.x_was_pressed = keys.down['x']
 
     def update_encoded_filename(self, dt):
         """
-        Calculates values for both controllers and writes to the filename.
-        Format: iX_iY_iZ_iXr_iYr_iZr_pXr_iX2_iY2_iZ2_iXr2_iYr2_iZr2
+        Calculates values for both controllers and publishes them on the output channel.
+        Format: iX_iY_iZ_iXr_iYr_iZr_pXr_iX2_iY2_iZ2_iXr2_iYr2_iZr2, then valid_iX_iY_iZ_iXr_iYr_iZr per tracker slot
+        Scaling and axis mapping to game values come from the active CalibrationProfile.
         """
         try:
-            # --- 1. Primary Controller Calculation ---
             # NOTE: self.controller_pos/rot were already updated in run_loop before this call
+            calibration = self.calibration
+            raw = self.calibration_raw
+            raw[0, 0], raw[0, 1], raw[0, 2] = self.controller_pos
+            raw[0, 3], raw[0, 4], raw[0, 5] = self.controller_rot
+            raw[1, 0], raw[1, 1], raw[1, 2] = self.secondary_controller_pos
+            raw[1, 3], raw[1, 4], raw[1, 5] = self.secondary_controller_rot
+            if self.tracker_slots:
+                raw[2:] = self.tracker_values
 
             # Holster Cutoff Check (Done before transform, specific to Primary)
-            iX_raw, iY_raw, iZ_raw = self.controller_pos
-            iXr_raw, iYr_raw, iZr_raw = self.controller_rot
-
-            if iZ_raw < self.holster_cutoff:
-                # Apply holster static values
-                iX_raw, iY_raw, iZ_raw = -0.4, 0.1, -0.17
-                iXr_raw, iYr_raw, iZr_raw = 5.0, 40.0, 0.0
-
-            # Primary Transformations
-            adj_X = (iX_raw * 85) + XOffset - 2
-            adj_Y = (iY_raw * 45) + YOffset - 0
-            adj_Z = (iZ_raw * 70) + ZOffset - 5.42
-            adj_Pitch = iYr_raw + PitchOffset - 4
-            adj_Yaw = iXr_raw + YawOffset + 4
-            adj_Roll = iZr_raw + RollOffset
-
-            # Swizzle for game engine
-            p_iX = adj_Y
-            p_iY = (adj_X * -1) - 10
-            p_iZ = adj_Z
-            p_iXr = adj_Pitch - 60
-            p_iYr = adj_Roll
-            p_iZr = adj_Yaw - 10
+            if raw[0, 2] < self.holster_cutoff:
+                raw[0] = calibration.holster_pose
+
+            # Manual offsets only move the primary, the secondary row stays zero
+            offsets = self.calibration_offsets
+            offsets[0, 0], offsets[0, 1], offsets[0, 2] = XOffset, YOffset, ZOffset
+            offsets[0, 3], offsets[0, 4], offsets[0, 5] = YawOffset, PitchOffset, RollOffset
+
+            # Both controllers in one go
+            game = calibration.apply(raw, offsets)
 
             # Pipboy Override (pXr)
             target_fpXr = self.fpXr_override
@@ -399,169 +3567,441 @@ class SimpleTrackingApp:
             self.fpXr_current += (target_fpXr - self.fpXr_current) * lerp_step
 
             # Update internal tracking for calculated secondary vals (used just for reference)
-            target_fpZr = (adj_Pitch * 1.25) + 2
+            target_fpZr = (calibration.adjusted.item(0, 4) * 1.25) + 2
             self.fpZr_current += (target_fpZr - self.fpZr_current) * lerp_step
 
-            # --- 2. Secondary Controller Calculation ---
-            sX_raw, sY_raw, sZ_raw = self.secondary_controller_pos
-            sXr_raw, sYr_raw, sZr_raw = self.secondary_controller_rot
-
-            # Secondary Transformations
-            # Apply same constant world offsets and scaling, but ignore dynamic manual offsets (XOffset etc)
-            s_adj_X = (sX_raw * 85) - 2
-            s_adj_Y = (sY_raw * 45) - 0
-            s_adj_Z = (sZ_raw * 70) - 5.42
-            s_adj_Pitch = sYr_raw - 4
-            s_adj_Yaw = sXr_raw + 4
-            s_adj_Roll = sZr_raw
-
-            # Swizzle for game engine
-            s_iX = s_adj_Y
-            s_iY = (s_adj_X * -1) - 10
-            s_iZ = s_adj_Z
-            s_iXr = s_adj_Pitch - 60
-            s_iYr = s_adj_Roll
-            s_iZr = s_adj_Yaw - 10
-
-            # --- 3. Construct Output List ---
-            output_values = [
-                p_iX, p_iY, p_iZ, p_iXr, p_iYr, p_iZr,  # Primary
-                self.fpXr_current,  # Pipboy Trigger
-                s_iX, s_iY, s_iZ, s_iXr, s_iYr, s_iZr  # Secondary
-            ]
-
-            encoded_name = "_".join([f"{v:.2f}" for v in output_values])
-
-            if not os.path.exists(self.test_dir):
-                return
-
-            files = os.listdir(self.test_dir)
-            if not files:
-                with open(os.path.join(self.test_dir, encoded_name), 'w') as f:
-                    f.write("VR")
-            else:
-                old_path = os.path.join(self.test_dir, files[0])
-                new_path = os.path.join(self.test_dir, encoded_name)
-                if old_path != new_path: os.rename(old_path, new_path)
+            # --- Fill Output Buffer (reused every tick) ---
+            out = self.output_values
+            # Primary
+            out[0:6] = game[0]
+            # Pipboy Trigger
+            out[6] = self.fpXr_current
+            # Secondary
+            out[7:13] = game[1]
+            # Tracker blocks: valid flag, then the values (zeros while the tracker is missing)
+            if self.tracker_slots:
+                blocks = self.tracker_blocks
+                blocks[:, 0] = self.tracker_valid
+                values = blocks[:, 1:]
+                np.multiply(game[2:], self.tracker_mask, out=values)
+                # Adding 0.0 turns the -0.0s of masked negative values into 0.0, so they encode as 0.00
+                values += 0.0
+
+            if not self.output_channel.publish(out, self.last_time):
+                self.profiler.error("output_unavailable")
+            # UDP consumers get every frame, dedup only applies to the game channel
+            udp = self.udp_publisher
+            if udp is not None:
+                udp.publish(out, self.last_time)
         except Exception as e:
-            # Fail silently to avoid crashing thread on file IO race conditions
-            pass
+            # Don't crash the thread on file IO race conditions, but keep count of them
+            self.profiler.error("output", e)
+
+    def tick(self):
+        """ Runs one iteration of the tracking pipeline. Returns False once the pose source has run dry. """
+        current_time = self.clock.now()
+        dt = current_time - self.last_time
+        self.last_time = current_time
+        profiler = self.profiler
+        profiler.begin()
+
+        self.handle_manual_offsets()
+        self.update_pipboy_logic()
+        self.update_menu_logic()
+        profiler.lap("input")
+
+        if self.pose_source.poll_device_changes():
+            self.find_controllers()
+        poses = self.pose_source.get_poses(self.prediction_ms / 1000.0)
+        if poses is None:
+            return False
+        profiler.lap("poll")
+
+        # HMD + every controller in one batched pass. Row k + 1 of the batch is self.controllers[k].
+        batch = self.pose_batch
+        hmd_valid = batch.update(poses, self.extrapolation_ms / 1000.0)
+        profiler.lap("transform")
+        output_sent = False
+        skip_row = None
+        if hmd_valid:
+            # Every controller row through the jitter filter at once
+            pose_filter = self.pose_filter
+            if pose_filter is not None:
+                n = batch.count
+                pose_filter.apply(batch.pose6[1:n, :3], batch.quat[1:n], batch.valid[1:n], dt)
+            profiler.lap("filter")
+            # The only place rotations become Euler angles, after filtering and for the output only
+            batch.encode_angles()
+            profiler.lap("encode")
+
+            # Lists are updated in place so the steady state loop doesn't allocate
+            world, euler, pose6 = batch.world, batch.euler, batch.pose6
+            hmd_pos, hmd_rot = self.hmd_pos, self.hmd_rot
+            hmd_pos[0], hmd_pos[1], hmd_pos[2] = world.item(0, 0, 3), world.item(0, 1, 3), world.item(0, 2, 3)
+            hmd_rot[0], hmd_rot[1], hmd_rot[2] = euler.item(0, 0), euler.item(0, 1), euler.item(0, 2)
+
+            # --- Primary Controller ---
+            c_row = self.active_controller_idx + 1 if 0 <= self.active_controller_idx < len(
+                self.controllers) else None
+            c_valid = c_row is not None and batch.valid[c_row]
+
+            if c_valid:
+                pos, rot = self.controller_pos, self.controller_rot
+                pos[0], pos[1], pos[2] = pose6.item(c_row, 2), pose6.item(c_row, 0), pose6.item(c_row, 1)
+                rot[0] = pose6.item(c_row, 3)
+                rot[1] = pose6.item(c_row, 4) + 45.0
+                rot[2] = pose6.item(c_row, 5)
+
+                # Offset Logic
+                if self.keys.down['x']:
+                    anchor = self.anchor_vals
+                    if self.anchor_active:
+                        global XOffset, YOffset, ZOffset, YawOffset, PitchOffset, RollOffset
+                        XOffset += (pos[0] - anchor[0]) * 100
+                        YOffset += (pos[1] - anchor[1]) * 100
+                        ZOffset += (pos[2] - anchor[2]) * 100
+                        YawOffset += (rot[0] - anchor[3])
+                        PitchOffset += (rot[1] - anchor[4])
+                        RollOffset += (rot[2] - anchor[5])
+                    anchor[0], anchor[1], anchor[2] = pos
+                    anchor[3], anchor[4], anchor[5] = rot
+                    self.anchor_active = True
+                else:
+                    self.anchor_active = False
 
-    def get_relative_transform(self, hmd_matrix_inv, device_pose):
-        dev_m = get_pose_matrix(device_pose)
-        rel_m = hmd_matrix_inv @ dev_m
-        rel_pos = rel_m[:3, 3]
-        euler_angles = rotation_matrix_to_euler_angles(rel_m[:3, :3])
-        rel_rot = [euler_angles[1], euler_angles[0], euler_angles[2]]
-        return rel_pos, rel_rot
-
-    def apply_roll_correction(self, yaw, pitch, roll):
-        p_adj = pitch - 45.0
-        y_adj = yaw
-        rad_roll = math.radians(roll)
-        cos_r = math.cos(rad_roll)
-        sin_r = math.sin(rad_roll)
-        p_new = (p_adj * cos_r) - (y_adj * sin_r)
-        y_new = (p_adj * sin_r) + (y_adj * cos_r)
-        return y_new, p_new, roll
+                # A holstered controller doesn't keep the loop from idling
+                if pos[2] < self.holster_cutoff:
+                    skip_row = c_row
+
+            # --- Secondary Controller ---
+            s_row = self.secondary_controller_idx + 1 if 0 <= self.secondary_controller_idx < len(
+                self.controllers) else None
+
+            pos, rot = self.secondary_controller_pos, self.secondary_controller_rot
+            if s_row is not None and batch.valid[s_row]:
+                pos[0], pos[1], pos[2] = pose6.item(s_row, 2), pose6.item(s_row, 0), pose6.item(s_row, 1)
+                rot[0], rot[1], rot[2] = pose6.item(s_row, 3), pose6.item(s_row, 4), pose6.item(s_row, 5)
+                self.secondary_controller_quat[:] = batch.quat[s_row]
+
+                self.check_gestures()
+            else:
+                pos[0] = pos[1] = pos[2] = 0.0
+                rot[0] = rot[1] = rot[2] = 0.0
+                self.secondary_controller_quat[:] = QUAT_IDENTITY
+                # Nothing matches without a secondary, held keys are let go after the exit dwell
+                self.check_gestures(tracked=False)
+            # Both controllers: offset drag and gestures, with or without a secondary
+            profiler.lap("gestures")
+
+            # --- Body Trackers ---
+            if self.tracker_slots:
+                self.update_trackers(batch)
+
+            # Update File with both controllers data
+            if c_valid:
+                self.update_encoded_filename(dt)
+                output_sent = True
+                profiler.lap("output")
+
+            self.publish_snapshot()
+            if self.gui_callback: self.gui_callback()
+            profiler.lap("snapshot")
+
+        recorder = self.session_recorder
+        if recorder is not None:
+            recorder.record(self, poses, output_sent)
+            profiler.lap("record")
+
+        adaptive = self.adaptive_rate
+        if adaptive is not None:
+            busy = (self.gesture_sequence_active or self.menu_sequence_active or self.x_was_pressed
+                    or self.gesture_active_type != "NONE" or self.gesture_engine.pending)
+            idle_rate = adaptive.update(current_time, batch, hmd_valid, skip_row, busy)
+            if (idle_rate is None) != (self.scheduler.idle_period is None):
+                self.scheduler.set_idle(idle_rate)
+
+        # Headless runs have no dispatcher thread, so queued key events go out here
+        if not self.input.running:
+            self.input.pump()
+        profiler.end()
+        return True
+
+    def publish_snapshot(self):
+        self.tick_count += 1
+        # Copied into preallocated slots, readers on other threads build their FrameSnapshot from them
+        self.snapshots.write(self)
+        ring = self.snapshot_ring
+        if ring is not None:
+            ring.write(self)
+
+    @property
+    def snapshot(self):
+        """ FrameSnapshot of the newest tick, the same object until the next one. None before the first tick. """
+        count = self.snapshots.written()
+        if count != self._snapshot_count:
+            self._snapshot = self.snapshots.read()
+            self._snapshot_count = count
+        return self._snapshot
 
     def run_loop(self):
+        self.scheduler.start()
         while self.running:
-            current_time = time.time()
-            dt = current_time - self.last_time
-            self.last_time = current_time
-
-            self.handle_manual_offsets()
-            self.update_pipboy_logic()
-            self.update_menu_logic()
-
-            poses = (openvr.TrackedDevicePose_t * openvr.k_unMaxTrackedDeviceCount)()
-            self.vr_system.getDeviceToAbsoluteTrackingPose(openvr.TrackingUniverseStanding, 0.0, poses)
-            h_pose = poses[openvr.k_unTrackedDeviceIndex_Hmd]
-
-            if h_pose and h_pose.bPoseIsValid:
-                h_m = get_pose_matrix(h_pose)
-                self.hmd_pos = list(h_m[:3, 3])
-                h_euler = rotation_matrix_to_euler_angles(h_m[:3, :3])
-                self.hmd_rot = [h_euler[0], h_euler[1], h_euler[2]]
-
-                h_m_inv = np.linalg.inv(h_m)
-
-                # --- Primary Controller ---
-                c_idx = self.controllers[self.active_controller_idx]['index'] if self.controllers else None
-                c_pose = poses[c_idx] if c_idx is not None else None
-
-                if c_pose and c_pose.bPoseIsValid:
-                    rel_pos_vec, rel_rot_vec = self.get_relative_transform(h_m_inv, c_pose)
-                    self.controller_pos = [rel_pos_vec[2], rel_pos_vec[0], rel_pos_vec[1]]
-
-                    raw_y, raw_p, raw_r = rel_rot_vec
-                    adj_y, adj_p, adj_r = self.apply_roll_correction(raw_y, raw_p, raw_r)
-                    adj_p += 45.0
-                    self.controller_rot = [adj_y, adj_p, adj_r]
-
-                    # Offset Logic
-                    if keyboard.is_pressed('x'):
-                        if self.anchor_vals is None:
-                            self.anchor_vals = {
-                                "iX": self.controller_pos[0], "iY": self.controller_pos[1],
-                                "iZ": self.controller_pos[2],
-                                "iXr": self.controller_rot[0], "iYr": self.controller_rot[1],
-                                "iZr": self.controller_rot[2]
-                            }
-                        else:
-                            global XOffset, YOffset, ZOffset, YawOffset, PitchOffset, RollOffset
-                            XOffset += (self.controller_pos[0] - self.anchor_vals["iX"]) * 100
-                            YOffset += (self.controller_pos[1] - self.anchor_vals["iY"]) * 100
-                            ZOffset += (self.controller_pos[2] - self.anchor_vals["iZ"]) * 100
-                            YawOffset += (self.controller_rot[0] - self.anchor_vals["iXr"])
-                            PitchOffset += (self.controller_rot[1] - self.anchor_vals["iYr"])
-                            RollOffset += (self.controller_rot[2] - self.anchor_vals["iZr"])
-                            self.anchor_vals = {
-                                "iX": self.controller_pos[0], "iY": self.controller_pos[1],
-                                "iZ": self.controller_pos[2],
-                                "iXr": self.controller_rot[0], "iYr": self.controller_rot[1],
-                                "iZr": self.controller_rot[2]
-                            }
-                    else:
-                        self.anchor_vals = None
-
-                # --- Secondary Controller ---
-                s_idx = self.controllers[self.secondary_controller_idx][
-                    'index'] if 0 <= self.secondary_controller_idx < len(self.controllers) else None
-                s_pose = poses[s_idx] if s_idx is not None else None
-
-                if s_pose and s_pose.bPoseIsValid:
-                    rel_pos_vec_s, rel_rot_vec_s = self.get_relative_transform(h_m_inv, s_pose)
-                    self.secondary_controller_pos = [rel_pos_vec_s[2], rel_pos_vec_s[0], rel_pos_vec_s[1]]
-
-                    s_raw_y, s_raw_p, s_raw_r = rel_rot_vec_s
-                    s_adj_y, s_adj_p, s_adj_r = self.apply_roll_correction(s_raw_y, s_raw_p, s_raw_r)
-                    self.secondary_controller_rot = [s_adj_y, s_adj_p, s_adj_r]
-
-                    self.check_gestures()
-                else:
-                    self.secondary_controller_pos, self.secondary_controller_rot = [0, 0, 0], [0, 0, 0]
-                    self.gesture_active_type = "NONE"
-
-                # Update File with both controllers data
-                if c_pose and c_pose.bPoseIsValid:
-                    self.update_encoded_filename(dt)
+            if not self.tick():
+                self.running = False
+                break
+            self.scheduler.wait()
 
-                if self.gui_callback: self.gui_callback()
-            time.sleep(0.01)
+    def run_headless(self, max_ticks=None):
+        """
+        Drives the loop on the calling thread, no GUI or worker thread needed.
+        Pair with SimulatedClock and a replay/synthetic pose source to run faster than real time.
+        Returns the number of ticks processed.
+        """
+        self.running = True
+        ticks = 0
+        self.scheduler.start()
+        while self.running and (max_ticks is None or ticks < max_ticks):
+            if not self.tick():
+                break
+            ticks += 1
+            self.scheduler.wait()
+        self.running = False
+        return ticks
 
     def start(self):
+        if self.thread is not None and self.thread.is_alive():
+            return
         self.running = True
+        self.input.start()
+        self.keys.start()
         self.thread = threading.Thread(target=self.run_loop, daemon=True)
         self.thread.start()
 
     def stop(self):
         self.running = False
+        # Let the loop finish its current tick, so no gesture presses a key after the releases below
+        thread = self.thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+        # Queued before the dispatcher stops, so its final flush sends the releases too
+        self.release_gestures()
+        self.input.stop()
+        self.keys.stop()
+        self.stop_session_recording()
+
+    def close(self):
+        """ Stops tracking and lets go of the pose source and the outputs, when the program exits. """
+        self.stop()
+        self.pose_source.close()
+        self.close_outputs()
+
+    def start_session_recording(self, path, **options):
+        """ Logs every tick to a binary session file until stop_session_recording(). See SessionRecorder. """
+        self.stop_session_recording()
+        info = {"tick_rate": self.tick_rate, "pose_filter": self.pose_filter_name,
+                "output_channel": self.output_channel_name, "tracker_slots": self.tracker_slots}
+        options.setdefault("slots", max(SESSION_DEVICE_SLOTS, 1 + len(self.controllers) + len(self.trackers)))
+        self.session_recorder = SessionRecorder(path, self.controllers, self.trackers,
+                                                values=len(self.output_values), info=info, **options)
+
+    def stop_session_recording(self):
+        recorder = self.session_recorder
+        if recorder is not None:
+            # Detach first so the loop stops feeding it
+            self.session_recorder = None
+            recorder.close()
+            return recorder.stats()
+        return None
+
+    def get_session_stats(self):
+        recorder = self.session_recorder
+        return recorder.stats() if recorder is not None else {}
+
+
+def process_error(e):
+    """ Exceptions go back to the GUI process as they are, unless they can't be pickled. """
+    if isinstance(e, (OSError, ValueError, KeyError, TypeError)):
+        return e
+    return RuntimeError(f"{type(e).__name__}: {e}")
+
+
+def run_tracker_process(conn, ring_name, config_file, source=None):
+    """
+    Entry point of the tracker process (see TrackerProcess). Builds the app, then serves commands from the
+    GUI until it says "close" or goes away. The main thread sleeps in recv(), so the tracking thread has
+    the interpreter to itself between commands.
+    """
+    ring = None
+    try:
+        clock = SystemClock()
+        app_options = {"config_file": config_file, "clock": clock}
+        if source is not None:
+            kind, arg = source
+            app_options["pose_source"] = (open_recording(arg) if kind == "replay"
+                                          else SyntheticPoseSource(clock, duration=arg))
+        app = SimpleTrackingApp(**app_options)
+        ring = SnapshotRing(ring_name)
+        app.snapshot_ring = ring
+    except Exception as e:
+        conn.send((None, {}, process_error(e)))
+        if ring is not None:
+            ring.close()
+        return
+    conn.send((None, TrackerProcess.mirror(app), None))
+
+    while True:
+        try:
+            name, args = conn.recv()
+        except (EOFError, OSError):
+            break
+        if name == "close":
+            break
+        result, error = None, None
+        try:
+            if name == "live_stats":
+                result = {"timing": app.get_timing_stats(), "output": app.get_output_stats(),
+                          "udp": app.get_udp_stats(), "session": app.get_session_stats(),
+                          "idle": app.get_idle_stats()}
+            else:
+                result = getattr(app, name)(*args)
+        except Exception as e:
+            error = process_error(e)
+        conn.send((result, TrackerProcess.mirror(app), error))
+
+    app.snapshot_ring = None
+    app.close()
+    ring.close()
+    conn.close()
+
+
+class TrackerProcess:
+    """
+    Runs SimpleTrackingApp in a process of its own and stands in for it in TrackerGUI, so redraws,
+    window drags and file dialogs never hold the GIL the tracking loop needs.
+
+    - Snapshots come through a SnapshotRing in shared memory; reading one never talks to the tracker.
+    - Commands (cycle controller, set target, reset offsets, sensitivity, ...) go over a pipe as
+      (method, args). Each reply carries the result and a copy of the MIRRORED settings, which is what
+      the GUI reads back as attributes.
+    - Loop stats are fetched in one round trip at most every PROCESS_STATS_INTERVAL.
+
+    The pose source is built inside the tracker process: source is None for SteamVR, ("replay", path)
+    or ("synthetic", seconds).
+    """
+
+    MIRRORED = ("game_dir", "tick_rate", "display_rate", "udp_publish", "udp_targets", "gesture_bank",
+                "holster_cutoff", "prediction_ms", "extrapolation_ms", "pos_sensitivity", "rot_sensitivity",
+                "pose_filter_name", "calibration_name", "controllers", "active_controller_idx",
+                "secondary_controller_idx", "devices_version", "tracker_slots", "tracker_bound",
+                "activation_duration", "cooldown_period")
+    REMOTE = ("start", "stop", "save_config", "set_game_directory", "set_tick_rate", "set_input_settings",
+              "set_pose_filter", "set_calibration_profile", "get_calibration_profiles", "set_gesture_bank",
+              "get_gesture_banks", "add_gesture", "set_target_from_secondary", "reset_target", "reset_offsets",
+              "cycle_controller", "cycle_secondary_controller", "set_udp_publish", "start_session_recording",
+              "stop_session_recording", "export_stats_csv")
+
+    def __init__(self, config_file=CONFIG_FILE, source=None):
+        self.state = {}
+        self.ring = SnapshotRing()
+        # Only the GUI's own timings live here, the loop's come from the tracker process
+        self.profiler = StageProfiler()
+        self.lock = threading.Lock()
+        self.live = {}
+        self.live_time = 0.0
+        self.last_snapshot = None
+        context = multiprocessing.get_context("spawn")
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=run_tracker_process, name="fnvr-tracker", daemon=True,
+                                       args=(child_conn, self.ring.name, config_file, source))
+        self.process.start()
+        child_conn.close()
+        _, state, error = self.conn.recv()
+        if error is not None:
+            self.process.join()
+            self.ring.close()
+            raise error
+        self.state = state
+
+    @staticmethod
+    def mirror(app):
+        state = {name: getattr(app, name) for name in TrackerProcess.MIRRORED}
+        state["tracker_bound"] = state["tracker_bound"].tolist()
+        return state
+
+    def __getattr__(self, name):
+        # Only called for names not set on the instance
+        if name in TrackerProcess.MIRRORED:
+            return self.__dict__["state"][name]
+        if name in TrackerProcess.REMOTE:
+            return lambda *args: self.call(name, *args)
+        raise AttributeError(name)
+
+    def call(self, name, *args):
+        if name != "live_stats":
+            # Whatever the command changed shows up in the next stats
+            self.live_time = 0.0
+        with self.lock:
+            self.conn.send((name, args))
+            result, state, error = self.conn.recv()
+        self.state = state
+        if error is not None:
+            raise error
+        return result
+
+    def live_stats(self):
+        now = time.perf_counter()
+        if now - self.live_time >= PROCESS_STATS_INTERVAL:
+            self.live = self.call("live_stats")
+            self.live_time = now
+        return self.live
+
+    def get_timing_stats(self):
+        return self.live_stats()["timing"]
+
+    def get_output_stats(self):
+        return self.live_stats()["output"]
+
+    def get_udp_stats(self):
+        return self.live_stats()["udp"]
+
+    def get_session_stats(self):
+        return self.live_stats()["session"]
+
+    def get_idle_stats(self):
+        return self.live_stats()["idle"]
+
+    def get_stage_stats(self):
+        stats = self.call("get_stage_stats")
+        stats["stages"].update(self.profiler.stats()["stages"])
+        return stats
+
+    @property
+    def snapshot(self):
+        snap = self.ring.read()
+        # Same object while the tick hasn't moved, like SimpleTrackingApp.snapshot
+        if snap is not None and self.last_snapshot is not None and snap.tick == self.last_snapshot.tick:
+            return self.last_snapshot
+        self.last_snapshot = snap
+        return snap
+
+    def close(self):
+        if self.conn.closed:
+            return
+        if self.process.is_alive():
+            try:
+                with self.lock:
+                    self.conn.send(("close", ()))
+            except OSError:
+                pass
+            self.process.join(5.0)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.conn.close()
+        self.ring.close()
 
 
 class TrackerGUI:
-    def __init__(self, root):
+    def __init__(self, root, app=None, **app_options):
         self.root = root
         self.root.title("FNV VR Tracker Configurator")
         self.root.geometry("1040x800")
@@ -581,7 +4021,12 @@ class TrackerGUI:
         self.scroll_frame = ttk.Frame(canvas)
         canvas.create_window((0, 0), window=self.scroll_frame, anchor="nw")
 
-        self.app = SimpleTrackingApp(gui_callback=self.update_display)
+        # A TrackerProcess when the loop runs in its own process
+        self.app = app if app is not None else SimpleTrackingApp(**app_options)
+        self.label_text = {}
+        self.last_snapshot = None
+        self.devices_version = -1
+        self.last_profile_draw = 0.0
 
         # --- LAYOUT COLUMNS ---
         self.left_column = ttk.Frame(self.scroll_frame)
@@ -617,6 +4062,43 @@ class TrackerGUI:
         self.controller_label.pack(anchor=tk.W)
         self.sec_controller_label = ttk.Label(status_frame, text="Secondary (Trigger): None")
         self.sec_controller_label.pack(anchor=tk.W)
+        self.trackers_label = ttk.Label(status_frame, text="Trackers: none configured")
+        self.trackers_label.pack(anchor=tk.W)
+
+        rate_row = ttk.Frame(status_frame)
+        rate_row.pack(anchor=tk.W, pady=(5, 0))
+        ttk.Label(rate_row, text="Tick Rate (Hz):").pack(side=tk.LEFT)
+        self.rate_combo = ttk.Combobox(rate_row, width=6, values=[str(r) for r in TICK_RATE_CHOICES])
+        self.rate_combo.set(str(self.app.tick_rate))
+        self.rate_combo.pack(side=tk.LEFT, padx=5)
+        self.rate_combo.bind("<<ComboboxSelected>>", self.update_tick_rate)
+        self.rate_combo.bind("<FocusOut>", self.update_tick_rate)
+        self.timing_label = ttk.Label(status_frame, text="Loop: -- Hz")
+        self.timing_label.pack(anchor=tk.W)
+        self.output_stats_label = ttk.Label(status_frame, text="Output: --")
+        self.output_stats_label.pack(anchor=tk.W)
+        udp_row = ttk.Frame(status_frame)
+        udp_row.pack(anchor=tk.W)
+        self.udp_var = tk.BooleanVar(value=self.app.udp_publish)
+        ttk.Checkbutton(udp_row, text="UDP frames to " + ", ".join(self.app.udp_targets), variable=self.udp_var,
+                        command=self.toggle_udp).pack(side=tk.LEFT)
+        self.udp_label = ttk.Label(udp_row, text="")
+        self.udp_label.pack(side=tk.LEFT, padx=5)
+
+        # Tick Profile Section
+        profile_frame = ttk.LabelFrame(self.left_column, text="Tick Profile (last 1024 ticks)", padding="10")
+        profile_frame.pack(fill=tk.X, padx=10, pady=2)
+        self.profile_label = ttk.Label(profile_frame, text="No ticks yet", font=("Courier", 8), justify=tk.LEFT)
+        self.profile_label.pack(anchor=tk.W)
+        self.errors_label = ttk.Label(profile_frame, text="Errors: none", foreground="gray")
+        self.errors_label.pack(anchor=tk.W)
+        profile_buttons = ttk.Frame(profile_frame)
+        profile_buttons.pack(anchor=tk.W, pady=(5, 0))
+        ttk.Button(profile_buttons, text="Export CSV", command=self.export_stats).pack(side=tk.LEFT)
+        self.record_button = ttk.Button(profile_buttons, text="Record Session", command=self.toggle_recording)
+        self.record_button.pack(side=tk.LEFT, padx=5)
+        self.session_label = ttk.Label(profile_frame, text="", foreground="gray")
+        self.session_label.pack(anchor=tk.W)
 
         # HMD Section
         hmd_frame = ttk.LabelFrame(self.left_column, text="HMD Info (World Space)", padding="10")
@@ -708,6 +4190,27 @@ class TrackerGUI:
         create_config_row(gesture_frame, "Hotkey 7:", "7")
         create_config_row(gesture_frame, "Hotkey 8:", "8")
 
+        # Custom gestures live in banks; only the active bank (plus the gestures above) can trigger
+        custom_frame = ttk.Frame(gesture_frame)
+        custom_frame.pack(fill=tk.X, pady=(10, 2))
+        ttk.Label(custom_frame, text="Custom:", width=15, font=("Arial", 9, "bold")).grid(row=0, column=0, sticky=tk.W)
+        ttk.Label(custom_frame, text="Name").grid(row=0, column=1)
+        ttk.Label(custom_frame, text="Key").grid(row=0, column=2)
+        ttk.Label(custom_frame, text="Bank").grid(row=0, column=3)
+        self.custom_name_entry = ttk.Entry(custom_frame, width=10)
+        self.custom_name_entry.grid(row=1, column=1, padx=2)
+        self.custom_key_entry = ttk.Entry(custom_frame, width=6)
+        self.custom_key_entry.grid(row=1, column=2, padx=2)
+        self.custom_bank_entry = ttk.Entry(custom_frame, width=8)
+        self.custom_bank_entry.grid(row=1, column=3, padx=2)
+        ttk.Button(custom_frame, text="Set Current", command=self.add_custom_gesture).grid(row=1, column=4, padx=2)
+
+        ttk.Label(custom_frame, text="Active Bank:").grid(row=2, column=0, sticky=tk.W, pady=(5, 0))
+        self.bank_combo = ttk.Combobox(custom_frame, width=10, values=[""] + self.app.get_gesture_banks())
+        self.bank_combo.set(self.app.gesture_bank or "")
+        self.bank_combo.grid(row=2, column=1, columnspan=2, sticky=tk.W, pady=(5, 0))
+        self.bank_combo.bind("<<ComboboxSelected>>", lambda _: self.app.set_gesture_bank(self.bank_combo.get()))
+
         self.gesture_status_indicator = tk.Label(gesture_frame, text="GESTURE INACTIVE", bg="red", fg="white",
                                                  font=("Arial", 12, "bold"))
         self.gesture_status_indicator.pack(fill=tk.X, pady=10)
@@ -750,21 +4253,103 @@ class TrackerGUI:
 
         ttk.Button(input_container, text="Reset", command=self.reset_holster).grid(row=4, column=2, padx=5)
 
+        ttk.Label(input_container,
+                  text="Predict poses ahead to hide latency. OpenVR prediction is done by SteamVR, extrapolation pushes poses further along the controller's velocity. Too much overshoots on quick stops.",
+                  font=("Arial", 8, "italic"), foreground="gray", wraplength=450).grid(row=5, column=0, columnspan=3,
+                                                                                       sticky=tk.W, pady=(10, 5))
+
+        ttk.Label(input_container, text="OpenVR Prediction (ms):").grid(row=6, column=0, sticky=tk.W, padx=5)
+        self.prediction_entry = ttk.Entry(input_container, width=8)
+        self.prediction_entry.insert(0, str(self.app.prediction_ms))
+        self.prediction_entry.grid(row=6, column=1, sticky=tk.W, pady=2)
+        self.prediction_entry.bind("<FocusOut>", self.update_sensitivity)
+
+        ttk.Label(input_container, text="Extrapolation (ms):").grid(row=7, column=0, sticky=tk.W, padx=5)
+        self.extrapolation_entry = ttk.Entry(input_container, width=8)
+        self.extrapolation_entry.insert(0, str(self.app.extrapolation_ms))
+        self.extrapolation_entry.grid(row=7, column=1, sticky=tk.W, pady=2)
+        self.extrapolation_entry.bind("<FocusOut>", self.update_sensitivity)
+
+        ttk.Label(input_container,
+                  text="Smooth out controller jitter. One Euro barely smooths fast moves so it adds little lag, Kalman follows a constant velocity model. Parameters are in fnvr_config.txt.",
+                  font=("Arial", 8, "italic"), foreground="gray", wraplength=450).grid(row=8, column=0, columnspan=3,
+                                                                                       sticky=tk.W, pady=(10, 5))
+
+        ttk.Label(input_container, text="Jitter Filter:").grid(row=9, column=0, sticky=tk.W, padx=5)
+        self.filter_combo = ttk.Combobox(input_container, width=10, values=list(POSE_FILTERS), state="readonly")
+        self.filter_combo.set(self.app.pose_filter_name)
+        self.filter_combo.grid(row=9, column=1, sticky=tk.W, pady=2)
+        self.filter_combo.bind("<<ComboboxSelected>>", lambda _: self.app.set_pose_filter(self.filter_combo.get()))
+
+        ttk.Label(input_container,
+                  text="How controller movement is scaled and mapped to the game's axes. Add profiles (e.g. per weapon) under \"calibration_profiles\" in fnvr_config.txt.",
+                  font=("Arial", 8, "italic"), foreground="gray", wraplength=450).grid(row=10, column=0, columnspan=3,
+                                                                                       sticky=tk.W, pady=(10, 5))
+
+        ttk.Label(input_container, text="Calibration Profile:").grid(row=11, column=0, sticky=tk.W, padx=5)
+        self.calibration_combo = ttk.Combobox(input_container, width=14, values=self.app.get_calibration_profiles(),
+                                              state="readonly")
+        self.calibration_combo.set(self.app.calibration_name)
+        self.calibration_combo.grid(row=11, column=1, sticky=tk.W, pady=2)
+        self.calibration_combo.bind("<<ComboboxSelected>>",
+                                    lambda _: self.app.set_calibration_profile(self.calibration_combo.get()))
+
+        # Labels are redrawn from the Tk thread, never from the tracking loop
+        self.schedule_display()
+
     def choose_directory(self):
         directory = filedialog.askdirectory()
         if directory:
             self.app.set_game_directory(directory)
             self.dir_label.config(text=f"Game Folder: {self.app.game_dir}")
 
+    def export_stats(self):
+        path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV", "*.csv")])
+        if path:
+            try:
+                self.app.export_stats_csv(path)
+            except OSError as e:
+                print(f"Stats Export Error: {e}")
+
+    def toggle_recording(self):
+        if self.app.get_session_stats():
+            stats = self.app.stop_session_recording()
+            self.record_button.config(text="Record Session")
+            self.set_label(self.session_label, f"Saved {stats['written']} ticks ({stats['bytes'] / 1e6:.1f} MB)")
+            return
+        path = filedialog.asksaveasfilename(defaultextension=".fnvr", filetypes=[("FNVR session", "*.fnvr")])
+        if path:
+            try:
+                self.app.start_session_recording(path)
+                self.record_button.config(text="Stop Recording")
+            except OSError as e:
+                print(f"Session Recording Error: {e}")
+
     def update_sensitivity(self, _=None):
         try:
-            self.app.pos_sensitivity = float(self.pos_entry.get())
-            self.app.rot_sensitivity = float(self.rot_entry.get())
+            self.app.set_input_settings(float(self.pos_entry.get()), float(self.rot_entry.get()),
+                                        float(self.cutoff_entry.get()), float(self.prediction_entry.get()),
+                                        float(self.extrapolation_entry.get()))
+        except ValueError:
+            pass
 
-            cutoff_val = float(self.cutoff_entry.get())
-            if self.app.holster_cutoff != cutoff_val:
-                self.app.holster_cutoff = cutoff_val
-                self.app.save_config()
+    def add_custom_gesture(self):
+        name = self.custom_name_entry.get().strip()
+        key = self.custom_key_entry.get().strip()
+        if name and key:
+            self.app.add_gesture(name, key, self.custom_bank_entry.get().strip() or None)
+            self.bank_combo.config(values=[""] + self.app.get_gesture_banks())
+
+    def toggle_udp(self):
+        self.app.set_udp_publish(self.udp_var.get())
+        active = bool(self.app.get_udp_stats())
+        self.udp_var.set(active)
+        if not active:
+            self.set_label(self.udp_label, "")
+
+    def update_tick_rate(self, _=None):
+        try:
+            self.app.set_tick_rate(float(self.rate_combo.get()))
         except ValueError:
             pass
 
@@ -805,56 +4390,205 @@ class TrackerGUI:
         self.app.reset_offsets()
 
     def update_controller_labels(self):
+        # The tracking thread can swap the controller list at any time, read it once
+        controllers = self.app.controllers
+        primary, secondary = self.app.active_controller_idx, self.app.secondary_controller_idx
+        self.devices_version = self.app.devices_version
+
         # Update Primary Info
-        if self.app.controllers:
-            act_data = self.app.controllers[self.app.active_controller_idx]
-            info_text = f"Index: {act_data['index']}"
+        if 0 <= primary < len(controllers):
+            info_text = f"Index: {controllers[primary]['index']}"
             self.controller_label.config(text=f"Primary (Data): {info_text}")
             self.primary_btn_label.config(text=info_text)
+        else:
+            self.controller_label.config(text="Primary (Data): Not connected")
+            self.primary_btn_label.config(text="None")
 
         # Update Secondary Info
-        if 0 <= self.app.secondary_controller_idx < len(self.app.controllers):
-            sec_data = self.app.controllers[self.app.secondary_controller_idx]
-            info_text = f"Index: {sec_data['index']}"
+        if 0 <= secondary < len(controllers):
+            info_text = f"Index: {controllers[secondary]['index']}"
             self.sec_controller_label.config(text=f"Secondary (Trigger): {info_text}")
             self.secondary_btn_label.config(text=info_text)
         else:
             self.secondary_btn_label.config(text="None")
 
+    def set_label(self, label, text, **options):
+        """ Only hands the label to Tk when its text or colours actually changed. """
+        state = (text, sorted(options.items()))
+        if self.label_text.get(label) != state:
+            self.label_text[label] = state
+            label.config(text=text, **options)
+
+    def schedule_display(self):
+        rate = self.app.display_rate if self.app.display_rate > 0 else DEFAULT_DISPLAY_RATE
+        self.root.after(max(1, int(1000 / rate)), self.update_display)
+
     def update_display(self):
-        self.hmd_pos_label.config(
-            text=f"Pos: X: {self.app.hmd_pos[0]:.2f} Y: {self.app.hmd_pos[1]:.2f} Z: {self.app.hmd_pos[2]:.2f}")
-        self.hmd_rot_label.config(
-            text=f"Rot: P: {self.app.hmd_rot[0]:.2f} Y: {self.app.hmd_rot[1]:.2f} R: {self.app.hmd_rot[2]:.2f}")
-        self.ctrl_pos_label.config(
-            text=f"Pos: X: {self.app.controller_pos[0]:.2f} Y: {self.app.controller_pos[1]:.2f} Z: {self.app.controller_pos[2]:.2f}")
-        self.ctrl_rot_label.config(
-            text=f"Rot: Y: {self.app.controller_rot[0]:.2f} P: {self.app.controller_rot[1]:.2f} R: {self.app.controller_rot[2]:.2f}")
-        self.sec_ctrl_pos_label.config(
-            text=f"Pos: X: {self.app.secondary_controller_pos[0]:.2f} Y: {self.app.secondary_controller_pos[1]:.2f} Z: {self.app.secondary_controller_pos[2]:.2f}")
-        self.sec_ctrl_rot_label.config(
-            text=f"Rot: Y: {self.app.secondary_controller_rot[0]:.2f} P: {self.app.secondary_controller_rot[1]:.2f} R: {self.app.secondary_controller_rot[2]:.2f}")
-        self.offset_pos_label.config(text=f"X: {XOffset:.2f} Y: {YOffset:.2f} Z: {ZOffset:.2f}")
-        self.offset_rot_label.config(text=f"P: {PitchOffset:.2f} R: {RollOffset:.2f} Y: {YawOffset:.2f}")
-
-        if self.app.gesture_sequence_active:
-            self.gesture_status_indicator.config(text="PIPBOY SEQ RUNNING", bg="blue", fg="white")
-        elif "HOLDING" in self.app.gesture_active_type:
-            self.gesture_status_indicator.config(text=self.app.gesture_active_type, bg="orange", fg="black")
-        elif "MATCHED" in self.app.gesture_active_type or "MENU" in self.app.gesture_active_type or "PIPBOY" in self.app.gesture_active_type:
-            self.gesture_status_indicator.config(text=f"{self.app.gesture_active_type} MATCHED", bg="green", fg="white")
+        """ Runs on the Tk thread at display_rate and draws the tracker's latest snapshot. """
+        start = time.perf_counter()
+        try:
+            self.draw_snapshot()
+            # Percentiles are the expensive part, twice a second is plenty
+            if start - self.last_profile_draw >= PROFILE_DISPLAY_INTERVAL:
+                self.last_profile_draw = start
+                self.draw_profile()
+        finally:
+            self.app.profiler.record("gui_draw", time.perf_counter() - start)
+            self.schedule_display()
+
+    def draw_profile(self):
+        stats = self.app.get_stage_stats()
+        lines = [f"{'stage':<10}{'p50':>8}{'p95':>8}{'p99':>8}{'max':>8}  (ms)"]
+        for name, s in stats["stages"].items():
+            if s["count"]:
+                lines.append(f"{name:<10}{s['p50_ms']:8.3f}{s['p95_ms']:8.3f}{s['p99_ms']:8.3f}{s['max_ms']:8.3f}")
+        if len(lines) > 1:
+            self.set_label(self.profile_label, "\n".join(lines))
+
+        if stats["errors"]:
+            text = "Errors: " + ", ".join(f"{name} {count}" for name, count in stats["errors"].items())
+            self.set_label(self.errors_label, text, foreground="red")
+
+        session = self.app.get_session_stats()
+        if session:
+            self.set_label(self.session_label, f"Recording: {session['records']} ticks, "
+                                               f"{session['bytes'] / 1e6:.1f} MB written")
+
+    def draw_snapshot(self):
+        timing = self.app.get_timing_stats()
+        text = (f"Loop: {timing['achieved_hz']:.1f} Hz  Late avg/max: {timing['avg_lateness_ms']:.2f}/"
+                f"{timing['max_lateness_ms']:.2f} ms  Missed: {timing['missed_deadlines']}")
+        idle = self.app.get_idle_stats()
+        if idle:
+            text += (f"\nIdle: {'yes' if idle['idle'] else 'no'}, {idle['idle_pct']:.0f}% of the time, "
+                     f"{idle['cpu_saved_s']:.1f}s CPU saved")
+        self.set_label(self.timing_label, text)
+        output = self.app.get_output_stats()
+        if output:
+            self.set_label(self.output_stats_label,
+                           f"Output: {output['published']} sent, {output['suppressed']} unchanged "
+                           f"({output['suppressed_pct']:.0f}% skipped)")
+        udp = self.app.get_udp_stats()
+        if udp:
+            self.set_label(self.udp_label, f"{udp['frames']} frames, {udp['dropped']} dropped")
+
+        # Controllers were plugged in, dropped out or changed role on the tracking thread
+        if self.app.devices_version != self.devices_version:
+            self.update_controller_labels()
+
+        snap = self.app.snapshot
+        if snap is None or snap is self.last_snapshot:
+            return
+        self.last_snapshot = snap
+
+        self.set_label(self.hmd_pos_label, "Pos: X: {:.2f} Y: {:.2f} Z: {:.2f}".format(*snap.hmd_pos))
+        self.set_label(self.hmd_rot_label, "Rot: P: {:.2f} Y: {:.2f} R: {:.2f}".format(*snap.hmd_rot))
+        self.set_label(self.ctrl_pos_label, "Pos: X: {:.2f} Y: {:.2f} Z: {:.2f}".format(*snap.controller_pos))
+        self.set_label(self.ctrl_rot_label, "Rot: Y: {:.2f} P: {:.2f} R: {:.2f}".format(*snap.controller_rot))
+        self.set_label(self.sec_ctrl_pos_label, "Pos: X: {:.2f} Y: {:.2f} Z: {:.2f}".format(*snap.secondary_pos))
+        self.set_label(self.sec_ctrl_rot_label, "Rot: Y: {:.2f} P: {:.2f} R: {:.2f}".format(*snap.secondary_rot))
+        self.set_label(self.offset_pos_label, "X: {:.2f} Y: {:.2f} Z: {:.2f}".format(*snap.offset_pos))
+        self.set_label(self.offset_rot_label, "P: {:.2f} R: {:.2f} Y: {:.2f}".format(*snap.offset_rot))
+
+        slots, bound = self.app.tracker_slots, self.app.tracker_bound
+        if slots:
+            states = ["ok" if valid else "lost" if bound[k] else "not found" for k, valid in enumerate(snap.tracker_valid)]
+            self.set_label(self.trackers_label,
+                           "Trackers: " + ", ".join(f"{slot} {state}" for slot, state in zip(slots, states)))
+
+        active_type = snap.gesture_active_type
+        if snap.gesture_sequence_active:
+            self.set_label(self.gesture_status_indicator, "PIPBOY SEQ RUNNING", bg="blue", fg="white")
+        elif "HOLDING" in active_type:
+            self.set_label(self.gesture_status_indicator, active_type, bg="orange", fg="black")
+        elif "MATCHED" in active_type or "MENU" in active_type or "PIPBOY" in active_type:
+            self.set_label(self.gesture_status_indicator, f"{active_type} MATCHED", bg="green", fg="white")
         else:
-            now = time.time()
-            pip_rem = (self.app.activation_duration + self.app.cooldown_period) - (now - self.app.last_activation_time)
+            pip_rem = (self.app.activation_duration + self.app.cooldown_period) - (snap.time - snap.last_activation_time)
 
             if pip_rem > 0:
-                self.gesture_status_indicator.config(text=f"PIP COOLDOWN ({pip_rem:.1f}s)", bg="gray", fg="white")
+                self.set_label(self.gesture_status_indicator, f"PIP COOLDOWN ({pip_rem:.1f}s)", bg="gray", fg="white")
             else:
-                self.gesture_status_indicator.config(text="READY / INACTIVE", bg="red", fg="white")
+                self.set_label(self.gesture_status_indicator, "READY / INACTIVE", bg="red", fg="white")
 
 
-if __name__ == "__main__":
+def run_gui(record_path=None, app=None, **app_options):
+    load_gui_modules()
     root = tk.Tk()
-    gui = TrackerGUI(root)
+    gui = TrackerGUI(root, app=app, **app_options)
+    if record_path:
+        gui.app.start_session_recording(record_path)
     root.mainloop()
-    openvr.shutdown()
+    gui.app.close()
+
+
+def run_daemon(stats_interval=0.0, record_path=None, **app_options):
+    """
+    Tracks without a window: no Tk, no GUI polling, just the tracking thread and the input dispatcher.
+    Everything comes from fnvr_config.txt (set it up once with the GUI). Ctrl+C to stop.
+    """
+    app = SimpleTrackingApp(**app_options)
+    if not app.controllers:
+        print("No controllers found. Tracking will idle until restarted with controllers on.")
+    if record_path:
+        app.start_session_recording(record_path)
+        print(f"Recording session to {record_path}")
+    app.start()
+    print(f"Tracking headless at {app.tick_rate} Hz, output: {app.output_channel_name}. Ctrl+C to stop.")
+    try:
+        while app.thread.is_alive():
+            app.thread.join(stats_interval if stats_interval > 0 else 0.5)
+            if stats_interval > 0 and app.thread.is_alive():
+                timing = app.get_timing_stats()
+                total = app.get_stage_stats()["stages"]["total"]
+                idle = app.get_idle_stats()
+                idle_text = f"  idle: {idle['idle_pct']:.0f}%, {idle['cpu_saved_s']:.1f}s CPU saved" if idle else ""
+                print(f"{timing['achieved_hz']:.1f} Hz  tick p50/p99: {total['p50_ms']:.3f}/{total['p99_ms']:.3f} ms  "
+                      f"missed: {timing['missed_deadlines']}  gesture: {app.gesture_active_type}{idle_text}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        app.close()
+    return app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fallout New Vegas VR tracker.")
+    parser.add_argument("--headless", action="store_true",
+                        help="Run the tracker without the window, using the saved config")
+    parser.add_argument("--config", default=CONFIG_FILE, help=f"Config file (default {CONFIG_FILE})")
+    parser.add_argument("--stats-interval", type=float, default=0.0,
+                        help="Headless: print loop stats every N seconds")
+    parser.add_argument("--replay", help="Play back a recorded session (.jsonl or binary) instead of SteamVR")
+    parser.add_argument("--record", help="Log every tick to this binary session file")
+    parser.add_argument("--synthetic", type=float,
+                        help="Use N seconds of scripted motion instead of SteamVR (no headset needed)")
+    parser.add_argument("--process", action="store_true",
+                        help="Run the tracking loop in its own process, apart from the window")
+    args = parser.parse_args(argv)
+
+    if args.process and not args.headless:
+        source = ("replay", args.replay) if args.replay else ("synthetic", args.synthetic) if args.synthetic else None
+        app = TrackerProcess(args.config, source)
+        try:
+            run_gui(args.record, app=app)
+        finally:
+            app.close()
+        return
+
+    app_options = {"config_file": args.config}
+    if args.replay:
+        app_options["pose_source"] = open_recording(args.replay)
+    elif args.synthetic:
+        clock = SystemClock()
+        app_options["clock"] = clock
+        app_options["pose_source"] = SyntheticPoseSource(clock, duration=args.synthetic)
+
+    if args.headless:
+        run_daemon(args.stats_interval, args.record, **app_options)
+    else:
+        run_gui(args.record, **app_options)
+
+
+if __name__ == "__main__":
+    main()
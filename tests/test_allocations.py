@@ -0,0 +1,105 @@
+"""
+Steady state allocations of the tracking loop.
+
+tracemalloc only sees memory that comes from the allocator. Lists, tuples and dicts are mostly recycled
+through CPython's free lists, so a tick that builds a few of them every time looks allocation free to it.
+count_containers() empties those free lists first and reads the GC's allocation counter, so every list,
+tuple or dict a tick makes is counted.
+"""
+import gc
+import json
+import os
+import sys
+import tracemalloc
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import FNVR_Tracker as fnvr  # noqa: E402
+
+# Per tick. What's left are the index tuples of multi-axis slices and tuple packing, nothing per device.
+MAX_CONTAINERS = 10
+# Bytes above the start of a tick, mostly NumPy's iterators for broadcasting and strided ops. A copy of
+# the pose arrays on every tick goes over it.
+MAX_PEAK = 6144
+TICKS = 50
+
+
+def build_app(tmp_path, pose_filter="none", extrapolation_ms=0.0):
+    config_file = os.path.join(tmp_path, "fnvr_config.txt")
+    with open(config_file, 'w') as f:
+        json.dump({"game_directory": str(tmp_path), "output_channel": "mmap", "pose_filter": pose_filter,
+                   "extrapolation_ms": extrapolation_ms}, f)
+
+    # Record a short synthetic session, then replay it preloaded so the source itself is allocation free
+    recording = os.path.join(tmp_path, "session.jsonl")
+    clock = fnvr.SimulatedClock()
+    recorder = fnvr.RecordingPoseSource(fnvr.SyntheticPoseSource(clock, duration=5.0), recording, clock=clock)
+    recorder.find_controllers()
+    while recorder.get_poses() is not None:
+        clock.sleep(0.01)
+    recorder.close()
+
+    source = fnvr.ReplayPoseSource(recording, loop=True, preload=True)
+    app = fnvr.SimpleTrackingApp(pose_source=source, clock=fnvr.SimulatedClock(),
+                                 keyboard_backend=fnvr.VirtualKeyboard(record=False), config_file=config_file)
+    app.secondary_controller_idx = 1
+    return app
+
+
+def drain_free_lists():
+    """ Holds enough new lists, dicts and small tuples that their free lists are empty. """
+    return ([[] for _ in range(100)], [{} for _ in range(100)],
+            [(i,) * size for size in range(1, 20) for i in range(2100)])
+
+
+def count_containers(fn):
+    """ Lists, tuples and dicts (any GC tracked object) fn() creates, with the free lists empty. """
+    held = drain_free_lists()
+    gc.disable()
+    try:
+        before = gc.get_count()[0]
+        fn()
+        count = gc.get_count()[0] - before
+    finally:
+        gc.enable()
+    del held
+    return count
+
+
+def run_tick(app):
+    app.tick()
+    app.scheduler.wait()
+
+
+@pytest.mark.parametrize("pose_filter, extrapolation_ms", [("none", 0.0), ("one_euro", 20.0), ("kalman", 0.0)])
+def test_tick_allocations(tmp_path, pose_filter, extrapolation_ms):
+    app = build_app(tmp_path, pose_filter, extrapolation_ms)
+    app.start_session_recording(os.path.join(tmp_path, "session.fnvr"), threaded=False)
+    app.run_headless(300)
+
+    # Reading the counter makes one tuple of its own
+    overhead = count_containers(lambda: None)
+    containers = max(count_containers(lambda: run_tick(app)) for _ in range(TICKS)) - overhead
+    assert containers <= MAX_CONTAINERS
+
+    tracemalloc.start()
+    try:
+        run_tick(app)
+        peak = 0
+        for _ in range(TICKS):
+            before, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            run_tick(app)
+            peak = max(peak, tracemalloc.get_traced_memory()[1] - before)
+        start, _ = tracemalloc.get_traced_memory()
+        app.run_headless(20 * TICKS)
+        retained = tracemalloc.get_traced_memory()[0] - start
+    finally:
+        tracemalloc.stop()
+    assert peak <= MAX_PEAK
+    # Free list churn can leave a few bytes, anything that grows per tick goes well over a byte a tick
+    assert retained < 20 * TICKS
+
+    app.stop_session_recording()
+    app.close_outputs()
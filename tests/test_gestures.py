@@ -0,0 +1,168 @@
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import FNVR_Tracker as fnvr  # noqa: E402
+
+
+# Binary fractions, so the simulated clock lands exactly on each dwell time
+STEP = 0.125
+ENTER, EXIT, REFRACTORY = 0.25, 0.5, 1.0
+
+
+def target(pos, bank=None):
+    return {"pos": list(pos), "rot": [0.0, 0.0, 0.0], "bank": bank}
+
+
+def test_index_only_holds_the_active_bank():
+    targets = {
+        "always": target([0.0, 0.0, 0.0]),
+        "rifle": target([0.01, 0.0, 0.0], bank="rifle"),
+        "pistol": target([0.0, 0.01, 0.0], bank="pistol"),
+    }
+    quat = fnvr.target_quaternions([0.0, 0.0, 0.0])[0]
+    index = fnvr.GestureIndex()
+
+    index.build(targets, 0.15, 40.0)
+    assert index.names == ["always"]
+    assert index.query([0.0, 0.0, 0.0], quat) == (["always"], ["always"])
+
+    index.build(targets, 0.15, 40.0, active_bank="rifle")
+    assert index.names == ["always", "rifle"]
+    assert index.query([0.0, 0.0, 0.0], quat)[0] == ["always", "rifle"]
+
+    index.build(targets, 0.15, 40.0, active_bank="pistol")
+    assert index.query([0.0, 0.0, 0.0], quat)[0] == ["always", "pistol"]
+
+
+def feed(engine, clock, seconds, inside=(), near=None, blocked=()):
+    """ Ticks the engine every STEP for `seconds` with the same match, returns [(time, name, started)]. """
+    near = inside if near is None else near
+    edges = []
+    for _ in range(round(seconds / STEP)):
+        edges += [(clock.now(), name, started) for name, started in engine.update(clock.now(), inside, near, blocked)]
+        clock.sleep(STEP)
+    return edges
+
+
+def test_gesture_starts_after_the_enter_dwell():
+    clock = fnvr.SimulatedClock()
+    engine = fnvr.GestureEngine(ENTER, EXIT, REFRACTORY)
+    # Leaving before the dwell is up starts it over
+    assert feed(engine, clock, ENTER, inside=("a",)) == []
+    assert feed(engine, clock, STEP) == []
+    assert engine.stats()["absorbed"] == 1
+    assert not engine.pending
+
+    start = clock.now()
+    assert feed(engine, clock, 1.0, inside=("a",)) == [(start + ENTER, "a", True)]
+    assert engine.stats()["active"] == ["a"]
+
+
+def test_border_noise_doesnt_end_a_gesture():
+    clock = fnvr.SimulatedClock()
+    engine = fnvr.GestureEngine(ENTER, EXIT, REFRACTORY)
+    feed(engine, clock, 1.0, inside=("a",))
+    # Outside the enter thresholds but within the wider exit ones
+    assert feed(engine, clock, 2.0, near=("a",)) == []
+    # Out of range for less than the exit dwell, then back
+    for _ in range(3):
+        assert feed(engine, clock, EXIT - STEP) == []
+        assert feed(engine, clock, STEP, near=("a",)) == []
+    assert engine.stats()["absorbed"] == 3
+
+    end = clock.now()
+    assert feed(engine, clock, 1.0) == [(end + EXIT, "a", False)]
+    assert engine.stats()["enters"] == engine.stats()["exits"] == 1
+
+
+def test_refractory_time_and_cooldowns():
+    clock = fnvr.SimulatedClock()
+    engine = fnvr.GestureEngine(ENTER, EXIT, REFRACTORY)
+    feed(engine, clock, 1.0, inside=("a",))
+    edges = feed(engine, clock, 1.0)
+    end = edges[0][0]
+    # Back inside straight away: the dwell only counts once the refractory time is over
+    edges = feed(engine, clock, 2.0, inside=("a",))
+    assert edges == [(end + REFRACTORY + ENTER, "a", True)]
+
+    # A cooldown holds a gesture off from when it started, however quickly it ended
+    engine.cooldowns = {"b": 3.0}
+    start = feed(engine, clock, 1.0, inside=("b",))[0][0]
+    feed(engine, clock, 1.0)
+    edges = feed(engine, clock, 4.0, inside=("b",))
+    assert edges == [(start + 3.0 + ENTER, "b", True)]
+
+
+def test_blocked_gestures_dont_start_but_still_end():
+    clock = fnvr.SimulatedClock()
+    engine = fnvr.GestureEngine(ENTER, EXIT, REFRACTORY)
+    feed(engine, clock, 1.0, inside=("a",))
+    assert feed(engine, clock, 1.0, inside=("a", "b"), blocked=("a", "b")) == []
+    assert engine.stats()["active"] == ["a"]
+    assert [name for _, name, _ in feed(engine, clock, 1.0, blocked=("a", "b"))] == ["a"]
+
+
+def make_app(tmp_path):
+    config_file = os.path.join(tmp_path, "fnvr_config.txt")
+    with open(config_file, 'w') as f:
+        json.dump({"game_directory": str(tmp_path)}, f)
+    clock = fnvr.SimulatedClock()
+    keyboard = fnvr.VirtualKeyboard()
+    app = fnvr.SimpleTrackingApp(pose_source=fnvr.SyntheticPoseSource(clock), clock=clock,
+                                 keyboard_backend=keyboard, config_file=config_file)
+    app.secondary_controller_idx = 1
+    return app, clock, keyboard
+
+
+def hold(app, clock, name, seconds=0.1, tracked=True):
+    """ Puts the secondary controller on a target and runs the gestures at 100 Hz. """
+    app.secondary_controller_pos[:] = app.targets[name]["pos"]
+    app.secondary_controller_quat[:] = fnvr.target_quaternions(app.targets[name]["rot"])[0]
+    for _ in range(round(seconds / 0.01)):
+        app.check_gestures(tracked)
+        app.input.pump()
+        clock.sleep(0.01)
+
+
+def test_sequences_dont_overlap(tmp_path):
+    app, clock, keyboard = make_app(tmp_path)
+    # Both targets in the same spot: the Pip-Boy wins
+    app.targets["menu"] = dict(app.targets["pipboy"])
+    app.gestures_dirty = True
+    hold(app, clock, "pipboy")
+    assert app.gesture_sequence_active
+    assert not app.menu_sequence_active
+
+    # The menu can't start while the Pip-Boy sequence runs, even on its own
+    app.targets["menu"] = {"pos": list(fnvr.DEFAULT_MENU_POS), "rot": list(fnvr.DEFAULT_MENU_ROT)}
+    app.gestures_dirty = True
+    hold(app, clock, "menu", seconds=1.0)
+    assert not app.menu_sequence_active
+
+    clock.sleep(app.activation_duration)
+    app.update_pipboy_logic()
+    assert not app.gesture_sequence_active
+    hold(app, clock, "menu")
+    assert app.menu_sequence_active
+    app.close_outputs()
+
+
+def test_keys_are_released_after_tracking_loss(tmp_path):
+    app, clock, keyboard = make_app(tmp_path)
+    hold(app, clock, "1")
+    # The default hotkey targets all sit in the same spot
+    assert keyboard.held == set("12345678")
+    events = len(keyboard.events)
+
+    # A dropout shorter than the exit dwell doesn't touch the keys
+    hold(app, clock, "1", seconds=0.03, tracked=False)
+    hold(app, clock, "1")
+    assert len(keyboard.events) == events
+
+    hold(app, clock, "1", seconds=0.1, tracked=False)
+    assert keyboard.held == set()
+    assert app.held_hotkeys == []
+    assert app.gesture_active_type == "NONE"
+    app.close_outputs()
@@ -0,0 +1,94 @@
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import FNVR_Tracker as fnvr  # noqa: E402
+
+
+def make_app(tmp_path):
+    config_file = os.path.join(tmp_path, "fnvr_config.txt")
+    with open(config_file, 'w') as f:
+        json.dump({"game_directory": str(tmp_path)}, f)
+    clock = fnvr.SimulatedClock()
+    keyboard = fnvr.VirtualKeyboard()
+    app = fnvr.SimpleTrackingApp(pose_source=fnvr.SyntheticPoseSource(clock), clock=clock,
+                                 keyboard_backend=keyboard, config_file=config_file)
+    return app, clock, keyboard
+
+
+def hold_gesture(app, clock, target):
+    """ Puts the secondary controller on a target long enough for its gesture to start. """
+    app.secondary_controller_idx = 1
+    app.secondary_controller_pos[:] = app.targets[target]["pos"]
+    app.secondary_controller_quat[:] = fnvr.target_quaternions(app.targets[target]["rot"])[0]
+    for _ in range(10):
+        app.check_gestures()
+        app.input.pump()
+        clock.sleep(0.01)
+
+
+def test_stop_releases_held_hotkeys(tmp_path):
+    app, clock, keyboard = make_app(tmp_path)
+    hold_gesture(app, clock, "1")
+    # The default hotkey targets all sit in the same spot
+    assert keyboard.held == set("12345678")
+    assert app.held_hotkeys
+
+    app.stop()
+    assert keyboard.held == set()
+    assert app.held_hotkeys == []
+    assert app.gesture_active_type == "NONE"
+    app.close_outputs()
+
+
+def test_stop_while_the_loop_is_running(tmp_path):
+    app, clock, keyboard = make_app(tmp_path)
+    app.secondary_controller_idx = 1
+    app.run_headless(10)
+    # The synthetic secondary controller rests in place for a few seconds, so it stays on this target
+    app.set_target_from_secondary("1")
+    for _ in range(10):
+        app.start()
+        thread = app.thread
+        app.start()
+        assert app.thread is thread
+        deadline = time.monotonic() + 5.0
+        while not keyboard.held and time.monotonic() < deadline:
+            time.sleep(0.001)
+        assert keyboard.held == {"1"}
+
+        app.stop()
+        assert not thread.is_alive()
+        assert keyboard.held == set()
+        assert app.held_hotkeys == []
+        assert keyboard.events[-1] == ("up", "1")
+    app.close_outputs()
+
+
+def tap_x(keyboard, clock):
+    keyboard.press('x')
+    clock.sleep(0.002)
+    keyboard.release('x')
+
+
+def test_first_x_press_is_not_a_double_tap(tmp_path):
+    app, clock, keyboard = make_app(tmp_path)
+    app.keys.start()
+    fnvr.XOffset = 5.0
+    # The simulated clock starts at 0, so this press is well within a second of "time 0"
+    clock.sleep(0.1)
+    tap_x(keyboard, clock)
+    app.handle_manual_offsets()
+    assert fnvr.XOffset == 5.0
+
+    # Two taps within a second do reset, even when both fall between two ticks
+    clock.sleep(1.5)
+    tap_x(keyboard, clock)
+    clock.sleep(0.002)
+    tap_x(keyboard, clock)
+    app.handle_manual_offsets()
+    assert fnvr.XOffset == 0.0
+    app.keys.stop()
+    app.close_outputs()
@@ -0,0 +1,131 @@
+import os
+import struct
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import FNVR_Tracker as fnvr  # noqa: E402
+
+
+class ListChannel:
+    def __init__(self):
+        self.frames = []
+
+    def publish(self, values, timestamp=0.0):
+        self.frames.append((timestamp, list(values)))
+        return True
+
+    def close(self):
+        pass
+
+
+def test_dedup_drops_repeats_until_keepalive():
+    channel = ListChannel()
+    writer = fnvr.DedupOutputWriter(channel, keepalive=1.0)
+    values = np.array([1.0, 2.0, 3.0])
+
+    writer.publish(values, 0.0)
+    writer.publish(values, 0.5)
+    # Below the filename rounding, so still the same frame
+    writer.publish(values + 0.001, 0.9)
+    assert [t for t, _ in channel.frames] == [0.0]
+
+    writer.publish(values, 1.0)
+    writer.publish(values + 0.01, 1.1)
+    assert [t for t, _ in channel.frames] == [0.0, 1.0, 1.1]
+    assert writer.stats()["published"] == 3
+    assert writer.stats()["suppressed"] == 2
+
+
+def test_dedup_without_keepalive():
+    channel = ListChannel()
+    writer = fnvr.DedupOutputWriter(channel, keepalive=0.0)
+    values = np.array([1.0, 2.0])
+    for t in range(100):
+        writer.publish(values, float(t))
+    assert len(channel.frames) == 1
+
+
+def test_mmap_round_trip(tmp_path):
+    path = os.path.join(tmp_path, fnvr.MMAP_FILE_NAME)
+    channel = fnvr.MmapOutputChannel(path)
+    reader = fnvr.MmapOutputReader(path, retries=3)
+    assert reader.read() == (0, 0.0, [])
+
+    values = np.arange(fnvr.OUTPUT_VALUE_COUNT, dtype=float) * 1.5
+    channel.publish(values, 12.5)
+    assert reader.read() == (1, 12.5, values.tolist())
+    channel.publish(values[:3], 13.0)
+    assert reader.read() == (2, 13.0, values[:3].tolist())
+
+    # A frame caught mid-write (odd sequence) is never returned
+    struct.pack_into('<Q', channel._map, fnvr.MmapOutputChannel.SEQ_OFFSET, channel.seq + 1)
+    assert reader.read() is None
+    reader.close()
+    channel.close()
+
+
+def test_mmap_reader_rejects_other_files(tmp_path):
+    path = os.path.join(tmp_path, "other.bin")
+    with open(path, 'wb') as f:
+        f.write(b'\0' * 64)
+    with pytest.raises(ValueError):
+        fnvr.MmapOutputReader(path)
+
+
+def old_output(pos, rot, offsets=(0.0,) * 6, holster_cutoff=fnvr.DEFAULT_HOLSTER_CUTOFF):
+    """ The hard coded transform of the original update_encoded_filename(), for one controller. """
+    x_offset, y_offset, z_offset, yaw_offset, pitch_offset, roll_offset = offsets
+    (x, y, z), (xr, yr, zr) = pos, rot
+    if z < holster_cutoff:
+        x, y, z = -0.4, 0.1, -0.17
+        xr, yr, zr = 5.0, 40.0, 0.0
+    adj_x = (x * 85) + x_offset - 2
+    adj_y = (y * 45) + y_offset - 0
+    adj_z = (z * 70) + z_offset - 5.42
+    adj_pitch = yr + pitch_offset - 4
+    adj_yaw = xr + yaw_offset + 4
+    adj_roll = zr + roll_offset
+    return [adj_y, (adj_x * -1) - 10, adj_z, adj_pitch - 60, adj_roll, adj_yaw - 10]
+
+
+def test_default_calibration_matches_original_constants():
+    profile = fnvr.CalibrationProfile()
+    rng = np.random.default_rng(1)
+    for _ in range(50):
+        raw = np.concatenate([rng.uniform(-1.0, 1.0, (2, 3)), rng.uniform(-180.0, 180.0, (2, 3))], axis=1)
+        offsets = np.zeros((2, 6))
+        offsets[0] = rng.uniform(-20.0, 20.0, 6)
+        game = profile.apply(raw, offsets)
+        assert game[0] == pytest.approx(old_output(raw[0, :3], raw[0, 3:], offsets[0], holster_cutoff=-10.0))
+        assert game[1] == pytest.approx(old_output(raw[1, :3], raw[1, 3:], holster_cutoff=-10.0))
+
+    # The holster pose replaces the raw primary values before the transform
+    raw = np.zeros((2, 6))
+    raw[0] = profile.holster_pose
+    game = profile.apply(raw, np.zeros((2, 6)))
+    assert game[0] == pytest.approx(old_output([0.0, 0.0, -1.0], [0.0, 0.0, 0.0]))
+
+
+def test_filename_channel_keeps_to_the_path_limit(tmp_path, capsys):
+    # Deep enough that the folder leaves room for a single tracker block
+    test_dir = os.path.join(tmp_path, "d" * (90 - len(str(tmp_path)) - 1))
+    os.makedirs(test_dir)
+    channel = fnvr.FilenameOutputChannel(test_dir)
+    assert channel.max_slots == 1
+
+    values = np.full(fnvr.OUTPUT_VALUE_COUNT + fnvr.TRACKER_BLOCK_SIZE * 3, -180.0)
+    for _ in range(2):
+        assert channel.publish(values)
+    name, = os.listdir(test_dir)
+    assert len(os.path.join(test_dir, name)) < fnvr.MAX_PATH
+    assert len(name.split("_")) == fnvr.OUTPUT_VALUE_COUNT + fnvr.TRACKER_BLOCK_SIZE
+    # Warned once, not every frame
+    assert capsys.readouterr().out.count("tracker slots") == 1
+
+    # The controller values alone are sent whole
+    channel.publish(values[:fnvr.OUTPUT_VALUE_COUNT])
+    name, = os.listdir(test_dir)
+    assert len(name.split("_")) == fnvr.OUTPUT_VALUE_COUNT
@@ -0,0 +1,183 @@
+import json
+import math
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import FNVR_Tracker as fnvr  # noqa: E402
+
+
+def get_relative_transform(hmd_matrix_inv, device_pose):
+    """ The original per-device transform: 4x4 matrices and atan2 on the relative rotation. """
+    dev_m = fnvr.get_pose_matrix(device_pose)
+    rel_m = hmd_matrix_inv @ dev_m
+    rel_pos = rel_m[:3, 3]
+    euler_angles = fnvr.rotation_matrix_to_euler_angles(rel_m[:3, :3])
+    rel_rot = [euler_angles[1], euler_angles[0], euler_angles[2]]
+    return rel_pos, rel_rot
+
+
+def apply_roll_correction(yaw, pitch, roll):
+    """ The original roll correction, returns (yaw, pitch, roll). """
+    p_adj = pitch - 45.0
+    y_adj = yaw
+    rad_roll = math.radians(roll)
+    cos_r = math.cos(rad_roll)
+    sin_r = math.sin(rad_roll)
+    p_new = (p_adj * cos_r) - (y_adj * sin_r)
+    y_new = (p_adj * sin_r) + (y_adj * cos_r)
+    return y_new, p_new, roll
+
+
+def game_values(pos, rot):
+    """ The original update_encoded_filename() transform with no manual offsets. """
+    (x, y, z), (xr, yr, zr) = pos, rot
+    adj_x, adj_y, adj_z = x * 85 - 2, y * 45, z * 70 - 5.42
+    return [adj_y, -adj_x - 10, adj_z, yr - 4 - 60, zr, xr + 4 - 10]
+
+
+def original_output(poses):
+    """ The 13 output values as the original run_loop() worked them out, primary device 1, secondary 2. """
+    h_m_inv = np.linalg.inv(fnvr.get_pose_matrix(poses[fnvr.HMD_INDEX]))
+    values = []
+    for index in (1, 2):
+        rel_pos, rel_rot = get_relative_transform(h_m_inv, poses[index])
+        yaw, pitch, roll = apply_roll_correction(*rel_rot)
+        # Only the primary got the 45 degrees back
+        if index == 1:
+            pitch += 45.0
+        values += game_values([rel_pos[2], rel_pos[0], rel_pos[1]], [yaw, pitch, roll])
+    return values[:6] + [0.0] + values[6:]
+
+
+def rotation_xyz(pitch, yaw, roll):
+    """ Rz(roll) @ Ry(yaw) @ Rx(pitch), the convention of rotation_matrix_to_euler_angles. """
+    (cx, sx), (cy, sy), (cz, sz) = [(math.cos(math.radians(a)), math.sin(math.radians(a))) for a in (pitch, yaw, roll)]
+    rx = np.array([[1, 0, 0], [0, cx, -sx], [0, sx, cx]])
+    ry = np.array([[cy, 0, sy], [0, 1, 0], [-sy, 0, cy]])
+    rz = np.array([[cz, -sz, 0], [sz, cz, 0], [0, 0, 1]])
+    return rz @ ry @ rx
+
+
+def random_matrix(rng, spread=0.4):
+    pos = rng.uniform(-spread, spread, 3)
+    return fnvr.make_pose_matrix(pos, *rng.uniform([-180.0, -89.0, -180.0], [180.0, 89.0, 180.0]))
+
+
+def make_app(tmp_path, matrices):
+    config_file = os.path.join(tmp_path, "fnvr_config.txt")
+    with open(config_file, 'w') as f:
+        json.dump({"game_directory": str(tmp_path)}, f)
+    clock = fnvr.SimulatedClock()
+    motions = {index: (lambda t, index=index: matrices[index]) for index in (fnvr.HMD_INDEX, 1, 2)}
+    controllers = [{'index': 1, 'role': "Right", 'serial': "R"}, {'index': 2, 'role': "Left", 'serial': "L"}]
+    source = fnvr.SyntheticPoseSource(clock, motions=motions, controllers=controllers)
+    app = fnvr.SimpleTrackingApp(pose_source=source, clock=clock, keyboard_backend=fnvr.VirtualKeyboard(),
+                                 config_file=config_file)
+    app.secondary_controller_idx = 1
+    # Out of reach, so no gesture moves the Pip-Boy value
+    for target in app.targets.values():
+        target["pos"] = [9.0, 9.0, 9.0]
+    app.gestures_dirty = True
+    return app, source
+
+
+def test_output_matches_the_original_math(tmp_path):
+    rng = np.random.default_rng(7)
+    matrices = {}
+    app, source = make_app(tmp_path, matrices)
+    for _ in range(200):
+        hmd = random_matrix(rng)
+        matrices[fnvr.HMD_INDEX] = hmd
+        # Devices near the headset, in the headset's frame
+        for index in (1, 2):
+            rel = np.vstack([random_matrix(rng), [0, 0, 0, 1]])
+            matrices[index] = (np.vstack([hmd, [0, 0, 0, 1]]) @ rel)[:3].tolist()
+        app.tick()
+        expected = original_output(source.poses)
+        assert app.output_values[:fnvr.OUTPUT_VALUE_COUNT] == pytest.approx(expected, abs=1e-3)
+    app.close_outputs()
+
+
+@pytest.mark.parametrize("small_rows", [fnvr.SMALL_BATCH_ROWS, 0])
+def test_batch_matches_the_original_transform(monkeypatch, small_rows):
+    # 0 forces the NumPy path the batch takes for many devices
+    monkeypatch.setattr(fnvr, "SMALL_BATCH_ROWS", small_rows)
+    rng = np.random.default_rng(3)
+    poses = (fnvr.TrackedDevicePose * fnvr.MAX_TRACKED_DEVICES)()
+    batch = fnvr.PoseBatch()
+    devices = list(range(1, 9))
+    batch.set_devices(devices)
+    for _ in range(50):
+        for index in [fnvr.HMD_INDEX] + devices:
+            fnvr.set_pose(poses[index], random_matrix(rng, spread=2.0))
+        batch.update(poses)
+        batch.encode_angles()
+
+        h_m_inv = np.linalg.inv(fnvr.get_pose_matrix(poses[fnvr.HMD_INDEX]))
+        for row, index in enumerate(devices, 1):
+            rel_pos, rel_rot = get_relative_transform(h_m_inv, poses[index])
+            if abs(rel_rot[0]) > 89.0:
+                # Pitch and roll aren't well defined that close to the pole, see the test below
+                continue
+            assert batch.pose6[row, :3] == pytest.approx(rel_pos, abs=1e-5)
+            assert batch.pose6[row, 3:] == pytest.approx(apply_roll_correction(*rel_rot), abs=1e-3)
+
+
+@pytest.mark.parametrize("small_rows", [fnvr.SMALL_BATCH_ROWS, 0])
+@pytest.mark.parametrize("yaw", [90.0, -90.0])
+def test_euler_angles_at_the_pole(monkeypatch, small_rows, yaw):
+    monkeypatch.setattr(fnvr, "SMALL_BATCH_ROWS", small_rows)
+    poses = (fnvr.TrackedDevicePose * fnvr.MAX_TRACKED_DEVICES)()
+    fnvr.set_pose(poses[fnvr.HMD_INDEX], fnvr.make_pose_matrix([0.0, 0.0, 0.0]))
+    batch = fnvr.PoseBatch()
+    batch.set_devices([1])
+    for pitch, roll in [(0.0, 0.0), (30.0, 0.0), (0.0, -70.0), (120.0, 45.0)]:
+        r = rotation_xyz(pitch, yaw, roll)
+        fnvr.set_pose(poses[1], np.hstack([r, np.zeros((3, 1))]).tolist())
+        batch.update(poses)
+        batch.encode_angles()
+        angles = batch.euler[1]
+        assert np.isfinite(batch.pose6[1]).all()
+        # Only pitch and roll together are defined here: all of it goes to pitch, like the original
+        assert angles == pytest.approx(fnvr.rotation_matrix_to_euler_angles(r), abs=1e-3)
+        assert rotation_xyz(*angles) == pytest.approx(r, abs=1e-3)
+
+
+def test_target_quaternions_round_trip():
+    rng = np.random.default_rng(5)
+    poses = (fnvr.TrackedDevicePose * fnvr.MAX_TRACKED_DEVICES)()
+    batch = fnvr.PoseBatch()
+    batch.set_devices([1, 2, 3])
+    for _ in range(50):
+        for index in (fnvr.HMD_INDEX, 1, 2, 3):
+            fnvr.set_pose(poses[index], random_matrix(rng))
+        batch.update(poses)
+        batch.encode_angles()
+        # Gesture targets are stored as the roll corrected angles, like secondary_controller_rot
+        quats = fnvr.target_quaternions(batch.pose6[1:4, 3:])
+        dots = np.abs(np.sum(quats * batch.quat[1:4], axis=1))
+        assert dots == pytest.approx(1.0, abs=1e-6)
+
+
+def test_scalar_helpers_match_the_array_path():
+    rng = np.random.default_rng(11)
+    mats = np.array([fnvr.make_pose_matrix([0.0, 0.0, 0.0], *rng.uniform(-180.0, 180.0, 3)) for _ in range(4)])
+    quats = np.zeros((4, 4))
+    fnvr.quaternions_from_matrices(mats, quats)
+    euler = np.zeros((4, 3))
+    fnvr.euler_angles_from_quaternions(quats, euler)
+    yaw_pitch = fnvr.roll_correction_batch(euler[:, 1], euler[:, 0], euler[:, 2])
+
+    # Row i of flat buffers, as PoseBatch uses them on its memoryviews
+    flat_m, flat_q, flat_out = mats.ravel().tolist(), [0.0] * 16, [0.0] * 20
+    for i in range(4):
+        fnvr.quaternion_from_rotation(flat_m, flat_q, i)
+        fnvr.encode_quaternion(flat_q, flat_out, i)
+    assert flat_q == pytest.approx(quats.ravel().tolist(), abs=1e-9)
+    encoded = np.array(flat_out).reshape(4, 5)
+    assert encoded[:, :3] == pytest.approx(euler, abs=1e-6)
+    assert encoded[:, 3:] == pytest.approx(yaw_pitch.T, abs=1e-6)
@@ -0,0 +1,64 @@
+import json
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import FNVR_Tracker as fnvr  # noqa: E402
+
+
+def make_app(tmp_path):
+    config_file = os.path.join(tmp_path, "fnvr_config.txt")
+    with open(config_file, 'w') as f:
+        json.dump({"game_directory": str(tmp_path)}, f)
+    clock = fnvr.SimulatedClock()
+    return fnvr.SimpleTrackingApp(pose_source=fnvr.SyntheticPoseSource(clock), clock=clock,
+                                  keyboard_backend=fnvr.VirtualKeyboard(), config_file=config_file)
+
+
+def test_session_round_trip(tmp_path):
+    app = make_app(tmp_path)
+    app.secondary_controller_idx = 1
+    path = os.path.join(tmp_path, "session.fnvr")
+    # A small ring, so the recording wraps around it several times
+    app.start_session_recording(path, ring_size=16, threaded=False)
+    outputs = []
+    for _ in range(50):
+        app.run_headless(1)
+        outputs.append(app.output_values.copy())
+    stats = app.stop_session_recording()
+    assert stats["records"] == stats["written"] == 50
+    assert stats["bytes"] == os.path.getsize(path)
+
+    header, records = fnvr.read_session(path)
+    assert header["version"] == fnvr.SESSION_VERSION
+    assert header["tick_rate"] == app.tick_rate
+    assert header["controllers"] == app.controllers
+    assert len(records) == 50
+    assert records['tick'].tolist() == list(range(50))
+    assert (records['device'][:, :3] == [fnvr.HMD_INDEX, 1, 2]).all()
+    assert (records['device'][:, 3:] == -1).all()
+    assert np.allclose(records['output'], outputs)
+    assert np.allclose(records['secondary_pos'][-1], app.secondary_controller_pos, atol=1e-6)
+
+    # The raw poses replay as the same motion the synthetic source made
+    session = fnvr.read_session_poses(path)
+    assert session["devices"] == [fnvr.HMD_INDEX, 1, 2]
+    assert session["valid"].all()
+    expected = fnvr.SyntheticPoseSource.secondary_reach(session["t"][-1])
+    assert np.allclose(session["m"][-1, 2], expected, atol=1e-5)
+    app.close_outputs()
+
+
+def test_session_ignores_a_partial_last_record(tmp_path):
+    app = make_app(tmp_path)
+    path = os.path.join(tmp_path, "session.fnvr")
+    app.start_session_recording(path, threaded=False)
+    app.run_headless(5)
+    app.stop_session_recording()
+    with open(path, 'ab') as f:
+        f.write(b'\0' * 10)
+    _, records = fnvr.read_session(path)
+    assert len(records) == 5
+    app.close_outputs()
@@ -0,0 +1,38 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import FNVR_Tracker as fnvr  # noqa: E402
+
+
+def test_scheduler_keeps_absolute_deadlines():
+    clock = fnvr.SimulatedClock()
+    scheduler = fnvr.FixedRateScheduler(clock, rate_hz=100)
+    scheduler.start()
+    for _ in range(100):
+        # Work time inside the period doesn't push the next deadline back
+        clock.sleep(0.004)
+        scheduler.wait()
+    assert clock.now() == pytest.approx(1.0)
+    assert scheduler.missed_deadlines == 0
+
+
+def test_scheduler_drops_missed_slots_instead_of_bursting():
+    clock = fnvr.SimulatedClock()
+    scheduler = fnvr.FixedRateScheduler(clock, rate_hz=100)
+    scheduler.start()
+    # One tick overruns by three and a half periods
+    clock.sleep(0.045)
+    scheduler.wait()
+    assert scheduler.missed_deadlines == 3
+    assert scheduler.last_lateness == pytest.approx(0.035)
+    assert clock.now() == pytest.approx(0.045)
+
+    # The next tick waits for the next slot on the original grid, it doesn't run straight away
+    scheduler.wait()
+    assert clock.now() == pytest.approx(0.05)
+    scheduler.wait()
+    assert clock.now() == pytest.approx(0.06)
+    assert scheduler.missed_deadlines == 3
@@ -0,0 +1,262 @@
+"""
+Reproducible benchmarks for the tracking hot path.
+
+FNVR_Tracker is imported with stand-in openvr and keyboard modules (no SteamVR, no real key hooks), poses
+come from the scripted SyntheticPoseSource and the filename output goes to a tmpfs folder, so numbers only
+depend on the code and the machine.
+
+    python tools/bench_hot_path.py                          # print results
+    python tools/bench_hot_path.py --save baseline.json     # store a baseline
+    python tools/bench_hot_path.py --compare baseline.json  # exit 1 if anything got slower than --threshold
+
+The benchmarks are the functions tick() actually runs: PoseBatch.update / encode_angles, both jitter
+filters, GestureIndex.query, CalibrationProfile.apply, check_gestures and the output, plus the whole tick.
+
+Each benchmark reports the best and median time per call over --repeat runs and the spread between runs
+(interquartile range as a percent of the median). The comparison goes by the median and only counts a
+slowdown as a regression when it is over --threshold percent, over twice the spread of either run and
+over --noise-floor microseconds, so comparing a tree against its own baseline stays quiet.
+"""
+import argparse
+import ctypes
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import timeit
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def install_stubs():
+    """ Registers minimal openvr and keyboard modules before the tracker is imported. """
+    openvr = types.ModuleType("openvr")
+    openvr.k_unMaxTrackedDeviceCount = 64
+    openvr.k_unTrackedDeviceIndex_Hmd = 0
+    openvr.VRApplication_Background = 3
+    openvr.TrackingUniverseStanding = 1
+    openvr.TrackedDeviceClass_Controller = 2
+    openvr.TrackedControllerRole_LeftHand = 1
+
+    class HmdMatrix34_t(ctypes.Structure):
+        _fields_ = [("m", (ctypes.c_float * 4) * 3)]
+
+        def __getitem__(self, key):
+            return self.m[key]
+
+    class HmdVector3_t(ctypes.Structure):
+        _fields_ = [("v", ctypes.c_float * 3)]
+
+        def __getitem__(self, key):
+            return self.v[key]
+
+    class TrackedDevicePose_t(ctypes.Structure):
+        _fields_ = [
+            ("mDeviceToAbsoluteTracking", HmdMatrix34_t),
+            ("vVelocity", HmdVector3_t),
+            ("vAngularVelocity", HmdVector3_t),
+            ("eTrackingResult", ctypes.c_int),
+            ("bPoseIsValid", ctypes.c_bool),
+            ("bDeviceIsConnected", ctypes.c_bool),
+        ]
+
+    class OpenVRError(Exception):
+        pass
+
+    def init(_app_type):
+        raise OpenVRError("openvr is stubbed for benchmarking")
+
+    openvr.TrackedDevicePose_t = TrackedDevicePose_t
+    openvr.OpenVRError = OpenVRError
+    openvr.init = init
+    openvr.shutdown = lambda: None
+
+    keyboard = types.ModuleType("keyboard")
+    keyboard.is_pressed = lambda key: False
+    keyboard.press = lambda key: None
+    keyboard.release = lambda key: None
+
+    sys.modules["openvr"] = openvr
+    sys.modules["keyboard"] = keyboard
+
+
+install_stubs()
+sys.path.insert(0, ROOT)
+import FNVR_Tracker as fnvr  # noqa: E402
+
+
+def tmpfs_dir():
+    """ RAM backed folder for the filename channel so disk speed doesn't leak into the numbers. """
+    base = "/dev/shm" if os.path.isdir("/dev/shm") else None
+    return tempfile.mkdtemp(prefix="fnvr_bench_", dir=base)
+
+
+def make_app(game_dir):
+    config_file = os.path.join(game_dir, "fnvr_config.txt")
+    with open(config_file, 'w') as f:
+        # Dedup off so update_encoded_filename does its filesystem work on every call
+        json.dump({"game_directory": game_dir, "output_channel": "filename", "output_dedup": False}, f)
+
+    clock = fnvr.SimulatedClock()
+    source = fnvr.SyntheticPoseSource(clock)
+    app = fnvr.SimpleTrackingApp(pose_source=source, clock=clock,
+                                 keyboard_backend=fnvr.VirtualKeyboard(record=False), config_file=config_file)
+    app.secondary_controller_idx = 1
+    # Settle the filters and the output folder
+    app.run_headless(max_ticks=200)
+    app.running = True
+    return app
+
+
+def build_benchmarks(app):
+    """ name -> zero argument callable. Inputs are captured up front so only the call itself is timed. """
+    poses = app.pose_source.get_poses(0.0)
+    batch = app.pose_batch
+    batch.update(poses)
+    batch.encode_angles()
+    n = batch.count
+
+    # The filters get their own copies of the controller rows, so the app's state isn't touched
+    filters = {}
+    for name in ("one_euro", "kalman"):
+        pose_filter = fnvr.make_pose_filter(name, n - 1, app.filter_params.get(name))
+        pos, quat, valid = batch.pose6[1:n, :3].copy(), batch.quat[1:n].copy(), batch.valid[1:n].copy()
+        filters[name] = (lambda f=pose_filter, p=pos, q=quat, v=valid: f.apply(p, q, v, 0.01))
+
+    # Gesture lookup right on the Pip-Boy target, so the distance / angle checks run (not just a cell miss)
+    index = app.gesture_index
+    index.build(app.targets, app.pos_sensitivity, app.rot_sensitivity, app.gesture_bank,
+                app.gesture_timing["exit_scale"])
+    gesture_pos = list(app.targets["pipboy"]["pos"])
+    gesture_quat = fnvr.target_quaternions(app.targets["pipboy"]["rot"])[0]
+
+    # Nudge the primary controller every call so each output frame differs and really gets renamed
+    nudge = [0]
+
+    def encoded_filename():
+        nudge[0] += 1
+        app.controller_pos[0] = 0.001 * (nudge[0] % 100)
+        app.update_encoded_filename(0.01)
+
+    return {
+        "pose_batch_update": lambda: batch.update(poses),
+        "encode_angles": batch.encode_angles,
+        "one_euro_filter": filters["one_euro"],
+        "kalman_filter": filters["kalman"],
+        "gesture_query": lambda: index.query(gesture_pos, gesture_quat),
+        "calibration_apply": lambda: app.calibration.apply(app.calibration_raw, app.calibration_offsets),
+        "check_gestures": app.check_gestures,
+        "update_encoded_filename": encoded_filename,
+        "tick": app.tick,
+    }
+
+
+def measure(fn, repeat, min_time):
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    # autorange stops at 0.2s, scale up to the requested run length
+    number = max(1, int(number * max(1.0, min_time / 0.2)))
+    runs = fnvr.np.array(sorted(t / number for t in timer.repeat(repeat=repeat, number=number)))
+    best = runs[0]
+    median = float(fnvr.np.median(runs))
+    q25, q75 = fnvr.np.percentile(runs, (25, 75))
+    return {
+        "best_us": best * 1e6,
+        "median_us": median * 1e6,
+        "spread_pct": (q75 - q25) / median * 100.0 if median > 0 else 0.0,
+        "calls_per_s": 1.0 / median if median > 0 else 0.0,
+        "number": number,
+    }
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "numpy": fnvr.np.__version__,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def compare(results, baseline, threshold, noise_floor):
+    """
+    Prints old vs new median per benchmark. Returns the names that got slower by more than threshold
+    percent, more than twice the run to run spread of either side and more than noise_floor microseconds.
+    """
+    regressions = []
+    print(f"\n{'benchmark':<34} {'baseline us':>12} {'now us':>10} {'change':>8} {'noise':>7}")
+    for name, res in results.items():
+        old = baseline.get("results", {}).get(name)
+        if old is None or "median_us" not in old:
+            print(f"{name:<34} {'-':>12} {res['median_us']:>10.2f} {'new':>8}")
+            continue
+        change = (res["median_us"] - old["median_us"]) / old["median_us"] * 100.0
+        noise = 2.0 * max(res["spread_pct"], old.get("spread_pct", 0.0))
+        flag = ""
+        if change > max(threshold, noise) and res["median_us"] - old["median_us"] > noise_floor:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"{name:<34} {old['median_us']:>12.2f} {res['median_us']:>10.2f} {change:>+7.1f}% {noise:>6.0f}%{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks for the FNVR tracking hot path.")
+    parser.add_argument("--only", nargs="+", help="Run just these benchmarks")
+    parser.add_argument("--repeat", type=int, default=15, help="Timed runs per benchmark (default 15)")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Seconds per timed run (default 0.2)")
+    parser.add_argument("--save", help="Write results as a JSON baseline")
+    parser.add_argument("--compare", help="Baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=20.0,
+                        help="Percent slowdown (of the median) that counts as a regression (default 20)")
+    parser.add_argument("--noise-floor", type=float, default=1.0,
+                        help="Slowdowns under this many microseconds never count (default 1)")
+    args = parser.parse_args()
+
+    game_dir = tmpfs_dir()
+    app = make_app(game_dir)
+    benchmarks = build_benchmarks(app)
+    if args.only:
+        unknown = set(args.only) - set(benchmarks)
+        if unknown:
+            parser.error(f"unknown benchmark(s): {', '.join(sorted(unknown))}")
+        benchmarks = {name: fn for name, fn in benchmarks.items() if name in args.only}
+
+    print(f"Output folder: {app.test_dir}")
+    print(f"{'benchmark':<34} {'best us':>10} {'median us':>10} {'spread':>7} {'calls/s':>12}")
+    results = {}
+    for name, fn in benchmarks.items():
+        res = measure(fn, args.repeat, args.min_time)
+        results[name] = res
+        print(f"{name:<34} {res['best_us']:>10.2f} {res['median_us']:>10.2f} {res['spread_pct']:>6.1f}% "
+              f"{res['calls_per_s']:>12.0f}")
+    app.stop()
+    app.pose_source.close()
+    app.output_channel.close()
+    shutil.rmtree(game_dir, ignore_errors=True)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({"environment": environment(), "results": results}, f, indent=2)
+        print(f"\nBaseline written to {args.save}")
+
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold, args.noise_floor)
+        if baseline.get("environment", {}).get("machine") != platform.machine():
+            print("Note: baseline was recorded on a different machine type.")
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.threshold:.0f}%: {', '.join(regressions)}")
+            sys.exit(1)
+        print(f"\nNo regressions over {args.threshold:.0f}%.")
+
+
+if __name__ == "__main__":
+    main()
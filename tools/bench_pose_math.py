@@ -0,0 +1,122 @@
+"""
+Per-tick cost of the HMD relative pose math: the original per-device path (4x4 build, np.linalg.inv,
+scalar atan2) against the batched PoseBatch path (quaternions, then Euler angles once for the output).
+
+PoseBatch converts the rotations row by row in plain Python up to SMALL_BATCH_ROWS rows and with whole
+array NumPy ops above that; the "numpy only" column forces the array path so the crossover is visible.
+On a single core test box (times vary by a few us run to run):
+
+     devices  per-device us  batched us  numpy only us  speedup
+           2           37.4        33.5           56.3     1.1x
+           4           49.9        33.1           50.6     1.5x
+           8           90.4        43.0           50.1     2.1x
+          16          174.8        55.6           54.4     3.1x
+
+The HMD + 2 controllers case only gains about 10%: most of what is left is the fixed cost of the NumPy
+gather and transform calls, which the per-device path pays too.
+
+    python tools/bench_pose_math.py --devices 2 4 8
+"""
+import argparse
+import math
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import FNVR_Tracker as fnvr  # noqa: E402
+
+
+def make_poses(device_count):
+    poses = (fnvr.TrackedDevicePose * fnvr.MAX_TRACKED_DEVICES)()
+    fnvr.set_pose(poses[fnvr.HMD_INDEX], fnvr.make_pose_matrix([0.0, 1.7, 0.0], yaw=12.0, pitch=-4.0, roll=1.0))
+    for i in range(1, device_count + 1):
+        fnvr.set_pose(poses[i], fnvr.make_pose_matrix([0.1 * i, 1.2, -0.3], yaw=10.0 * i, pitch=5.0, roll=-3.0 * i))
+    return poses
+
+
+def get_relative_transform(hmd_matrix_inv, device_pose):
+    """ The original per-device transform, as SimpleTrackingApp had it. """
+    dev_m = fnvr.get_pose_matrix(device_pose)
+    rel_m = hmd_matrix_inv @ dev_m
+    rel_pos = rel_m[:3, 3]
+    euler_angles = fnvr.rotation_matrix_to_euler_angles(rel_m[:3, :3])
+    rel_rot = [euler_angles[1], euler_angles[0], euler_angles[2]]
+    return rel_pos, rel_rot
+
+
+def apply_roll_correction(yaw, pitch, roll):
+    p_adj = pitch - 45.0
+    y_adj = yaw
+    rad_roll = math.radians(roll)
+    cos_r = math.cos(rad_roll)
+    sin_r = math.sin(rad_roll)
+    p_new = (p_adj * cos_r) - (y_adj * sin_r)
+    y_new = (p_adj * sin_r) + (y_adj * cos_r)
+    return y_new, p_new, roll
+
+
+def per_device_tick(poses, indices):
+    h_m = fnvr.get_pose_matrix(poses[fnvr.HMD_INDEX])
+    fnvr.rotation_matrix_to_euler_angles(h_m[:3, :3])
+    h_m_inv = fnvr.np.linalg.inv(h_m)
+    for idx in indices:
+        rel_pos, rel_rot = get_relative_transform(h_m_inv, poses[idx])
+        apply_roll_correction(*rel_rot)
+
+
+def batched_tick(batch, poses):
+    # encode_angles() includes the roll correction (batch.yaw_pitch)
+    batch.update(poses)
+    batch.encode_angles()
+
+
+def time_us(fn, number, repeat):
+    """ Median over `repeat` runs of the best of 3, per call. Less noisy than a single best on a busy box. """
+    runs = sorted(min(timeit.repeat(fn, number=number, repeat=3)) / number for _ in range(repeat))
+    return runs[len(runs) // 2] * 1e6
+
+
+def numpy_only_tick(batch, poses):
+    small = fnvr.SMALL_BATCH_ROWS
+    fnvr.SMALL_BATCH_ROWS = 0
+    try:
+        batched_tick(batch, poses)
+    finally:
+        fnvr.SMALL_BATCH_ROWS = small
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmark for per-tick pose math.")
+    parser.add_argument("--devices", type=int, nargs="+", default=[2, 4, 8, 16])
+    parser.add_argument("--number", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=9)
+    args = parser.parse_args()
+
+    batch = fnvr.PoseBatch()
+
+    print(f"{'devices':>8} {'per-device us':>14} {'batched us':>11} {'numpy only us':>14} {'speedup':>8}")
+    for count in args.devices:
+        poses = make_poses(count)
+        indices = list(range(1, count + 1))
+        batch.set_devices(indices)
+
+        # Sanity check: all paths agree
+        numpy_only_tick(batch, poses)
+        array_pose6 = batch.pose6[:count + 1].copy()
+        batched_tick(batch, poses)
+        assert fnvr.np.allclose(array_pose6, batch.pose6[:count + 1], atol=1e-9)
+        h_inv = fnvr.np.linalg.inv(fnvr.get_pose_matrix(poses[fnvr.HMD_INDEX]))
+        rel_pos, rel_rot = get_relative_transform(h_inv, poses[indices[-1]])
+        assert all(math.isclose(a, b, abs_tol=1e-5) for a, b in zip(rel_pos, batch.rel[count, :, 3]))
+        assert all(math.isclose(a, b, abs_tol=1e-3)
+                   for a, b in zip(apply_roll_correction(*rel_rot), batch.pose6[count, 3:]))
+
+        old = time_us(lambda: per_device_tick(poses, indices), args.number, args.repeat)
+        new = time_us(lambda: batched_tick(batch, poses), args.number, args.repeat)
+        array = time_us(lambda: numpy_only_tick(batch, poses), args.number, args.repeat)
+        print(f"{count:>8} {old:>14.1f} {new:>11.1f} {array:>14.1f} {old / new:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""
+Offline evaluator for the controller jitter filters.
+
+Replays recorded sessions (or scripted synthetic motion) through the same HMD relative pose math as the
+tracker, runs the controller positions and rotations (quaternions) through each filter and reports, on the
+angles the game gets, per filter:
+
+    jitter   RMS of the high frequency part of the output (output minus a local quadratic fit over --jitter-window)
+    lag      the delay that best lines the output up with the reference motion (least squares)
+    error    RMS distance from the reference motion, lag included
+
+for position (mm) and rotation (deg), next to the unfiltered input. The reference is a zero phase moving
+fit of the input (--ref-window), or the clean motion itself for synthetic runs. Synthetic motion is
+noise free, so add tracking noise with --noise-mm / --noise-deg.
+
+    python tools/eval_filter.py session.jsonl
+    python tools/eval_filter.py --synthetic 60 --noise-mm 0.5 --noise-deg 0.2 --sweep
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import FNVR_Tracker as fnvr  # noqa: E402
+
+np = fnvr.np
+
+
+def record_synthetic(seconds, rate):
+    clock = fnvr.SimulatedClock()
+    path = os.path.join(tempfile.mkdtemp(prefix="fnvr_filter_"), "synthetic.jsonl")
+    source = fnvr.RecordingPoseSource(fnvr.SyntheticPoseSource(clock, duration=seconds), path, clock=clock)
+    source.find_controllers()
+    while source.get_poses() is not None:
+        clock.sleep(1.0 / rate)
+    source.close()
+    return path
+
+
+def controller_trace(session):
+    """
+    Runs every frame through PoseBatch. Returns t (F,), positions (F, C, 3), rotations (F, C, 4) and
+    valid (F, C) for the controllers.
+    """
+    controllers = [c["index"] for c in session["controllers"] if c["index"] in session["devices"]]
+    cols = [session["devices"].index(i) for i in [fnvr.HMD_INDEX] + controllers]
+    poses = (fnvr.TrackedDevicePose * fnvr.MAX_TRACKED_DEVICES)()
+    view = fnvr.pose_array_view(poses)
+    batch = fnvr.PoseBatch()
+    batch.set_devices(controllers)
+    rows = [fnvr.HMD_INDEX] + controllers
+
+    frames = len(session["t"])
+    pos = np.zeros((frames, len(controllers), 3))
+    quat = np.zeros((frames, len(controllers), 4))
+    quat[..., 0] = 1.0
+    valid = np.zeros((frames, len(controllers)), dtype=bool)
+    for f in range(frames):
+        view['m'][rows] = session["m"][f, cols]
+        view['valid'][rows] = session["valid"][f, cols]
+        if batch.update(poses):
+            pos[f] = batch.pose6[1:batch.count, :3]
+            quat[f] = batch.quat[1:batch.count]
+            valid[f] = batch.valid[1:batch.count]
+    return session["t"], pos, quat, valid
+
+
+def encode(pos, quat):
+    """ (F, C, 6) x, y, z, yaw, pitch, roll like PoseBatch.pose6, from positions and rotations. """
+    flat = quat.reshape(-1, 4)
+    euler = fnvr.euler_angles_from_quaternions(flat, np.zeros((len(flat), 3)))
+    yaw_pitch = fnvr.roll_correction_batch(euler[:, 1], euler[:, 0], euler[:, 2])
+    angles = np.stack([yaw_pitch[0], yaw_pitch[1], euler[:, 2]], axis=-1).reshape(quat.shape[:-1] + (3,))
+    return np.concatenate([pos, angles], axis=-1)
+
+
+def add_noise(rng, pos, quat, noise_mm, noise_deg):
+    """ Gaussian position noise, and a random rotation of noise_deg per axis on top of every rotation. """
+    noisy_pos = pos + rng.normal(0.0, noise_mm / 1000.0, pos.shape)
+    flat = quat.reshape(-1, 4)
+    jitter = fnvr.quaternion_exp(rng.normal(0.0, noise_deg, (len(flat), 3)), np.zeros((len(flat), 4)))
+    noisy_quat = fnvr.multiply_quaternions(flat, jitter, np.zeros((len(flat), 4)))
+    return noisy_pos, fnvr.normalize_quaternions(noisy_quat).reshape(quat.shape)
+
+
+def unwrap(pose6):
+    """ Continuous angles along time, so differences and averages don't jump at +-180. """
+    out = pose6.copy()
+    out[..., 3:] = np.degrees(np.unwrap(np.radians(pose6[..., 3:]), axis=0))
+    return out
+
+
+def local_fit(x, window):
+    """
+    Centered (zero phase) Savitzky-Golay smoothing along axis 0: each sample is replaced by a quadratic
+    fitted to the `window` samples around it, so real motion (including its curvature) passes through
+    and only noise is removed. Edges are padded.
+    """
+    half = max(window // 2, 1)
+    k = np.arange(-half, half + 1)
+    kernel = np.linalg.pinv(np.vander(k, 3, increasing=True))[0]
+    padded = np.concatenate([np.repeat(x[:1], half, axis=0), x, np.repeat(x[-1:], half, axis=0)])
+    return np.apply_along_axis(lambda s: np.convolve(s, kernel[::-1], mode="valid"), 0, padded)
+
+
+def run_filter(pose_filter, t, pos, quat, valid):
+    """ Filtered (F, C, 6) poses, angles made from the filtered rotations the way the tracker does. """
+    pos, quat = pos.copy(), quat.copy()
+    if pose_filter is not None:
+        last = t[0]
+        for f in range(len(t)):
+            pose_filter.apply(pos[f], quat[f], valid[f], t[f] - last)
+            last = t[f]
+    return encode(pos, quat)
+
+
+def rms(vectors, mask):
+    return float(np.sqrt(np.mean(np.sum(vectors ** 2, axis=2)[mask])))
+
+
+def measure(output, reference, t, mask, axes, jitter_window):
+    """ (jitter, lag ms, error) of output on the given axes. """
+    out, ref = output[:, :, axes], reference[:, :, axes]
+    jitter = rms(out - local_fit(out, jitter_window), mask)
+
+    # Least squares delay: output(t) ~ reference(t - lag) ~ reference(t) - lag * reference'(t)
+    ref_speed = np.gradient(ref, t, axis=0)
+    behind = (ref - out)[mask]
+    speed = ref_speed[mask]
+    speed2 = np.sum(speed ** 2)
+    lag = float(np.sum(behind * speed) / speed2) if speed2 > 0 else 0.0
+    return jitter, lag * 1000.0, rms(ref - out, mask)
+
+
+def evaluate(name, params, pose_filter, t, noisy, reference, valid, jitter_window):
+    output = unwrap(run_filter(pose_filter, t, *noisy, valid))
+    # Skip the first half second while the filters settle
+    mask = valid & (t[:, None] - t[0] > 0.5)
+    pos_jitter, pos_lag, pos_error = measure(output, reference, t, mask, [0, 1, 2], jitter_window)
+    rot_jitter, rot_lag, rot_error = measure(output, reference, t, mask, [3, 4, 5], jitter_window)
+    return {"filter": name, "params": params,
+            "pos_jitter_mm": pos_jitter * 1000.0, "pos_lag_ms": pos_lag, "pos_error_mm": pos_error * 1000.0,
+            "rot_jitter_deg": rot_jitter, "rot_lag_ms": rot_lag, "rot_error_deg": rot_error}
+
+
+def filter_variants(config, sweep):
+    """ (name, params) pairs to evaluate, from the config and optionally scaled around it. """
+    variants = [("none", {})]
+    one_euro = dict(fnvr.DEFAULT_ONE_EURO, **config.get("one_euro", {}))
+    kalman = dict(fnvr.DEFAULT_KALMAN, **config.get("kalman", {}))
+    scales = (0.25, 0.5, 1.0, 2.0, 4.0) if sweep else (1.0,)
+    for s in scales:
+        variants.append(("one_euro", dict(one_euro, min_cutoff=(fnvr.axis_params(one_euro["min_cutoff"]) * s).tolist())))
+    for s in scales:
+        variants.append(("kalman", dict(kalman, process_noise=(fnvr.axis_params(kalman["process_noise"]) * s).tolist())))
+    return variants
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Jitter reduction vs added lag for the pose filters.")
+    parser.add_argument("recordings", nargs="*", help="Sessions written by RecordingPoseSource")
+    parser.add_argument("--synthetic", type=float, help="Evaluate N seconds of scripted motion instead")
+    parser.add_argument("--rate", type=float, default=100.0, help="Synthetic frame rate (default 100)")
+    parser.add_argument("--noise-mm", type=float, default=0.0, help="Gaussian position noise added to the input")
+    parser.add_argument("--noise-deg", type=float, default=0.0, help="Gaussian angle noise added to the input")
+    parser.add_argument("--ref-window", type=float, default=50.0,
+                        help="Window in ms of the zero phase fit used as reference for recordings (default 50)")
+    parser.add_argument("--jitter-window", type=float, default=50.0,
+                        help="Window in ms separating jitter from motion (default 50)")
+    parser.add_argument("--config", help="fnvr_config.txt to take the filter parameters from")
+    parser.add_argument("--sweep", action="store_true", help="Also try min_cutoff / process_noise x0.25 .. x4")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    config = {}
+    if args.config:
+        with open(args.config, 'r') as f:
+            config = json.load(f)
+
+    inputs = [(path, False) for path in args.recordings]
+    if args.synthetic:
+        inputs.append((record_synthetic(args.synthetic, args.rate), True))
+    if not inputs:
+        parser.error("give recordings or --synthetic")
+
+    rng = np.random.default_rng(args.seed)
+    results = []
+    for path, clean in inputs:
+        t, pos, quat, valid = controller_trace(fnvr.read_recording(path))
+        noisy = add_noise(rng, pos, quat, args.noise_mm, args.noise_deg)
+        if clean:
+            reference = unwrap(encode(pos, quat))
+        else:
+            window = max(1, int(round(args.ref_window / 1000.0 / np.median(np.diff(t)))))
+            reference = local_fit(unwrap(encode(*noisy)), window)
+
+        jitter_window = max(1, int(round(args.jitter_window / 1000.0 / np.median(np.diff(t)))))
+
+        label = "synthetic" if clean else path
+        print(f"\n{label}: {len(t)} frames, {pos.shape[1]} controllers")
+        print(f"{'filter':<10} {'pos jitter mm':>13} {'reduction':>9} {'lag ms':>7} {'err mm':>7} "
+              f"{'rot jitter deg':>14} {'reduction':>9} {'lag ms':>7} {'err deg':>7}  params")
+        baseline = None
+        for name, params in filter_variants(config, args.sweep):
+            pose_filter = fnvr.make_pose_filter(name, pos.shape[1], params)
+            r = evaluate(name, params, pose_filter, t, noisy, reference, valid, jitter_window)
+            if baseline is None:
+                baseline = r
+            pos_red = 100.0 * (1.0 - r["pos_jitter_mm"] / baseline["pos_jitter_mm"]) if baseline["pos_jitter_mm"] else 0.0
+            rot_red = 100.0 * (1.0 - r["rot_jitter_deg"] / baseline["rot_jitter_deg"]) if baseline["rot_jitter_deg"] else 0.0
+            shown = "" if name == "none" else ", ".join(
+                f"{k}={v[0] if isinstance(v, list) else v:g}" + ("" if not isinstance(v, list) else f"/{v[3]:g}")
+                for k, v in params.items())
+            print(f"{name:<10} {r['pos_jitter_mm']:>13.3f} {pos_red:>8.0f}% {r['pos_lag_ms']:>7.1f} "
+                  f"{r['pos_error_mm']:>7.2f} {r['rot_jitter_deg']:>14.3f} {rot_red:>8.0f}% {r['rot_lag_ms']:>7.1f} "
+                  f"{r['rot_error_deg']:>7.2f}  {shown}")
+            results.append(dict(r, recording=label, pos_reduction_pct=pos_red, rot_reduction_pct=rot_red))
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Offline evaluator for pose prediction.
+
+Replays recorded sessions, extrapolates every valid pose `h` ms ahead from its recorded velocities
+(the same extrapolate_poses the tracker uses) and compares it with the pose actually recorded h ms later.
+Reports position/rotation error per horizon next to the error of not predicting at all, plus overshoot
+(how far the prediction lands past where the device really went), so the extrapolation horizon can be
+tuned against latency.
+
+    python tools/eval_prediction.py session.jsonl --horizons 0 10 20 30 40 60
+"""
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import FNVR_Tracker as fnvr  # noqa: E402
+
+np = fnvr.np
+
+
+def rotation_angle(a, b):
+    """ Angle in degrees between stacks of rotation matrices. """
+    rel = np.einsum('nji,njk->nik', a, b)
+    cos = (np.trace(rel, axis1=1, axis2=2) - 1.0) / 2.0
+    return np.degrees(np.arccos(np.clip(cos, -1.0, 1.0)))
+
+
+def rotation_log(r):
+    """ Rotation vectors for a stack of rotation matrices. """
+    cos = np.clip((np.trace(r, axis1=1, axis2=2) - 1.0) / 2.0, -1.0, 1.0)
+    theta = np.arccos(cos)
+    axis = np.stack([r[:, 2, 1] - r[:, 1, 2], r[:, 0, 2] - r[:, 2, 0], r[:, 1, 0] - r[:, 0, 1]], axis=1)
+    scale = np.where(theta > 1e-9, theta / (2.0 * np.sin(np.maximum(theta, 1e-9))), 0.5)
+    return axis * scale[:, None]
+
+
+def interpolate(session, col, targets):
+    """ Pose of device column `col` at each target time: linear position, geodesic rotation. """
+    t, m = session["t"], session["m"][:, col]
+    hi = np.clip(np.searchsorted(t, targets), 1, len(t) - 1)
+    lo = hi - 1
+    span = np.maximum(t[hi] - t[lo], 1e-9)
+    frac = np.clip((targets - t[lo]) / span, 0.0, 1.0)
+
+    out = np.empty((len(targets), 3, 4))
+    out[:, :, 3] = m[lo, :, 3] + (m[hi, :, 3] - m[lo, :, 3]) * frac[:, None]
+    step = rotation_log(np.einsum('nji,njk->nik', m[lo, :, :3], m[hi, :, :3])) * frac[:, None]
+    zeros = np.zeros_like(step)
+    partial = fnvr.extrapolate_poses(np.concatenate([np.tile(np.eye(3), (len(step), 1, 1)),
+                                                     np.zeros((len(step), 3, 1))], axis=2),
+                                     zeros, step, 1.0)
+    out[:, :, :3] = m[lo, :, :3] @ partial[:, :, :3]
+    return out, lo, hi
+
+
+def evaluate(session, col, horizon):
+    t, valid = session["t"], session["valid"][:, col]
+    samples = np.nonzero(valid & (t + horizon <= t[-1]))[0]
+    if not len(samples):
+        return None
+    actual, lo, hi = interpolate(session, col, t[samples] + horizon)
+    keep = valid[lo] & valid[hi]
+    samples, actual = samples[keep], actual[keep]
+
+    current = session["m"][samples, col]
+    predicted = fnvr.extrapolate_poses(current, session["v"][samples, col], session["w"][samples, col], horizon)
+
+    pos_err = np.linalg.norm(predicted[:, :, 3] - actual[:, :, 3], axis=1) * 1000.0
+    rot_err = rotation_angle(predicted[:, :, :3], actual[:, :, :3])
+    lag_pos = np.linalg.norm(current[:, :, 3] - actual[:, :, 3], axis=1) * 1000.0
+    lag_rot = rotation_angle(current[:, :, :3], actual[:, :, :3])
+
+    # Overshoot: part of the error that lies beyond the real motion, along the direction of travel
+    travel = actual[:, :, 3] - current[:, :, 3]
+    dist = np.linalg.norm(travel, axis=1)
+    moving = dist > 1e-3
+    overshoot = 0.0
+    if moving.any():
+        direction = travel[moving] / dist[moving, None]
+        past = np.einsum('ij,ij->i', predicted[moving, :, 3] - actual[moving, :, 3], direction)
+        overshoot = float(np.mean(np.maximum(past, 0.0)) * 1000.0)
+
+    return {
+        "samples": int(len(samples)),
+        "pos_mean_mm": float(pos_err.mean()), "pos_p95_mm": float(np.percentile(pos_err, 95)),
+        "rot_mean_deg": float(rot_err.mean()), "rot_p95_deg": float(np.percentile(rot_err, 95)),
+        "lag_pos_mean_mm": float(lag_pos.mean()), "lag_rot_mean_deg": float(lag_rot.mean()),
+        "overshoot_mm": overshoot,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prediction error per horizon on recorded sessions.")
+    parser.add_argument("recordings", nargs="+", help="Sessions written by RecordingPoseSource")
+    parser.add_argument("--horizons", type=float, nargs="+", default=[0, 10, 20, 30, 40, 60, 80],
+                        help="Extrapolation horizons in ms")
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    results = []
+    for path in args.recordings:
+        session = fnvr.read_recording(path)
+        print(f"\n{path}: {len(session['t'])} frames, devices {session['devices']}")
+        print(f"{'device':>6} {'ms':>5} {'pos mm':>8} {'p95':>7} {'rot deg':>8} {'p95':>7} "
+              f"{'no-pred mm':>10} {'no-pred deg':>11} {'overshoot mm':>12}")
+        for col, device in enumerate(session["devices"]):
+            for horizon_ms in args.horizons:
+                r = evaluate(session, col, horizon_ms / 1000.0)
+                if r is None:
+                    continue
+                results.append(dict(r, recording=path, device=device, horizon_ms=horizon_ms))
+                print(f"{device:>6} {horizon_ms:>5.0f} {r['pos_mean_mm']:>8.2f} {r['pos_p95_mm']:>7.2f} "
+                      f"{r['rot_mean_deg']:>8.2f} {r['rot_p95_deg']:>7.2f} {r['lag_pos_mean_mm']:>10.2f} "
+                      f"{r['lag_rot_mean_deg']:>11.2f} {r['overshoot_mm']:>12.2f}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Summarizes a binary session written by SessionRecorder (--record, or app.start_session_recording()).
+
+The file is memory-mapped and scanned in chunks, so multi-hour sessions don't have to fit in RAM.
+
+    python tools/inspect_session.py session.fnvr
+    python tools/inspect_session.py session.fnvr --ticks 1000 1010     # dump a range of records
+    python tools/inspect_session.py session.fnvr --csv out.csv          # controller values and output as CSV
+"""
+import argparse
+import csv
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import FNVR_Tracker as fnvr  # noqa: E402
+
+np = fnvr.np
+
+
+def scan(records, chunk):
+    """ One pass over the records, chunk by chunk. Returns a dict of totals. """
+    totals = {"records": len(records), "output_sent": 0, "hmd_invalid": 0, "gaps": 0, "max_gap_ms": 0.0,
+              "gestures": {}, "slot_valid": None}
+    if not len(records):
+        return totals
+    dts = []
+    last_t = None
+    last_gesture = b"NONE"
+    for start in range(0, len(records), chunk):
+        part = records[start:start + chunk]
+        t = np.asarray(part['t'])
+        if last_t is not None:
+            t = np.concatenate([[last_t], t])
+        dts.append(np.diff(t))
+        last_t = t[-1]
+
+        totals["output_sent"] += int(np.count_nonzero(part['output_sent']))
+        totals["hmd_invalid"] += int(np.count_nonzero(~part['valid'][:, 0]))
+        valid = np.count_nonzero(part['valid'], axis=0)
+        totals["slot_valid"] = valid if totals["slot_valid"] is None else totals["slot_valid"] + valid
+
+        # Count gesture activations (changes into a state other than NONE)
+        gesture = part['gesture']
+        changed = np.nonzero(gesture != np.concatenate([[last_gesture], gesture[:-1]]))[0]
+        for g in gesture[changed]:
+            if g != b"NONE":
+                name = g.decode()
+                totals["gestures"][name] = totals["gestures"].get(name, 0) + 1
+        last_gesture = gesture[-1]
+
+    dt = np.concatenate(dts)
+    if len(dt):
+        median = float(np.median(dt))
+        totals["median_dt_ms"] = median * 1000.0
+        totals["gaps"] = int(np.count_nonzero(dt > 2.0 * median)) if median > 0 else 0
+        totals["max_gap_ms"] = float(dt.max()) * 1000.0
+    return totals
+
+
+def rounded(values, decimals):
+    return [round(float(v), decimals) for v in values]
+
+
+def dump(records, first, last):
+    for i in range(first, min(last, len(records))):
+        r = records[i]
+        devices = [int(d) for d in r['device'] if d >= 0]
+        print(f"#{int(r['tick'])} t={float(r['t']):.4f} devices={devices} valid={r['valid'][:len(devices)].tolist()} "
+              f"gesture={r['gesture'].decode()}")
+        print(f"    primary   pos={rounded(r['controller_pos'], 4)} rot={rounded(r['controller_rot'], 2)}")
+        print(f"    secondary pos={rounded(r['secondary_pos'], 4)} rot={rounded(r['secondary_rot'], 2)}")
+        if r['output_sent']:
+            print("    output    " + "_".join(f"{v:.2f}" for v in r['output']))
+
+
+def export_csv(records, path, chunk):
+    columns = ["tick", "t", "gesture", "output_sent"]
+    vectors = ["controller_pos", "controller_rot", "secondary_pos", "secondary_rot"]
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(columns + [f"{name}_{axis}" for name in vectors for axis in "xyz"]
+                        + [f"output_{i}" for i in range(fnvr.OUTPUT_VALUE_COUNT)])
+        for start in range(0, len(records), chunk):
+            part = records[start:start + chunk]
+            values = np.hstack([part[name] for name in vectors] + [part['output']])
+            for r, row in zip(part, values):
+                writer.writerow([int(r['tick']), f"{float(r['t']):.6f}", r['gesture'].decode(), int(r['output_sent'])]
+                                + [f"{v:.5f}" for v in row])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summary of a binary FNVR session file.")
+    parser.add_argument("session")
+    parser.add_argument("--ticks", nargs=2, type=int, metavar=("FIRST", "LAST"), help="Print records FIRST..LAST-1")
+    parser.add_argument("--csv", help="Write controller values and output frames to this CSV")
+    parser.add_argument("--chunk", type=int, default=65536, help="Records scanned at a time (default 65536)")
+    args = parser.parse_args()
+
+    header, records = fnvr.read_session(args.session)
+    print(f"{args.session}: {len(records)} records of {header['record_size']} bytes, "
+          f"{header['slots']} device slots, recorded {header.get('created', '?')}")
+    for kind in ("controllers", "trackers"):
+        print(f"{kind.capitalize()}: " + (", ".join(f"{c.get('role')} #{c['index']} {c.get('serial') or ''}".strip()
+                                                    for c in header.get(kind, [])) or "none"))
+
+    if args.ticks:
+        dump(records, *args.ticks)
+        return
+
+    totals = scan(records, args.chunk)
+    if totals["records"]:
+        duration = float(records[-1]['t'] - records[0]['t'])
+        print(f"Duration: {duration:.1f}s  Rate: {(len(records) - 1) / duration if duration > 0 else 0:.1f} Hz  "
+              f"median dt: {totals.get('median_dt_ms', 0):.2f} ms")
+        print(f"Gaps over 2x median dt: {totals['gaps']}  longest: {totals['max_gap_ms']:.1f} ms")
+        print(f"Output frames: {totals['output_sent']}  HMD invalid: {totals['hmd_invalid']}")
+        print("Valid per device slot: " + ", ".join(f"{100.0 * v / len(records):.1f}%" for v in totals["slot_valid"]))
+        print("Gesture activations: " + (", ".join(f"{k}: {v}" for k, v in sorted(totals["gestures"].items())) or "none"))
+
+    if args.csv:
+        export_csv(records, args.csv, args.chunk)
+        print(f"Wrote {args.csv}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Cold start time and steady state CPU use of the tracker, GUI mode vs headless daemon mode.
+
+Each mode runs in a fresh Python process on scripted synthetic motion at the configured tick rate.
+Cold start is the wall time from launching the process until the first tick has been tracked.
+CPU is the process CPU time spent per wall second once tracking is running (1.0 = one full core).
+
+    python tools/measure_startup.py --duration 10
+    python tools/measure_startup.py --modes headless --runs 5
+
+GUI mode needs a display; it is skipped when Tk can't open one.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def child(mode, duration, config_file):
+    """ Runs inside the measured process. Prints READY after the first tick, then a JSON result line. """
+    sys.path.insert(0, ROOT)
+    import FNVR_Tracker as fnvr
+
+    clock = fnvr.SystemClock()
+    app_options = {
+        "pose_source": fnvr.SyntheticPoseSource(clock, duration=duration),
+        "clock": clock,
+        "keyboard_backend": fnvr.VirtualKeyboard(record=False),
+        "config_file": config_file,
+    }
+    result = {}
+
+    def ready():
+        print("READY", flush=True)
+        result["cpu_start"] = time.process_time()
+        result["wall_start"] = time.perf_counter()
+
+    def finish(app):
+        result["cpu"] = time.process_time() - result["cpu_start"]
+        result["wall"] = time.perf_counter() - result["wall_start"]
+        result["ticks"] = app.scheduler.ticks
+        result["modules"] = sorted(m for m in ("tkinter", "keyboard") if m in sys.modules)
+        del result["cpu_start"], result["wall_start"]
+        print(json.dumps(result), flush=True)
+
+    if mode == "headless":
+        app = fnvr.SimpleTrackingApp(**app_options)
+        app.start()
+        while app.scheduler.ticks == 0 and app.thread.is_alive():
+            time.sleep(0.001)
+        ready()
+        app.thread.join()
+        app.stop()
+        finish(app)
+    else:
+        fnvr.load_gui_modules()
+        try:
+            root = fnvr.tk.Tk()
+        except fnvr.tk.TclError as e:
+            print(json.dumps({"skipped": str(e)}), flush=True)
+            return
+        gui = fnvr.TrackerGUI(root, **app_options)
+        gui.start_tracking()
+
+        def wait_first_tick():
+            if gui.app.scheduler.ticks == 0 and gui.app.thread.is_alive():
+                root.after(1, wait_first_tick)
+                return
+            ready()
+            poll_done()
+
+        def poll_done():
+            if gui.app.thread.is_alive():
+                root.after(50, poll_done)
+            else:
+                root.quit()
+
+        root.after(1, wait_first_tick)
+        root.mainloop()
+        gui.app.stop()
+        finish(gui.app)
+        root.destroy()
+
+
+def run_once(mode, duration, config_file):
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--child", mode,
+                             "--duration", str(duration), "--config", config_file],
+                            stdout=subprocess.PIPE, text=True)
+    cold_start = None
+    result = None
+    for line in proc.stdout:
+        line = line.strip()
+        if line == "READY":
+            cold_start = time.perf_counter() - start
+        elif line.startswith("{"):
+            result = json.loads(line)
+    proc.wait()
+    if result is None:
+        raise RuntimeError(f"{mode} run failed (exit code {proc.returncode})")
+    result["cold_start"] = cold_start
+    return result
+
+
+def interpreter_start():
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "pass"], check=True)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold start and CPU use, GUI vs headless.")
+    parser.add_argument("--modes", nargs="+", default=["gui", "headless"], choices=["gui", "headless"])
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of tracking per run (default 10)")
+    parser.add_argument("--runs", type=int, default=3, help="Runs per mode, best cold start is reported")
+    parser.add_argument("--child", choices=["gui", "headless"], help=argparse.SUPPRESS)
+    parser.add_argument("--config", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.duration, args.config)
+        return
+
+    game_dir = tempfile.mkdtemp(prefix="fnvr_startup_")
+    config_file = os.path.join(game_dir, "fnvr_config.txt")
+    with open(config_file, 'w') as f:
+        json.dump({"game_directory": game_dir}, f)
+
+    print(f"Python startup alone: {min(interpreter_start() for _ in range(3)) * 1000:.0f} ms")
+    print(f"{'mode':<10} {'cold start ms':>14} {'CPU %':>7} {'ticks/s':>8}  imported")
+    for mode in args.modes:
+        runs = [run_once(mode, args.duration, config_file) for _ in range(args.runs)]
+        if "skipped" in runs[0]:
+            print(f"{mode:<10} skipped: {runs[0]['skipped']}")
+            continue
+        cold = min(r["cold_start"] for r in runs)
+        cpu = sum(r["cpu"] for r in runs) / sum(r["wall"] for r in runs)
+        rate = sum(r["ticks"] for r in runs) / sum(r["wall"] for r in runs)
+        print(f"{mode:<10} {cold * 1000:>14.0f} {cpu * 100:>6.1f}% {rate:>8.1f}  {', '.join(runs[0]['modules']) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
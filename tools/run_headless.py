@@ -0,0 +1,88 @@
+"""
+Runs the full tracking loop without a headset, SteamVR or GUI.
+
+Examples:
+    python tools/run_headless.py --synthetic 60
+    python tools/run_headless.py --replay session.jsonl --game-dir /tmp/fnv
+    python tools/run_headless.py --synthetic 600 --record session.fnvr
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import FNVR_Tracker as fnvr  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless FNVR tracker run (replay or synthetic poses).")
+    parser.add_argument("--replay", help="Recording written by RecordingPoseSource or SessionRecorder")
+    parser.add_argument("--synthetic", type=float, default=30.0, help="Seconds of scripted motion (default 30)")
+    parser.add_argument("--game-dir", help="Fake game folder to write Data/NVSE/Test into (default: temp dir)")
+    parser.add_argument("--secondary", type=int, default=1, help="Secondary controller slot (-1 for none)")
+    parser.add_argument("--body-trackers", action="store_true",
+                        help="Synthetic: add waist and foot trackers, each with an output slot")
+    parser.add_argument("--record", help="Log every tick to this binary session file")
+    parser.add_argument("--stats-csv", help="Write per-stage latency percentiles and error counts to this CSV")
+    args = parser.parse_args()
+
+    game_dir = args.game_dir or tempfile.mkdtemp(prefix="fnvr_")
+    config_file = os.path.join(game_dir, "fnvr_config.txt")
+    if not os.path.exists(config_file):
+        with open(config_file, 'w') as f:
+            config = {"game_directory": game_dir}
+            if args.body_trackers:
+                config["tracker_slots"] = [role for _, role in fnvr.SyntheticPoseSource.BODY_TRACKERS]
+            json.dump(config, f)
+
+    clock = fnvr.SimulatedClock()
+    if args.replay:
+        source = fnvr.open_recording(args.replay)
+    else:
+        source = fnvr.SyntheticPoseSource(clock, duration=args.synthetic, body_trackers=args.body_trackers)
+
+    app = fnvr.SimpleTrackingApp(pose_source=source, clock=clock, keyboard_backend=fnvr.VirtualKeyboard(),
+                                 config_file=config_file)
+    app.secondary_controller_idx = args.secondary
+    if args.record:
+        app.start_session_recording(args.record)
+
+    start = time.perf_counter()
+    ticks = app.run_headless()
+    elapsed = time.perf_counter() - start
+    session = app.stop_session_recording()
+    source.close()
+
+    print(f"Ticks: {ticks}  Simulated: {clock.now():.1f}s  Wall: {elapsed:.3f}s")
+    if ticks:
+        print(f"Per tick: {elapsed / ticks * 1e6:.1f} us  ({ticks / elapsed:.0f} ticks/s)")
+    print(f"Key events: {len(app.keyboard.events)}  Output dir: {app.test_dir}")
+    if session:
+        print(f"Session: {session['written']} records, {session['bytes'] / 1e6:.1f} MB -> {args.record}")
+    output = app.get_output_stats()
+    if output:
+        print(f"Output frames: {output['published']} published, {output['suppressed']} suppressed "
+              f"({output['suppressed_pct']:.1f}%)")
+    idle = app.get_idle_stats()
+    if idle:
+        skipped = idle["idle_s"] * (app.tick_rate - idle["idle_rate"])
+        print(f"Idle: {idle['idle_pct']:.1f}% of the time, {idle['wakeups']} wakeups, ~{skipped:.0f} ticks skipped")
+
+    stats = app.get_stage_stats()
+    print(f"{'Stage':<10} {'p50 us':>8} {'p95 us':>8} {'p99 us':>8} {'max us':>8}")
+    for name, s in stats["stages"].items():
+        if s["count"]:
+            print(f"{name:<10} {s['p50_ms'] * 1000:8.1f} {s['p95_ms'] * 1000:8.1f} "
+                  f"{s['p99_ms'] * 1000:8.1f} {s['max_ms'] * 1000:8.1f}")
+    for name, count in stats["errors"].items():
+        print(f"Errors [{name}]: {count}  last: {stats['last_errors'].get(name, '')}")
+    if args.stats_csv:
+        app.export_stats_csv(args.stats_csv)
+        print(f"Stats written to {args.stats_csv}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""
+Stand-in for the game side of the filename channel, to see what the NVSE script actually gets.
+
+The tracker runs on scripted synthetic motion at --tick-rate and logs every frame it publishes (the tick
+time, when the rename finished, the name). A separate process polls Data/NVSE/Test at --poll-rate the way
+the script does every game frame: list the folder, take the file name, split it on "_" into numbers.
+Both sides stamp with time.perf_counter(), so the reads can be matched to the frames afterwards:
+
+    age        how old the frame was when read: since its tick started, and since its rename finished
+    stale      reads that got an older frame although a newer one had already been renamed into place
+    dropped    frames that were published but never read (expected when polling slower than the tick rate)
+    failures   reads that found no file, several files, a name that doesn't decode, or an OS error
+
+    python tools/sim_game_consumer.py --tick-rate 100 --poll-rate 60 --duration 20
+    python tools/sim_game_consumer.py --dir "E:/SteamLibrary/steamapps/common/Fallout New Vegas" --no-dedup
+
+Runs on tmpfs (/dev/shm) by default. Use --dir to test the real disk the game is installed on.
+"""
+import argparse
+import bisect
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import FNVR_Tracker as fnvr  # noqa: E402
+
+np = fnvr.np
+
+
+def consumer(test_dir, poll_rate, duration, values, out_path):
+    """ Runs in the child process. Prints READY, polls for `duration` seconds, then saves its reads. """
+    clock = fnvr.SystemClock()
+    scheduler = fnvr.FixedRateScheduler(clock, poll_rate)
+    reads = []
+    print("READY", flush=True)
+    end = time.perf_counter() + duration
+    scheduler.start()
+    while time.perf_counter() < end:
+        before = time.perf_counter()
+        try:
+            files = os.listdir(test_dir)
+            if not files:
+                result = "empty"
+            elif len(files) > 1:
+                result = "multiple"
+            else:
+                name = files[0]
+                parts = name.split("_")
+                try:
+                    decoded = [float(p) for p in parts]
+                    result = name if len(decoded) == values else "undecodable"
+                except ValueError:
+                    result = "undecodable"
+        except OSError as e:
+            result = f"error:{type(e).__name__}"
+        reads.append((before, time.perf_counter(), result))
+        scheduler.wait()
+    with open(out_path, 'w') as f:
+        json.dump({"reads": reads, "timing": scheduler.stats()}, f)
+
+
+class LoggedFilenameChannel(fnvr.FilenameOutputChannel):
+    """ The real filename channel, plus a log of (tick time, time the rename finished, name) per frame. """
+
+    def __init__(self, test_dir):
+        super().__init__(test_dir)
+        self.log = []
+
+    def publish(self, values, timestamp=0.0):
+        ok = super().publish(values, timestamp)
+        if ok:
+            self.log.append((timestamp, time.perf_counter(), "_".join([f"{v:.2f}" for v in values])))
+        return ok
+
+
+def percentiles(samples):
+    if not len(samples):
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+    p50, p95, p99 = np.percentile(samples, (50, 95, 99))
+    return {"p50": float(p50), "p95": float(p95), "p99": float(p99), "max": float(np.max(samples))}
+
+
+def analyze(log, reads, until):
+    """ Matches every read to the frame it saw, up to when the tracker stopped. Times are milliseconds. """
+    visible = [t_visible for _, t_visible, _ in log]
+    by_name = {}
+    for seq, (_, t_visible, name) in enumerate(log):
+        by_name.setdefault(name, []).append((t_visible, seq))
+
+    first_visible = visible[0] if visible else float("inf")
+    failures = {}
+    seen = set()
+    tick_age, visible_age, stale_by = [], [], []
+    repeats = 0
+    last_seq = None
+    for before, after, result in reads:
+        if after < first_visible or before > until:
+            continue  # Before the tracker's first frame or after it stopped
+        entries = by_name.get(result)
+        if entries is None:
+            kind = result if result in ("empty", "multiple", "undecodable") or result.startswith("error:") \
+                else "unknown"
+            failures[kind] = failures.get(kind, 0) + 1
+            continue
+        # Latest frame with that name that had been renamed into place by the end of the read
+        k = bisect.bisect_right(entries, (after, len(log))) - 1
+        seq = entries[max(k, 0)][1]
+        read_time = 0.5 * (before + after)
+        seen.add(seq)
+        tick_age.append((read_time - log[seq][0]) * 1000.0)
+        visible_age.append((read_time - log[seq][1]) * 1000.0)
+        newest = bisect.bisect_right(visible, before) - 1
+        if newest > seq:
+            stale_by.append(newest - seq)
+        if seq == last_seq:
+            repeats += 1
+        last_seq = seq
+
+    ok = len(tick_age)
+    counted = ok + sum(failures.values())
+    dropped = [seq for seq in range(len(log)) if seq not in seen]
+    longest = run = 0
+    for seq in range(len(log)):
+        run = run + 1 if seq not in seen else 0
+        longest = max(longest, run)
+    return {
+        "frames_published": len(log),
+        "reads": counted,
+        "reads_ok": ok,
+        "read_failures": failures,
+        "read_failure_pct": 100.0 * (counted - ok) / counted if counted else 0.0,
+        "repeat_reads": repeats,
+        "stale_reads": len(stale_by),
+        "stale_pct": 100.0 * len(stale_by) / ok if ok else 0.0,
+        "stale_frames_behind": percentiles(stale_by),
+        "frames_seen": len(seen),
+        "frames_dropped": len(dropped),
+        "dropped_pct": 100.0 * len(dropped) / len(log) if log else 0.0,
+        "longest_unread_run": longest,
+        "age_since_tick_ms": percentiles(tick_age),
+        "age_since_rename_ms": percentiles(visible_age),
+    }
+
+
+def run_tracker(game_dir, args):
+    config_file = os.path.join(game_dir, "fnvr_config.txt")
+    with open(config_file, 'w') as f:
+        json.dump({"game_directory": game_dir, "tick_rate": args.tick_rate, "output_channel": "filename",
+                   "output_dedup": args.dedup, "adaptive_rate": {"enabled": False}}, f)
+    clock = fnvr.SystemClock()
+    app = fnvr.SimpleTrackingApp(pose_source=fnvr.SyntheticPoseSource(clock), clock=clock,
+                                 keyboard_backend=fnvr.VirtualKeyboard(record=False), config_file=config_file)
+    app.secondary_controller_idx = 1
+    app.output_channel.close()
+    logged = LoggedFilenameChannel(app.test_dir)
+    app.output_channel = logged
+    if args.dedup:
+        app.output_channel = fnvr.DedupOutputWriter(logged, app.output_keepalive_ms / 1000.0)
+    return app, logged
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Game side consumer simulator for the filename channel.")
+    parser.add_argument("--tick-rate", type=float, default=fnvr.DEFAULT_TICK_RATE,
+                        help=f"Tracker rate in Hz (default {fnvr.DEFAULT_TICK_RATE})")
+    parser.add_argument("--poll-rate", type=float, default=60.0, help="Game side reads per second (default 60)")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds to measure (default 10)")
+    parser.add_argument("--dir", help="Game folder to create a scratch folder in (default: tmpfs or temp)")
+    parser.add_argument("--no-dedup", dest="dedup", action="store_false",
+                        help="Rename on every tick, even when the values didn't change")
+    parser.add_argument("--json", help="Also write the results to this file")
+    parser.add_argument("--consumer", nargs=4, metavar=("DIR", "RATE", "SECONDS", "OUT"), help=argparse.SUPPRESS)
+    parser.add_argument("--values", type=int, default=fnvr.OUTPUT_VALUE_COUNT, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.consumer:
+        test_dir, rate, seconds, out_path = args.consumer
+        consumer(test_dir, float(rate), float(seconds), args.values, out_path)
+        return
+
+    base = args.dir or ("/dev/shm" if os.path.isdir("/dev/shm") else None)
+    game_dir = tempfile.mkdtemp(prefix="fnvr_consumer_", dir=base)
+    try:
+        app, logged = run_tracker(game_dir, args)
+        reads_path = os.path.join(game_dir, "reads.json")
+        proc = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--values", str(len(app.output_values)),
+                                 "--consumer", app.test_dir, str(args.poll_rate), str(args.duration + 0.5),
+                                 reads_path], stdout=subprocess.PIPE, text=True)
+        proc.stdout.readline()  # READY
+
+        app.start()
+        time.sleep(args.duration)
+        app.stop()
+        stopped = time.perf_counter()
+        app.thread.join(1.0)
+        proc.wait()
+        with open(reads_path, 'r') as f:
+            consumer_run = json.load(f)
+        app.pose_source.close()
+
+        results = analyze(logged.log, consumer_run["reads"], stopped)
+        output = app.get_stage_stats()["stages"]["output"]
+        results.update({"tick_rate": args.tick_rate, "poll_rate": args.poll_rate, "dedup": args.dedup,
+                        "folder": game_dir, "tracker_hz": app.get_timing_stats()["achieved_hz"],
+                        "consumer_hz": consumer_run["timing"]["achieved_hz"],
+                        "rename_p50_ms": output["p50_ms"], "rename_p99_ms": output["p99_ms"]})
+    finally:
+        shutil.rmtree(game_dir, ignore_errors=True)
+
+    print(f"Folder: {results['folder']}  tracker {results['tracker_hz']:.1f} Hz  game {results['consumer_hz']:.1f} Hz  "
+          f"dedup {'on' if args.dedup else 'off'}")
+    print(f"Frames published: {results['frames_published']}  read at least once: {results['frames_seen']}  "
+          f"dropped: {results['frames_dropped']} ({results['dropped_pct']:.1f}%)  "
+          f"longest unread run: {results['longest_unread_run']}")
+    failures = ", ".join(f"{k} {v}" for k, v in sorted(results["read_failures"].items())) or "none"
+    print(f"Reads: {results['reads']}  failed: {results['read_failure_pct']:.2f}% ({failures})  "
+          f"same frame again: {results['repeat_reads']}")
+    print(f"Stale reads (newer frame already in place): {results['stale_reads']} ({results['stale_pct']:.2f}%)  "
+          f"frames behind p50/max: {results['stale_frames_behind']['p50']:.0f}/"
+          f"{results['stale_frames_behind']['max']:.0f}")
+    for label, key in (("since tick", "age_since_tick_ms"), ("since rename", "age_since_rename_ms")):
+        a = results[key]
+        print(f"Frame age {label:<13} p50 {a['p50']:7.2f}  p95 {a['p95']:7.2f}  p99 {a['p99']:7.2f}  "
+              f"max {a['max']:7.2f} ms")
+    print(f"Tracker output stage p50/p99: {results['rename_p50_ms']:.3f}/{results['rename_p99_ms']:.3f} ms")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Listens for the tracker's UDP frames (udp_publish in fnvr_config.txt) and reports what arrived.
+
+Every datagram carries a sequence number and the send time, so the receiver can tell lost, late
+(reordered) and duplicated frames apart and, on the same machine, measure the publish to receive latency.
+
+    python tools/udp_receiver.py                        # listen on 127.0.0.1:7331 until Ctrl+C
+    python tools/udp_receiver.py --port 7332 --duration 60 --json udp.json
+
+Run one receiver per target port listed in "udp_targets".
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import FNVR_Tracker as fnvr  # noqa: E402
+
+
+class SequenceTracker:
+    """ Counts frames by sequence number. Frames that show up after a later one count as reordered, not lost. """
+
+    def __init__(self):
+        self.received = 0
+        self.lost = 0
+        self.reordered = 0
+        self.duplicates = 0
+        self.restarts = 0
+        self.highest = None
+        self.missing = set()
+
+    def add(self, seq):
+        self.received += 1
+        if self.highest is None:
+            self.highest = seq
+        elif seq > self.highest:
+            gap = range(self.highest + 1, seq)
+            self.lost += len(gap)
+            # Only remember recent holes, anything older is lost for good
+            if len(gap) < 1024:
+                self.missing.update(gap)
+            self.highest = seq
+        elif seq in self.missing:
+            self.missing.discard(seq)
+            self.lost -= 1
+            self.reordered += 1
+        elif seq != 1 and self.highest - seq < 1024:
+            self.duplicates += 1
+        else:
+            # Sequence started over (or went far backwards): the tracker was restarted
+            self.restarts += 1
+            self.highest = seq
+            self.missing.clear()
+        if len(self.missing) > 4096:
+            self.missing = {s for s in self.missing if self.highest - s < 1024}
+
+    def stats(self):
+        return {"received": self.received, "lost": self.lost, "reordered": self.reordered,
+                "duplicates": self.duplicates, "restarts": self.restarts, "last_sequence": self.highest}
+
+
+def report(sequence, latency, elapsed):
+    stats = sequence.stats()
+    stats["rate_hz"] = stats["received"] / elapsed if elapsed > 0 else 0.0
+    lat = latency.stats()
+    stats["latency_ms"] = {"p50": lat["p50_ms"], "p99": lat["p99_ms"], "max": lat["max_ever_ms"]}
+    return stats
+
+
+def print_report(stats):
+    expected = stats["received"] + stats["lost"]
+    loss = 100.0 * stats["lost"] / expected if expected else 0.0
+    lat = stats["latency_ms"]
+    print(f"{stats['received']} frames  {stats['rate_hz']:.1f} Hz  lost: {stats['lost']} ({loss:.2f}%)  "
+          f"reordered: {stats['reordered']}  duplicates: {stats['duplicates']}  restarts: {stats['restarts']}  "
+          f"latency p50/p99/max: {lat['p50']:.3f}/{lat['p99']:.3f}/{lat['max']:.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Receive and check FNVR UDP frames.")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on (default 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=7331, help="Port to listen on (default 7331)")
+    parser.add_argument("--interval", type=float, default=5.0, help="Seconds between reports (default 5)")
+    parser.add_argument("--duration", type=float, default=0.0, help="Stop after N seconds (default: Ctrl+C)")
+    parser.add_argument("--show", action="store_true", help="Print the values of each frame")
+    parser.add_argument("--json", help="Write the final report to this file")
+    args = parser.parse_args()
+
+    receiver = fnvr.UdpFrameReceiver(args.port, args.host, timeout=0.2)
+    sequence = SequenceTracker()
+    latency = fnvr.LatencyHistogram(8192)
+    print(f"Listening on {args.host}:{args.port}")
+
+    start = time.perf_counter()
+    next_report = start + args.interval
+    try:
+        while not args.duration or time.perf_counter() - start < args.duration:
+            frame = receiver.recv()
+            now = time.perf_counter()
+            if frame is not None:
+                seq, frame_time, send_time, received, values = frame
+                sequence.add(seq)
+                # Only meaningful when the tracker runs on this machine (same perf_counter clock)
+                if received >= send_time:
+                    latency.record(received - send_time)
+                if args.show:
+                    print(f"#{seq} t={frame_time:.4f} " + "_".join(f"{v:.2f}" for v in values))
+            if args.interval > 0 and now >= next_report:
+                print_report(report(sequence, latency, now - start))
+                next_report = now + args.interval
+    except KeyboardInterrupt:
+        pass
+    finally:
+        receiver.close()
+
+    stats = report(sequence, latency, time.perf_counter() - start)
+    print_report(stats)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(stats, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()